@@ -0,0 +1,309 @@
+import os
+import glob
+import numpy as np
+
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from b2c2.frames import QuoteStreamFrame, LevelResponse, LevelItem
+from b2c2.tick_format import (
+    HEADER, TickFileHeader, IndexBlock, record_dtype, read_index,
+    from_fixed, TICK_SUFFIX,
+)
+
+
+Timestamp = Union[int, datetime, None]
+
+
+def _to_millis(timestamp: Timestamp) -> Optional[int]:
+    if isinstance(timestamp, datetime):
+        return int(timestamp.timestamp() * 1000)
+
+    return timestamp
+
+
+class TickChunk:
+    """
+    Records read from one tick file.
+
+    `records` is a NumPy structured array (see
+    `b2c2.tick_format.record_dtype`). It is a view straight onto
+    the memory mapped file unless records had to be filtered out,
+    in which case it's a copy of the ones that matched.
+    """
+
+    def __init__(self, tick_file: 'TickFile', records: np.ndarray):
+        self.tick_file = tick_file
+        self.records = records
+
+    def __len__(self):
+        return len(self.records)
+
+    def instruments(self) -> List[str]:
+        """
+        The instrument of each record
+        """
+        names = self.tick_file.instrument_names
+        return [names[id_] for id_ in self.records['instrument'].tolist()]
+
+    def frames(self) -> Iterator[QuoteStreamFrame]:
+        """
+        Rebuilds the price frames, one at a time
+        """
+        for record in self.records:
+            yield self.tick_file.to_frame(record)
+
+
+class TickFile:
+    """
+    A memory mapped tick file written by `b2c2.recorder.TickRecorder`.
+
+    Only the records in the file's index are mapped, so a file
+    that is still being written can be read safely.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, 'rb') as f:
+            self.header = TickFileHeader.unpack(f.read(HEADER.size))
+
+        index = read_index(path)
+        self.blocks = [IndexBlock(*block) for block in index['blocks']]
+        self.instrument_ids: Dict[str, int] = {
+            name: entry['id']
+            for name, entry in index['instruments'].items()
+        }
+        self.instrument_names = {
+            id_: name for name, id_ in self.instrument_ids.items()
+        }
+
+        self.dtype = record_dtype(self.header.depth)
+        self.records: np.ndarray
+        if index['records']:
+            self.records = np.memmap(
+                path, dtype=self.dtype, mode='r', offset=HEADER.size,
+                shape=(index['records'],)
+            )
+        else:
+            # Can't map nothing
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def first_timestamp(self) -> Optional[int]:
+        if not self.blocks:
+            return None
+        return min(block.first_timestamp for block in self.blocks)
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if not self.blocks:
+            return None
+        return max(block.last_timestamp for block in self.blocks)
+
+    def _ranges(self, ids: Optional[set], start, end):
+        """
+        Uses the block index to find the record ranges that might
+        match, merging neighbouring blocks.
+
+        :returns: (first, stop, needs filtering) tuples
+        """
+        ranges: list = []
+        for block in self.blocks:
+            if start is not None and block.last_timestamp < start:
+                continue
+            if end is not None and block.first_timestamp >= end:
+                continue
+            if ids is not None and ids.isdisjoint(block.instruments):
+                continue
+
+            needs_filter = (
+                start is not None and block.first_timestamp < start or
+                end is not None and block.last_timestamp >= end or
+                ids is not None and not ids.issuperset(block.instruments)
+            )
+            stop = block.offset + block.size
+
+            if ranges and ranges[-1][1] == block.offset:
+                first, _, filtered = ranges[-1]
+                ranges[-1] = (first, stop, filtered or needs_filter)
+            else:
+                ranges.append((block.offset, stop, needs_filter))
+
+        return ranges
+
+    def query(
+        self, instruments: Optional[Iterable[str]] = None,
+        start: Timestamp = None, end: Timestamp = None,
+        chunk_size: int = 65536
+    ) -> Iterator[TickChunk]:
+        """
+        :param instruments: only these instruments
+        :param start: only records from this time (ms or datetime)
+        :param end: only records before this time (ms or datetime)
+        :param chunk_size: the most records in a chunk (before
+            filtering)
+        """
+        ids = None
+        if instruments is not None:
+            ids = {
+                self.instrument_ids[name] for name in instruments
+                if name in self.instrument_ids
+            }
+            if not ids:
+                return
+
+        start, end = _to_millis(start), _to_millis(end)
+
+        for first, stop, needs_filter in self._ranges(ids, start, end):
+            for offset in range(first, stop, chunk_size):
+                records = self.records[offset:min(offset + chunk_size, stop)]
+
+                if needs_filter:
+                    mask = np.ones(len(records), dtype=bool)
+                    timestamps = records['timestamp']
+                    if start is not None:
+                        mask &= timestamps >= start
+                    if end is not None:
+                        mask &= timestamps < end
+                    if ids is not None:
+                        mask &= np.isin(records['instrument'], list(ids))
+
+                    if not mask.all():
+                        records = records[mask]
+
+                if len(records):
+                    yield TickChunk(self, records)
+
+    def to_raw(self, record) -> dict:
+        """
+        The record as the server would have sent it
+        """
+        header = self.header
+
+        def _side(side):
+            count = record[side + '_count']
+            return [
+                {
+                    'quantity': str(
+                        from_fixed(quantity, header.quantity_decimals)
+                    ),
+                    'price': str(from_fixed(price, header.price_decimals)),
+                }
+                for quantity, price in zip(
+                    record[side + '_quantity'][:count].tolist(),
+                    record[side + '_price'][:count].tolist(),
+                )
+            ]
+
+        return {
+            'event': 'price',
+            'success': True,
+            'instrument': self.instrument_names[int(record['instrument'])],
+            'timestamp': int(record['timestamp']),
+            'levels': {'buy': _side('buy'), 'sell': _side('sell')},
+        }
+
+    def to_frame(self, record) -> QuoteStreamFrame:
+        """
+        Rebuilds the price frame of a record
+        """
+        header = self.header
+
+        def _side(side):
+            count = record[side + '_count']
+            return [
+                LevelItem.construct(
+                    quantity=from_fixed(quantity, header.quantity_decimals),
+                    price=from_fixed(price, header.price_decimals),
+                )
+                for quantity, price in zip(
+                    record[side + '_quantity'][:count].tolist(),
+                    record[side + '_price'][:count].tolist(),
+                )
+            ]
+
+        return QuoteStreamFrame.construct(
+            event='price',
+            success=True,
+            instrument=self.instrument_names[int(record['instrument'])],
+            timestamp=int(record['timestamp']),
+            levels=LevelResponse.construct(
+                buy=_side('buy'), sell=_side('sell')
+            ),
+        )
+
+
+class TickArchive:
+    """
+    Reads a directory of tick files.
+
+    Files are memory mapped and read in chunks, so an archive
+    far bigger than memory can be queried. Frames are only
+    rebuilt when asked for:
+
+    .. code-block:: python
+
+        archive = TickArchive('ticks/')
+        for chunk in archive.query(['BTCUSD.SPOT'], start=yesterday):
+            mids = (
+                chunk.records['buy_price'][:, 0] +
+                chunk.records['sell_price'][:, 0]
+            ) / 2
+            ...
+
+        for frame in archive.frames(['BTCUSD.SPOT']):
+            ...
+
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.files = [
+            TickFile(path) for path in sorted(
+                glob.glob(os.path.join(directory, '*' + TICK_SUFFIX))
+            )
+        ]
+
+    def __len__(self):
+        return sum(len(tick_file) for tick_file in self.files)
+
+    @property
+    def instruments(self) -> set:
+        return {
+            name for tick_file in self.files
+            for name in tick_file.instrument_ids
+        }
+
+    def query(
+        self, instruments: Optional[Iterable[str]] = None,
+        start: Timestamp = None, end: Timestamp = None,
+        chunk_size: int = 65536
+    ) -> Iterator[TickChunk]:
+        """
+        Chunks of records from every file, see `TickFile.query`
+        """
+        start, end = _to_millis(start), _to_millis(end)
+        if instruments is not None:
+            instruments = set(instruments)
+
+        for tick_file in self.files:
+            first, last = tick_file.first_timestamp, tick_file.last_timestamp
+            if first is None or last is None:
+                continue
+            if start is not None and last < start:
+                continue
+            if end is not None and first >= end:
+                continue
+
+            yield from tick_file.query(instruments, start, end, chunk_size)
+
+    def frames(
+        self, instruments: Optional[Iterable[str]] = None,
+        start: Timestamp = None, end: Timestamp = None,
+    ) -> Iterator[QuoteStreamFrame]:
+        for chunk in self.query(instruments, start, end):
+            yield from chunk.frames()
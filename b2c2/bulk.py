@@ -0,0 +1,122 @@
+"""
+Runs many requests for quote at once, see
+`BaseB2C2APIClient.request_quotes` and
+`AsyncBaseB2C2APIClient.request_quotes`.
+"""
+import time
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Awaitable, Callable, List, NamedTuple, Sequence, Tuple, Union
+)
+
+from b2c2.models import Quote, RequestForQuote
+
+
+QuoteResult = Union[Quote, Exception]
+
+
+class BulkQuotes(NamedTuple):
+    # A quote or the exception raised requesting it, in the order
+    # of the requests
+    results: List[QuoteResult]
+    # Seconds each request took, in the same order
+    latencies: List[float]
+    # Seconds for the whole batch
+    elapsed: float
+
+    @property
+    def quotes(self) -> List[Quote]:
+        return [
+            result for result in self.results
+            if not isinstance(result, Exception)
+        ]
+
+    @property
+    def errors(self) -> List[Tuple[int, Exception]]:
+        """
+        (position, exception) of every request that failed
+        """
+        return [
+            (i, result) for i, result in enumerate(self.results)
+            if isinstance(result, Exception)
+        ]
+
+    @property
+    def total_latency(self) -> float:
+        """
+        About how long the batch would have taken one request at
+        a time
+        """
+        return sum(self.latencies)
+
+    @property
+    def speedup(self) -> float:
+        return self.total_latency / self.elapsed if self.elapsed else 0.0
+
+
+def _check_concurrency(concurrency: int) -> None:
+    if concurrency < 1:
+        raise ValueError('Concurrency must be at least 1')
+
+
+def request_quotes(
+    request: Callable[[RequestForQuote], Quote],
+    rfqs: Sequence[RequestForQuote], concurrency: int
+) -> BulkQuotes:
+    """
+    Calls `request` for every RFQ from a pool of `concurrency`
+    threads.
+    """
+    _check_concurrency(concurrency)
+
+    def _timed(rfq):
+        started = time.perf_counter()
+        try:
+            result: QuoteResult = request(rfq)
+        except Exception as e:
+            result = e
+        return result, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix='b2c2-rfq'
+    ) as executor:
+        timed = list(executor.map(_timed, rfqs))
+
+    return BulkQuotes(
+        results=[result for result, _ in timed],
+        latencies=[latency for _, latency in timed],
+        elapsed=time.perf_counter() - started,
+    )
+
+
+async def request_quotes_async(
+    request: Callable[[RequestForQuote], Awaitable[Quote]],
+    rfqs: Sequence[RequestForQuote], concurrency: int
+) -> BulkQuotes:
+    """
+    Awaits `request` for every RFQ, no more than `concurrency` at
+    a time.
+    """
+    _check_concurrency(concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _timed(rfq):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result: QuoteResult = await request(rfq)
+            except Exception as e:
+                result = e
+            return result, time.perf_counter() - started
+
+    started = time.perf_counter()
+    timed = await asyncio.gather(*(_timed(rfq) for rfq in rfqs))
+
+    return BulkQuotes(
+        results=[result for result, _ in timed],
+        latencies=[latency for _, latency in timed],
+        elapsed=time.perf_counter() - started,
+    )
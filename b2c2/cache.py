@@ -0,0 +1,171 @@
+"""
+A TTL cache for API responses, configured per endpoint in
+`Meta.definition`:
+
+.. code-block:: python
+
+    '/instruments/': {
+        'GET': {
+            'response': Instruments,
+            # Fresh for 5 minutes, then served stale for up to an
+            # hour while it's fetched again in the background
+            'cache': {'ttl': 300, 'stale_while_revalidate': 3600},
+        }
+    },
+    '/trade/': {
+        'POST': {
+            ...
+            # Dropped from the cache after every trade
+            'invalidates': ['/balance/'],
+        }
+    },
+
+Cached responses are shared between callers, treat them as
+read only.
+"""
+import time
+import threading
+
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+
+class CachePolicy(NamedTuple):
+    # Seconds a response is fresh
+    ttl: float
+    # Seconds after that it's still returned, while a new one is
+    # fetched in the background
+    stale_while_revalidate: float = 0
+
+
+FRESH = 'fresh'
+STALE = 'stale'
+MISS = 'miss'
+
+
+class _Entry(NamedTuple):
+    value: Any
+    stored_at: float
+
+
+class ResponseCache:
+    """
+    Responses by endpoint, safe to share between threads.
+
+    Every lookup is counted per API path (see `stats()`):
+    fresh hits, stale hits, misses, background revalidations and
+    invalidations.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, _Entry] = {}
+        # Bumped by invalidations, so a response that was in flight
+        # when its path was invalidated isn't stored
+        self._generations: Counter = Counter()
+        self._revalidating: set = set()
+        self._stats: Dict[str, Counter] = {}
+
+    @staticmethod
+    def _path(key: Hashable) -> str:
+        # Keys are (method, api path)
+        return key[1]  # type: ignore
+
+    def _count(self, path: str, event: str) -> None:
+        self._stats.setdefault(path, Counter())[event] += 1
+
+    def lookup(
+        self, key: Hashable, policy: CachePolicy
+    ) -> Tuple[Optional[Any], str, int]:
+        """
+        :returns: (value, FRESH, STALE or MISS, generation), pass
+            the generation back to `store()`
+        """
+        path = self._path(key)
+        with self._lock:
+            generation = self._generations[path]
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = self._clock() - entry.stored_at
+                if age < policy.ttl:
+                    self._count(path, 'hits')
+                    return entry.value, FRESH, generation
+                if age < policy.ttl + policy.stale_while_revalidate:
+                    self._count(path, 'stale_hits')
+                    return entry.value, STALE, generation
+
+            self._count(path, 'misses')
+            return None, MISS, generation
+
+    def store(self, key: Hashable, value: Any, generation: int) -> bool:
+        """
+        :returns: False if the path was invalidated since the
+            lookup, the value isn't stored then
+        """
+        path = self._path(key)
+        with self._lock:
+            if self._generations[path] != generation:
+                return False
+
+            self._entries[key] = _Entry(value, self._clock())
+            return True
+
+    def generation(self, api_path: str) -> int:
+        """
+        How many times the path has been invalidated
+        """
+        with self._lock:
+            return self._generations[api_path]
+
+    def start_revalidation(self, key: Hashable) -> bool:
+        """
+        :returns: True if the caller should fetch the entry again,
+            False if someone already is
+        """
+        with self._lock:
+            if key in self._revalidating:
+                return False
+
+            self._revalidating.add(key)
+            self._count(self._path(key), 'revalidations')
+            return True
+
+    def end_revalidation(self, key: Hashable) -> None:
+        with self._lock:
+            self._revalidating.discard(key)
+
+    def invalidate(self, api_path: str) -> None:
+        with self._lock:
+            self._generations[api_path] += 1
+            self._count(api_path, 'invalidations')
+            for key in [k for k in self._entries if self._path(k) == api_path]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in {self._path(key) for key in self._entries}:
+                self._generations[path] += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        The counters of every API path
+        """
+        with self._lock:
+            return {path: dict(stats) for path, stats in self._stats.items()}
+
+    def _total(self, event: str) -> int:
+        with self._lock:
+            return sum(stats[event] for stats in self._stats.values())
+
+    @property
+    def hits(self) -> int:
+        """
+        Fresh and stale hits
+        """
+        return self._total('hits') + self._total('stale_hits')
+
+    @property
+    def misses(self) -> int:
+        return self._total('misses')
@@ -1,18 +1,26 @@
 import warnings
 import asyncio
+import functools
 import requests.adapters
 import os
 import uuid
 import logging
 
+from typing import Optional, Sequence
+
 from b2c2 import __version__
+from b2c2.bulk import BulkQuotes, request_quotes, request_quotes_async
 from b2c2.exceptions import http_exceptions
-from b2c2.websocket import Fanout
+from b2c2.execution import (
+    Execution, Predicate, TradeTemplate, execute_at_quote,
+    execute_at_quote_async
+)
+from b2c2.fanout import Fanout
 from b2c2.views.instrument import InstrumentView
 from b2c2.views.quote import QuoteView
 from b2c2.views.history import HistoryView
 from b2c2.views.balance import BalanceView
-from b2c2.open_api_client import OpenAPIClient
+from b2c2.open_api_client import OpenAPIClient, AsyncOpenAPIClient
 from b2c2.models import (
     Instruments, RequestForQuote, Quote,
     Trade, TradeResponse, Balances
@@ -105,13 +113,13 @@ class env:
     }
 
 
-class BaseB2C2APIClient(OpenAPIClient):
+class B2C2ClientMixin:
     """
-    Base API client. Useful for application
-    developers.
+    Credentials, headers and logging shared by the blocking and
+    the asyncio clients.
     """
 
-    def __init__(self, env: dict, api_key=None, **kwargs):
+    def _load_api_key(self, api_key=None):
         if api_key:
             warnings.warn(
                 'Passing the API key through the client is '
@@ -125,24 +133,66 @@ class BaseB2C2APIClient(OpenAPIClient):
         else:
             raise ValueError('No API Key Found')
 
-        self.env = env
-        super().__init__(self.env['rest_api'])
-        adapter = B2C2AuthAdapter(self)
-        self._session.mount('http://', adapter)
-        self._session.mount('https://', adapter)
-        self._session.hooks['response'].append(self._response_hook)
-        self._logger = self._get_logger()
+        # The same for every request
+        self._header_template = {
+            'User-Agent': f'RolloB2C2Client/{__version__}',
+            'Authorization': f'Token {self._api_key}'
+        }
 
     # Exposing this for tests
     def _get_request_id(self):
         return str(uuid.uuid4())
 
     def _get_headers(self):
-        return {
-            'User-Agent': f'RolloB2C2Client/{__version__}',
-            'X-Request-ID': self._get_request_id(),
-            'Authorization': f'Token {self._api_key}'
-        }
+        headers = self._header_template.copy()
+        headers['X-Request-ID'] = self._get_request_id()
+        return headers
+
+    def _get_logger(self):
+        return logging.getLogger(
+            'b2c2.client.{}'.format(
+                self._api_key[:5]
+            )
+        )
+
+    def _record_quote(self, quote: Quote) -> None:
+        """
+        Called with every quote of `request_quotes` and
+        `execute_at_quote`, on the thread that called it.
+        """
+
+    def _record_trade(self, trade: TradeResponse) -> None:
+        """
+        Called with the trade of `execute_at_quote`
+        """
+
+
+class BaseB2C2APIClient(B2C2ClientMixin, OpenAPIClient):
+    """
+    Base API client. Useful for application
+    developers.
+    """
+
+    def __init__(
+        self, env: dict, api_key=None, strict_validation=False,
+        pin_environment=False, **kwargs
+    ):
+        """
+        :param strict_validation: validate every response with
+            pydantic, e.g. when debugging. By default the trading
+            endpoints trust the API, see `b2c2.codecs`.
+        :param pin_environment: see `OpenAPIClient`
+        """
+        self._load_api_key(api_key)
+        self.env = env
+        super().__init__(
+            self.env['rest_api'], strict_validation, pin_environment
+        )
+        adapter = B2C2AuthAdapter(self)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._session.hooks['response'].append(self._response_hook)
+        self._logger = self._get_logger()
 
     def _response_hook(self, response, *args, **kwargs):
         if not response.ok:
@@ -154,12 +204,79 @@ class BaseB2C2APIClient(OpenAPIClient):
 
         return response
 
-    def _get_logger(self):
-        return logging.getLogger(
-            'b2c2.client.{}'.format(
-                self._api_key[:5]
+    def request_quotes(
+        self, rfqs: Sequence[RequestForQuote], concurrency: int = 8
+    ) -> BulkQuotes:
+        """
+        Requests quotes for many RFQs at once, from a pool of
+        `concurrency` threads, rather than paying the round trip
+        of each one in turn:
+
+        .. code-block:: python
+
+            bulk = client.request_quotes(basket)
+            for rfq, result in zip(basket, bulk.results):
+                ...
+            bulk.elapsed, bulk.total_latency
+
+        A failed request doesn't fail the rest, its exception is
+        returned in its place (see `b2c2.bulk.BulkQuotes`).
+
+        The session keeps 10 connections per host, requests beyond
+        that still work but open a new connection each time.
+        """
+        # Straight to the request, quotes are recorded once they
+        # are all back (the history isn't thread safe)
+        bulk = request_quotes(
+            functools.partial(
+                BaseB2C2APIClient.post_request_for_quote, self
+            ),
+            rfqs, concurrency
+        )
+        for quote in bulk.quotes:
+            self._record_quote(quote)
+
+        return bulk
+
+    def execute_at_quote(
+        self, rfq: RequestForQuote, acceptance_predicate: Predicate,
+        executing_unit: Optional[str] = None
+    ) -> Execution:
+        """
+        Requests a quote and trades it as soon as
+        `acceptance_predicate` accepts it:
+
+        .. code-block:: python
+
+            execution = client.execute_at_quote(
+                rfq, lambda quote: quote.price <= limit
             )
+            if execution.accepted:
+                execution.trade, execution.trade_latency
+
+        The trade is built from the RFQ before it's sent, once the
+        quote is back only its id and price are filled in. Both
+        requests go over the session's pooled connection, and the
+        quote and the trade are recorded once the trade's done.
+
+        :returns: the quote, the trade (None if it wasn't accepted)
+            and how long each step took, see
+            `b2c2.execution.Execution`
+        """
+        template = TradeTemplate(
+            rfq, executing_unit, validate=self.strict_validation
+        )
+        execution = execute_at_quote(
+            functools.partial(
+                BaseB2C2APIClient.post_request_for_quote, self
+            ),
+            functools.partial(BaseB2C2APIClient.post_trade, self),
+            rfq, acceptance_predicate, template, self._record_quote,
         )
+        if execution.trade is not None:
+            self._record_trade(execution.trade)
+
+        return execution
 
     class Meta:
         # This is a poor mans OpenAPI definition.
@@ -171,9 +288,12 @@ class BaseB2C2APIClient(OpenAPIClient):
         # constraints. But this *should* suffice to get the gist of
         # what I am doing across.
         definition = {
+            # Caching is described in `b2c2.cache`
             '/instruments/': {
                 'GET': {
-                    'response': Instruments
+                    'response': Instruments,
+                    # Rarely changes, the GUI asks on every render
+                    'cache': {'ttl': 300, 'stale_while_revalidate': 3600},
                 }
             },
             '/request_for_quote/': {
@@ -186,16 +306,102 @@ class BaseB2C2APIClient(OpenAPIClient):
                 'POST': {
                     'body': Trade,
                     'response': TradeResponse,
+                    'invalidates': ['/balance/'],
                 }
             },
             '/balance/': {
                 'GET': {
-                    'response': Balances
+                    'response': Balances,
+                    # Shared by every balance view, trades made
+                    # through this client invalidate it
+                    'cache': {'ttl': 5},
                 }
             }
         }
 
 
+class AsyncBaseB2C2APIClient(B2C2ClientMixin, AsyncOpenAPIClient):
+    """
+    The asyncio version of `BaseB2C2APIClient`, its methods are
+    coroutines:
+
+    .. code-block:: python
+
+        async with AsyncBaseB2C2APIClient(env.uat) as client:
+            quote = await client.post_request_for_quote(rfq)
+            trade = await client.post_trade(quote.get_trade())
+
+    Models bound to it (see `b2c2.models.requires_bind`) return
+    coroutines too, e.g. ``await rfq.get_quote()``.
+    """
+
+    def __init__(
+        self, env: dict, api_key=None, strict_validation=False,
+        **session_kwargs
+    ):
+        """
+        :param strict_validation: see `BaseB2C2APIClient`
+        :param session_kwargs: passed to `aiohttp.ClientSession`
+        """
+        self._load_api_key(api_key)
+        self.env = env
+        super().__init__(
+            self.env['rest_api'], strict_validation, **session_kwargs
+        )
+        self._logger = self._get_logger()
+
+    async def _response_hook(self, response):
+        self._logger.debug('Incomming Response %s', response)
+        if response.status >= 400:
+            # Read it now, it's still available on the exception
+            # once the connection has gone back to the pool
+            await response.read()
+            exc = http_exceptions.get_exception(response.status)(
+                'Error see in `error.error_response`', response
+            )
+            self._logger.exception('HTTP exception', exc_info=exc)
+            raise exc
+
+    async def request_quotes(
+        self, rfqs: Sequence[RequestForQuote], concurrency: int = 8
+    ) -> BulkQuotes:
+        """
+        Requests quotes for many RFQs at once, no more than
+        `concurrency` at a time. See
+        `BaseB2C2APIClient.request_quotes`.
+        """
+        bulk = await request_quotes_async(
+            self.post_request_for_quote, rfqs, concurrency
+        )
+        for quote in bulk.quotes:
+            self._record_quote(quote)
+
+        return bulk
+
+    async def execute_at_quote(
+        self, rfq: RequestForQuote, acceptance_predicate: Predicate,
+        executing_unit: Optional[str] = None
+    ) -> Execution:
+        """
+        See `BaseB2C2APIClient.execute_at_quote`
+        """
+        template = TradeTemplate(
+            rfq, executing_unit, validate=self.strict_validation
+        )
+        execution = await execute_at_quote_async(
+            self.post_request_for_quote, self.post_trade,
+            rfq, acceptance_predicate, template, self._record_quote,
+        )
+        if execution.trade is not None:
+            self._record_trade(execution.trade)
+
+        return execution
+
+    class Meta(BaseB2C2APIClient.Meta):
+        # Same endpoints
+        pass
+
+
 class B2C2APIClient(BaseB2C2APIClient):
     """
     Rich GUI API client. Useful for exploring
@@ -230,10 +436,16 @@ class B2C2APIClient(BaseB2C2APIClient):
 
     def post_trade(self, body: Trade) -> TradeResponse:
         resp = super().post_trade(body)
-        self.history.add_trade(resp)
+        self._record_trade(resp)
         return resp
 
     def post_request_for_quote(self, body: RequestForQuote) -> Quote:
         resp = super().post_request_for_quote(body)
-        self.history.add_quote(resp)
+        self._record_quote(resp)
         return resp
+
+    def _record_quote(self, quote: Quote) -> None:
+        self.history.add_quote(quote)
+
+    def _record_trade(self, trade: TradeResponse) -> None:
+        self.history.add_trade(trade)
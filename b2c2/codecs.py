@@ -0,0 +1,212 @@
+"""
+Fast (de)serialization of the models on the trading path.
+
+Validating a response with `parse_obj` checks and converts every
+field, and `json()` goes through `dict()` and pydantic's encoder.
+For the models registered here the API clients use functions
+compiled from the model's fields instead:
+
+- an encoder that builds the JSON body straight from the model's
+  attributes. It sends the same body as `model.json()`.
+- a decoder that trusts the response: it converts the fields that
+  need it (Decimals, datetimes, enums) and builds the model
+  without validating it (see `construct`). If anything's missing or can't be
+  converted, the response is validated as usual, so errors are
+  still raised as a `pydantic.ValidationError`.
+
+Clients created with ``strict_validation=True`` skip all of this
+and go through pydantic, e.g. when debugging the API.
+"""
+import json
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
+
+from pydantic import BaseModel
+from pydantic.datetime_parse import parse_datetime
+from pydantic.fields import SHAPE_SINGLETON
+
+
+Encoder = Callable[[BaseModel], str]
+Decoder = Callable[[Any], BaseModel]
+
+_encoders: Dict[Type[BaseModel], Encoder] = {}
+_decoders: Dict[Type[BaseModel], Decoder] = {}
+
+
+def _unchanged(value):
+    return value
+
+
+def _decimal(value) -> Decimal:
+    # As pydantic does, so floats keep their shortest repr
+    # (e.g. 0.1 isn't 0.1000000000000000055511151231257827)
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _datetime(value) -> datetime:
+    if isinstance(value, str):
+        # The API's timestamps are ISO 8601, which the standard
+        # library parses much faster than pydantic's regex
+        if value.endswith('Z'):
+            return datetime.fromisoformat(value[:-1]).replace(
+                tzinfo=timezone.utc
+            )
+        return datetime.fromisoformat(value)
+
+    return parse_datetime(value)
+
+
+def construct(
+    model: Type[BaseModel], values: Dict[str, Any],
+    fields_set: Optional[Set[str]] = None
+) -> BaseModel:
+    """
+    Like `model.construct`, without validation, for values of every
+    field in the order of the model's fields. `model.construct`
+    puts the fields with defaults first, which changes the order
+    of `dict()` and `json()`.
+
+    :param fields_set: the fields that were set, rather than left
+        to their defaults, all of them by default
+    """
+    instance = model.__new__(model)
+    object.__setattr__(instance, '__dict__', values)
+    object.__setattr__(
+        instance, '__fields_set__',
+        set(values) if fields_set is None else fields_set
+    )
+    instance._init_private_attributes()
+    return instance
+
+
+def _field_decoders(
+    model: Type[BaseModel]
+) -> List[Tuple[str, Callable, bool, Callable[[], Any]]]:
+    decoders = []
+    for name, field in model.__fields__.items():
+        if field.alias != name or field.shape != SHAPE_SINGLETON:
+            raise TypeError(
+                f'Cannot compile a decoder for {model.__name__}.{name}'
+            )
+
+        field_type = field.type_
+        if field_type is Any or field_type is str:
+            convert = _unchanged
+        elif field_type is Decimal:
+            convert = _decimal
+        elif field_type is datetime:
+            convert = _datetime
+        elif isinstance(field_type, type) and issubclass(field_type, Enum):
+            convert = field_type
+        else:
+            raise TypeError(
+                f'Cannot compile a decoder for {model.__name__}.{name} '
+                f'({field_type!r})'
+            )
+
+        decoders.append(
+            (name, convert, bool(field.required), field.get_default)
+        )
+
+    return decoders
+
+
+def compile_decoder(model: Type[BaseModel]) -> Decoder:
+    """
+    :returns: a function that builds the model from a decoded
+        response, without validating it
+    """
+    fields = _field_decoders(model)
+    validate = model.parse_obj
+
+    def decode(obj):
+        try:
+            values = {}
+            fields_set = set()
+            for name, convert, required, get_default in fields:
+                value = obj.get(name)
+                if value is not None:
+                    values[name] = convert(value)
+                    fields_set.add(name)
+                elif required:
+                    raise KeyError(name)
+                elif name in obj:
+                    # Set, as far as `exclude_unset` is concerned
+                    values[name] = None
+                    fields_set.add(name)
+                else:
+                    values[name] = get_default()
+        except (AttributeError, KeyError, TypeError, ValueError,
+                ArithmeticError):
+            # Not what we expected, let pydantic explain why
+            return validate(obj)
+
+        return construct(model, values, fields_set)
+
+    return decode
+
+
+def _encode_value(value):
+    # What `pydantic.json.pydantic_encoder` does for these
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def compile_encoder(
+    model: Type[BaseModel], **formats: Callable[[Any], Any]
+) -> Encoder:
+    """
+    :param formats: how a field is sent, by field name, for the
+        fields whose `dict()` is overridden. Nones are left out,
+        as the models do with ``exclude_none``.
+    :returns: a function that serializes an instance of the model
+    """
+    fields = [
+        (name, formats.get(name, _encode_value))
+        for name in model.__fields__
+    ]
+    dumps = json.dumps
+
+    def encode(instance) -> str:
+        values = instance.__dict__
+        body = {}
+        for name, convert in fields:
+            value = values[name]
+            if value is not None:
+                body[name] = convert(value)
+
+        return dumps(body)
+
+    return encode
+
+
+def register_decoder(model: Type[BaseModel]) -> None:
+    _decoders[model] = compile_decoder(model)
+
+
+def register_encoder(
+    model: Type[BaseModel], **formats: Callable[[Any], Any]
+) -> None:
+    _encoders[model] = compile_encoder(model, **formats)
+
+
+def get_decoder(model: Type[BaseModel]) -> Decoder:
+    """
+    :returns: the model's trusted decoder, or `model.parse_obj`
+    """
+    return _decoders.get(model, model.parse_obj)
+
+
+def get_encoder(model: Type[BaseModel]) -> Encoder:
+    """
+    :returns: the model's encoder, or `model.json`
+    """
+    return _encoders.get(model, model.json)
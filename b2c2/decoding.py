@@ -0,0 +1,67 @@
+"""
+JSON decoders for the websocket receive path.
+
+orjson is used when it is installed (``pip install b2c2_client[speedups]``)
+and the standard library is used otherwise. Both accept ``str`` and
+``bytes`` messages, so binary frames never need to be decoded into a
+string first.
+"""
+import json
+
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+Message = Union[str, bytes]
+
+
+class FrameDecoder:
+    """
+    Turns a raw websocket message into the dictionary the
+    router dispatches on.
+
+    Decoding errors must be raised as a `ValueError` (both
+    `json.JSONDecodeError` and `orjson.JSONDecodeError` are).
+    """
+    name = 'abstract'
+
+    def decode(self, message: Message) -> Any:
+        raise NotImplementedError
+
+    def __repr__(self):
+        return '<{} {}>'.format(self.__class__.__name__, self.name)
+
+
+class StdlibFrameDecoder(FrameDecoder):
+    name = 'json'
+
+    def decode(self, message: Message) -> Any:
+        return json.loads(message)
+
+
+class OrjsonFrameDecoder(FrameDecoder):
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError(
+                'orjson is not installed. Install it with '
+                '`pip install b2c2_client[speedups]`'
+            )
+
+        # Skip the attribute lookup on every frame
+        self.decode = orjson.loads  # type: ignore
+
+
+def get_default_decoder() -> FrameDecoder:
+    """
+    :returns: the fastest decoder available
+    """
+    if orjson is not None:
+        return OrjsonFrameDecoder()
+
+    return StdlibFrameDecoder()
@@ -1,10 +1,13 @@
 from functools import lru_cache
 from b2c2.frames import ErrorResponseFrame
 from http import HTTPStatus
+from typing import Optional
 
 
 class B2C2ClientException(Exception):
-    def __init__(self, message, error_response: ErrorResponseFrame):
+    def __init__(
+        self, message, error_response: Optional[ErrorResponseFrame]
+    ):
         self.error_response = error_response
         super().__init__(message)
 
@@ -21,6 +24,29 @@ class QuoteException(WebsocketException):
     pass
 
 
+class WebsocketDisconnectedException(WebsocketException):
+    """
+    The connection dropped before a request was answered
+    """
+
+
+class SlowConsumerException(B2C2ClientException):
+    """
+    A fanout subscriber was disconnected for falling behind
+    """
+
+
+class FanoutOverrunException(SlowConsumerException):
+    """
+    A ring buffer fanout lapped a subscriber. The subscriber
+    is still connected and continues from the oldest frame
+    still buffered.
+    """
+    def __init__(self, message, missed: int):
+        self.missed = missed
+        super().__init__(message, None)
+
+
 class QuoteExceptions:
     @lru_cache(maxsize=None)
     def __getattr__(self, name):
@@ -0,0 +1,140 @@
+"""
+Requests a quote and trades it straight away if it's acceptable,
+see `BaseB2C2APIClient.execute_at_quote` and
+`AsyncBaseB2C2APIClient.execute_at_quote`.
+"""
+import time
+
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from b2c2 import codecs
+from b2c2.models import Quote, RequestForQuote, Trade, TradeResponse
+
+
+Predicate = Callable[[Quote], bool]
+
+
+class Execution(NamedTuple):
+    quote: Quote
+    # None if the quote wasn't accepted
+    trade: Optional[TradeResponse]
+    # Seconds from sending the RFQ to having the quote
+    rfq_latency: float
+    # Seconds the predicate took to accept (or reject) the quote
+    decision_time: float
+    # Seconds from the decision to having the trade, 0 if there
+    # wasn't one
+    trade_latency: float
+
+    @property
+    def accepted(self) -> bool:
+        return self.trade is not None
+
+    @property
+    def elapsed(self) -> float:
+        return self.rfq_latency + self.decision_time + self.trade_latency
+
+
+class TradeTemplate:
+    """
+    Everything about the trade that's known from the RFQ, so only
+    the quote's id and price are left once it's accepted.
+    """
+    __slots__ = ('_fields', '_validate')
+
+    def __init__(
+        self, rfq: RequestForQuote, executing_unit: Optional[str] = None,
+        validate: bool = False
+    ):
+        """
+        :param validate: build the trade with validation, rather
+            than trusting the quote (see `b2c2.codecs`)
+        """
+        # In the order of the model's fields, which is the order
+        # they're sent in
+        self._fields: Dict[str, Any] = {
+            'rfq_id': None,
+            'quantity': rfq.quantity,
+            'side': rfq.side,
+            'instrument': rfq.instrument,
+            'price': None,
+            'executing_unit': executing_unit,
+        }
+        self._validate = validate
+
+    def trade(self, quote: Quote) -> Trade:
+        fields = self._fields.copy()
+        fields['rfq_id'] = quote.rfq_id
+        fields['price'] = quote.price
+
+        if self._validate:
+            return Trade(**fields)
+
+        return codecs.construct(Trade, fields)  # type: ignore
+
+
+def execute_at_quote(
+    request_quote: Callable[[RequestForQuote], Quote],
+    trade: Callable[[Trade], TradeResponse],
+    rfq: RequestForQuote, accept: Predicate, template: TradeTemplate,
+    record_quote: Callable[[Quote], None]
+) -> Execution:
+    """
+    Requests the quote, and trades it if `accept` returns True.
+    The quote is passed to `record_quote` whether or not it was
+    traded, even if the trade failed.
+    """
+    started = time.perf_counter()
+    quote = request_quote(rfq)
+    quoted = time.perf_counter()
+    accepted = accept(quote)
+    decided = time.perf_counter()
+
+    trade_response = None
+    try:
+        if accepted:
+            trade_response = trade(template.trade(quote))
+    finally:
+        traded = time.perf_counter()
+        # Afterwards, so it doesn't hold up the trade
+        record_quote(quote)
+
+    return Execution(
+        quote=quote,
+        trade=trade_response,
+        rfq_latency=quoted - started,
+        decision_time=decided - quoted,
+        trade_latency=traded - decided if accepted else 0.0,
+    )
+
+
+async def execute_at_quote_async(
+    request_quote: Callable[[RequestForQuote], Awaitable[Quote]],
+    trade: Callable[[Trade], Awaitable[TradeResponse]],
+    rfq: RequestForQuote, accept: Predicate, template: TradeTemplate,
+    record_quote: Callable[[Quote], None]
+) -> Execution:
+    """
+    See `execute_at_quote`
+    """
+    started = time.perf_counter()
+    quote = await request_quote(rfq)
+    quoted = time.perf_counter()
+    accepted = accept(quote)
+    decided = time.perf_counter()
+
+    trade_response = None
+    try:
+        if accepted:
+            trade_response = await trade(template.trade(quote))
+    finally:
+        traded = time.perf_counter()
+        record_quote(quote)
+
+    return Execution(
+        quote=quote,
+        trade=trade_response,
+        rfq_latency=quoted - started,
+        decision_time=decided - quoted,
+        trade_latency=traded - decided if accepted else 0.0,
+    )
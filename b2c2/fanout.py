@@ -0,0 +1,474 @@
+import abc
+import asyncio
+import itertools
+import collections
+
+from enum import Enum
+from weakref import WeakSet
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, Callable, Dict, List, Optional
+
+from b2c2.exceptions import SlowConsumerException, FanoutOverrunException
+
+
+class BackpressurePolicy(str, Enum):
+    """
+    What a fanout does with a frame when a subscriber's
+    queue is full.
+    """
+    # Wait for the subscriber to take the frame or leave (holds up
+    # every other subscriber)
+    block = 'block'
+    # Make room by dropping the subscriber's oldest frame
+    drop_oldest = 'drop_oldest'
+    # Drop the new frame for this subscriber
+    drop_newest = 'drop_newest'
+    # Stop sending to the subscriber, its next `get()` raises
+    # a `SlowConsumerException`
+    disconnect = 'disconnect'
+
+
+class SubscriberQueue(asyncio.Queue):
+    """
+    A fanout subscriber's queue. Keeps count of the frames that
+    were dropped because the subscriber fell behind.
+    """
+
+    def __init__(
+        self, maxsize: int = 0,
+        policy: BackpressurePolicy = BackpressurePolicy.block,
+        name: Optional[str] = None
+    ):
+        super().__init__(maxsize)
+        self.policy = BackpressurePolicy(policy)
+        self.name = name
+        self.dropped = 0
+        self.disconnected = False
+        # Set when the subscriber leaves, wakes a fanout blocked on
+        # putting a frame in its queue
+        self.closed = asyncio.Event()
+        # Called with each frame the subscriber takes
+        self.on_deliver: Optional[Callable] = None
+
+    def get_nowait(self):
+        # `get()` ends up here too
+        frame = super().get_nowait()
+        if self.on_deliver is not None:
+            self.on_deliver(frame)
+
+        return frame
+
+    async def get(self):
+        if self.disconnected:
+            raise SlowConsumerException(
+                'Subscriber {!r} was disconnected after falling '
+                'behind ({} frames dropped)'.format(self.name, self.dropped),
+                None
+            )
+
+        return await super().get()
+
+
+class ConflatingQueue(SubscriberQueue):
+    """
+    A subscriber queue with a single slot that each new frame
+    overwrites, so `get()` always returns the latest frame.
+
+    Memory per subscriber is constant and a slow iteration never
+    leaves a backlog to drain. Overwritten frames are counted in
+    `conflated` (they are expected, so they are not `dropped`).
+    """
+
+    def __init__(self, name: Optional[str] = None):
+        super().__init__(0, BackpressurePolicy.block, name)
+        self.conflated = 0
+
+    def _init(self, maxsize):
+        self._queue = collections.deque(maxlen=1)
+
+    def _put(self, item):
+        if self._queue:
+            self.conflated += 1
+
+        self._queue.append(item)
+
+
+class BaseFanout(abc.ABC):
+    """
+    What every fanout engine provides on top of `queue()`
+    """
+    _fanout_queues: WeakSet
+    # Called with each frame a subscriber takes, for measuring
+    # delivery lag (see `b2c2.instrumentation`)
+    on_deliver: Optional[Callable] = None
+
+    @property
+    def dropped(self) -> Dict[str, int]:
+        """
+        Frames dropped per live subscriber
+        """
+        return {
+            queue.name: queue.dropped for queue in self._fanout_queues
+        }
+
+    @abc.abstractmethod
+    def queue(self, *, name: Optional[str] = None) -> AsyncContextManager:
+        """
+        Subscribes, as an async context manager that gives a
+        queue-like object (`get` and `get_nowait`)
+
+        :param name: identifies the subscriber in `dropped`
+        """
+
+    @asynccontextmanager
+    async def stream(self, **kwargs):
+        """
+        Takes the same arguments as `queue()`.
+
+        Frames missed by a subscriber that fell too far behind (see
+        `RingFanout`) are counted in its `dropped` and `overruns`,
+        the stream carries on from the oldest frame still buffered.
+        """
+        async with self.queue(**kwargs) as queue:
+            # tranforms a queue into an async generator
+            async def _async_gen():
+                while True:
+                    yield await _get(queue)  # noqa
+
+            yield _async_gen()
+            del _async_gen
+
+    @asynccontextmanager
+    async def stream_batches(
+        self, max_items: int = 100, max_wait: float = 0, **kwargs
+    ):
+        """
+        Like `stream()`, but yields lists of frames so consumers
+        pay for one scheduler round-trip per burst rather than per
+        frame.
+
+        Each batch waits for one frame, then takes everything
+        already buffered up to `max_items`. Overruns are handled as
+        in `stream()`.
+
+        :param max_items: the most frames in a batch
+        :param max_wait: seconds to wait for a batch to fill after
+            its first frame. 0 yields whatever is buffered.
+
+        Other arguments are passed to `queue()`.
+        """
+        async with self.queue(**kwargs) as queue:
+            async def _async_gen():
+                loop = asyncio.get_event_loop()
+                while True:
+                    batch = [await _get(queue)]
+                    _drain(queue, batch, max_items)
+
+                    if max_wait:
+                        deadline = loop.time() + max_wait
+                        while len(batch) < max_items:
+                            timeout = deadline - loop.time()
+                            if timeout <= 0:
+                                break
+
+                            try:
+                                batch.append(
+                                    await asyncio.wait_for(
+                                        _get(queue), timeout
+                                    )
+                                )
+                            except asyncio.TimeoutError:
+                                break
+
+                            _drain(queue, batch, max_items)
+
+                    yield batch
+
+            yield _async_gen()
+            del _async_gen
+
+
+async def _get(queue):
+    """
+    `queue.get()`, carrying on after an overrun. The reader has
+    counted the frames it missed.
+    """
+    while True:
+        try:
+            return await queue.get()
+        except FanoutOverrunException:
+            pass
+
+
+def _drain(queue, batch: list, max_items: int) -> None:
+    """
+    Moves buffered frames into the batch without waiting,
+    carrying on after an overrun (see `_get`).
+    """
+    get_nowait = queue.get_nowait
+    while len(batch) < max_items:
+        try:
+            batch.append(get_nowait())
+        except asyncio.QueueEmpty:
+            return
+        except FanoutOverrunException:
+            pass
+
+
+class Fanout(BaseFanout):
+    """
+    This provides fan out functionality so that
+    multiple objects can listen to an async websocket
+    stream
+
+    I don't really know the AsyncIO ecosystem that well
+    and every time I take a look at it I get the sense
+    it's still a bit immature. Something like this, while
+    not in the standard library should have a well known
+    library that does it. But I couldn't work out what to use.
+
+    Subscriber queues are unbounded unless a `maxsize` is
+    given, in which case `policy` decides what happens when
+    a subscriber falls behind (see `BackpressurePolicy`). Both
+    can be overridden per subscriber.
+    """
+
+    def __init__(
+        self, queue, maxsize: int = 0,
+        policy: BackpressurePolicy = BackpressurePolicy.block
+    ):
+        self._queue = queue
+        self._maxsize = maxsize
+        self._policy = BackpressurePolicy(policy)
+        # Only the subscribing objects should
+        # have a ref to the queue
+        self._fanout_queues = WeakSet()  # type: ignore
+        self._fanout_task: Optional[asyncio.Task] = None
+        self._subscriber_ids = itertools.count()
+        # Includes subscribers that have gone away
+        self.dropped_total = 0
+
+    @asynccontextmanager
+    async def queue(
+        self, maxsize: Optional[int] = None,
+        policy: Optional[BackpressurePolicy] = None,
+        name: Optional[str] = None, conflate: bool = False
+    ):
+        """
+        :param maxsize: overrides the fanout's maxsize
+        :param policy: overrides the fanout's backpressure policy
+        :param name: identifies the subscriber in `dropped`
+        :param conflate: only keep the latest frame (see
+            `ConflatingQueue`), ignores maxsize and policy
+        """
+        if not self._fanout_task:
+            self._fanout_task = (
+                asyncio.create_task(self._fanout_job())
+            )
+
+        name = name or 'subscriber-{}'.format(next(self._subscriber_ids))
+        queue: SubscriberQueue
+        if conflate:
+            queue = ConflatingQueue(name)
+        else:
+            queue = SubscriberQueue(
+                self._maxsize if maxsize is None else maxsize,
+                policy or self._policy,
+                name
+            )
+        queue.on_deliver = self.on_deliver
+        self._fanout_queues.add(queue)
+        try:
+            yield queue
+        finally:
+            queue.closed.set()
+            self._fanout_queues.discard(queue)
+            del queue
+
+    async def _fanout_job(self):
+        while True:
+            frame = await self._queue.get()
+
+            queue = None
+
+            # Copy, blocking subscribers let others (un)subscribe
+            # while we wait.
+            queues = list(self._fanout_queues)
+            for queue in queues:
+                if queue.closed.is_set():
+                    # Left while we were blocked on another
+                    continue
+                if not queue.full():
+                    queue.put_nowait(frame)
+                else:
+                    await self._apply_backpressure(queue, frame)
+
+            # Because python is block scoped this
+            # task will keep a reference to the single
+            # queue that existed in the last fanout job
+            # Unless we delete it
+            del queue, queues  # noqa
+
+    async def _apply_backpressure(self, queue: SubscriberQueue, frame):
+        policy = queue.policy
+
+        if policy is BackpressurePolicy.block:
+            await self._put_unless_closed(queue, frame)
+            return
+
+        queue.dropped += 1
+        self.dropped_total += 1
+
+        if policy is BackpressurePolicy.drop_oldest:
+            # Not a delivery, so skip the subscriber's hook
+            asyncio.Queue.get_nowait(queue)
+            queue.put_nowait(frame)
+        elif policy is BackpressurePolicy.disconnect:
+            queue.disconnected = True
+            self._fanout_queues.discard(queue)
+        # BackpressurePolicy.drop_newest: nothing to do
+
+    @staticmethod
+    async def _put_unless_closed(queue: SubscriberQueue, frame):
+        """
+        Waits for room in the queue, or for the subscriber to
+        leave, in which case the frame is dropped
+        """
+        put = asyncio.ensure_future(queue.put(frame))
+        closed = asyncio.ensure_future(queue.closed.wait())
+        try:
+            await asyncio.wait(
+                (put, closed), return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            put.cancel()
+            closed.cancel()
+
+
+class RingReader:
+    """
+    A subscriber's cursor into a `RingFanout`. Has the same
+    `get`/`get_nowait` interface as a queue.
+    """
+
+    def __init__(self, fanout: 'RingFanout', name: str):
+        self._fanout = fanout
+        # New readers only see new frames
+        self._cursor = fanout._head
+        self.name = name
+        self.dropped = 0
+        self.overruns = 0
+
+    def qsize(self) -> int:
+        return min(
+            self._fanout._head - self._cursor, self._fanout._capacity
+        )
+
+    def empty(self) -> bool:
+        return self._cursor == self._fanout._head
+
+    def get_nowait(self):
+        fanout = self._fanout
+
+        if self._cursor == fanout._head:
+            raise asyncio.QueueEmpty
+
+        oldest = fanout._head - fanout._capacity
+        if self._cursor < oldest:
+            # The writer lapped us, skip to the oldest frame
+            # still in the buffer and tell the consumer.
+            missed = oldest - self._cursor
+            self._cursor = oldest
+            self.dropped += missed
+            self.overruns += 1
+            fanout.dropped_total += missed
+            raise FanoutOverrunException(
+                'Subscriber {!r} fell {} frames behind'.format(
+                    self.name, missed
+                ),
+                missed
+            )
+
+        frame = fanout._buffer[self._cursor % fanout._capacity]
+        self._cursor += 1
+        if fanout.on_deliver is not None:
+            fanout.on_deliver(frame)
+
+        return frame
+
+    async def get(self):
+        fanout = self._fanout
+        while self._cursor == fanout._head:
+            # Shielded because the future is shared: cancelling
+            # this reader must not cancel the others.
+            await asyncio.shield(fanout._wakeup)
+
+        return self.get_nowait()
+
+
+class RingFanout(BaseFanout):
+    """
+    A fanout engine where every subscriber reads from one shared,
+    fixed capacity ring buffer with its own cursor.
+
+    `Fanout` copies each frame into every subscriber's queue and
+    wakes each of them, so publishing is O(subscribers). Here
+    publishing is a single write plus resolving one future that
+    all idle readers wait on, whatever the subscriber count.
+
+    The trade-off is that the buffer can't grow or block: a
+    reader that falls more than `capacity` frames behind gets a
+    `FanoutOverrunException` (with the number of frames it
+    missed) and continues from the oldest frame still buffered.
+    `stream()` and `stream_batches()` count the missed frames and
+    carry on without raising.
+    """
+
+    def __init__(self, queue, capacity: int = 1024):
+        self._queue = queue
+        self._capacity = capacity
+        self._buffer: List = [None] * capacity
+        # Sequence number of the next frame to be written
+        self._head = 0
+        self._fanout_queues = WeakSet()  # type: ignore
+        self._fanout_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Future] = None
+        self._subscriber_ids = itertools.count()
+        self.dropped_total = 0
+
+    @asynccontextmanager
+    async def queue(self, name: Optional[str] = None):
+        """
+        :param name: identifies the subscriber in `dropped`
+        """
+        if not self._fanout_task:
+            self._wakeup = asyncio.get_event_loop().create_future()
+            self._fanout_task = (
+                asyncio.create_task(self._fanout_job())
+            )
+
+        reader = RingReader(
+            self,
+            name or 'subscriber-{}'.format(next(self._subscriber_ids))
+        )
+        self._fanout_queues.add(reader)
+        yield reader
+        del reader
+
+    def _write(self, frame):
+        self._buffer[self._head % self._capacity] = frame
+        self._head += 1
+
+    async def _fanout_job(self):
+        queue = self._queue
+        loop = asyncio.get_event_loop()
+
+        while True:
+            self._write(await queue.get())
+            # Publish everything that is already waiting before
+            # waking anybody up
+            while not queue.empty():
+                self._write(queue.get_nowait())
+
+            wakeup, self._wakeup = self._wakeup, loop.create_future()
+            wakeup.set_result(None)
@@ -1,11 +1,13 @@
 import uuid
 import string
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from decimal import Decimal
-from typing import List, Any, Optional, Dict
+from typing import List, Any, Optional, Dict, Set
 from devtools import pformat
 
+from b2c2.ladder import Ladder
+
 
 class BaseFrame(BaseModel):
 
@@ -87,12 +89,234 @@ class QuoteStreamFrame(BaseRepsonseFrame):
     levels: LevelResponse
     timestamp: int
 
+    _ladder: Optional[Ladder] = PrivateAttr(None)
+    # `time.perf_counter()` when the frame came off the socket, set
+    # by the client when it is collecting metrics
+    _received_at: Optional[float] = PrivateAttr(None)
+    # The levels as the server sent them, see `_level_quantities`
+    _raw_levels: Optional[dict] = PrivateAttr(None)
+
+    @classmethod
+    def parse_obj(cls, obj: Any) -> 'QuoteStreamFrame':
+        frame = super().parse_obj(obj)
+        frame._raw_levels = obj['levels']
+        return frame
+
+    @property
+    def ladder(self) -> Ladder:
+        """
+        The levels as numeric arrays (see `b2c2.ladder.Ladder`)
+        """
+        if self._ladder is None:
+            self._ladder = Ladder.from_levels(self.levels)
+
+        return self._ladder
+
+    def _level_quantities(self) -> tuple:
+        # The server's strings when we have them, hashing them is
+        # cheaper than hashing Decimals
+        levels = self._raw_levels
+        if levels is not None:
+            return (
+                tuple(item['quantity'] for item in levels['buy']),
+                tuple(item['quantity'] for item in levels['sell']),
+            )
+
+        return (
+            tuple(item.quantity for item in self.levels.buy),
+            tuple(item.quantity for item in self.levels.sell),
+        )
+
+    def _select_levels(
+        self, buy: List[int], sell: List[int]
+    ) -> 'QuoteStreamFrame':
+        """
+        :returns: a copy with only the levels at these positions
+        """
+        levels = self.levels
+        return self._with_levels(
+            [levels.buy[i] for i in buy], [levels.sell[i] for i in sell]
+        )
+
+    def filter_levels(self, quantities: Set[Decimal]) -> 'QuoteStreamFrame':
+        """
+        :returns: a copy with only the levels for these quantities
+        """
+        return self._with_levels(
+            [i for i in self.levels.buy if i.quantity in quantities],
+            [i for i in self.levels.sell if i.quantity in quantities],
+        )
+
+    def _with_levels(
+        self, buy: List[LevelItem], sell: List[LevelItem]
+    ) -> 'QuoteStreamFrame':
+        copied = self.copy(update={
+            'levels': LevelResponse.construct(buy=buy, sell=sell)
+        })
+        # Private attributes are copied too, but the ladder was
+        # built from the old levels
+        copied._ladder = None
+        copied._raw_levels = None
+        return copied
+
     @property
     def _key(self):
         levels = tuple(sorted(item.quantity for item in self.levels.buy))
         return (levels, self.instrument)
 
 
+class ConnectionLostFrame(BaseFrame):
+    """
+    Published on `B2C2WebsocketClient.connection_events`
+    when a supervised connection drops.
+    """
+    event = 'connection_lost'
+    disconnected_at: float
+    reason: str
+
+
+class ConnectionGapFrame(BaseFrame):
+    """
+    Published on `B2C2WebsocketClient.connection_events` once a
+    supervised connection is back and subscriptions have been
+    replayed. No frames were received between `disconnected_at`
+    and `reconnected_at` (unix timestamps).
+    """
+    event = 'reconnected'
+    disconnected_at: float
+    reconnected_at: float
+    # Seconds
+    downtime: float
+    attempts: int
+    resubscribed: List[str]
+
+
+class TrustedQuoteStreamFrame:
+    """
+    A price frame built without validation.
+
+    Validating a `QuoteStreamFrame` means building a
+    `LevelItem` model and two Decimals for every level on every
+    tick. When the stream is trusted, this wraps the decoded
+    frame instead and only builds the fields that are accessed.
+
+    It has the same attributes as `QuoteStreamFrame`; call
+    `validate()` to get the real thing.
+    """
+    __slots__ = ('_raw', '_levels', '_ladder', '_received_at')
+
+    def __init__(self, raw: dict):
+        self._raw = raw
+        self._levels: Optional[LevelResponse] = None
+        self._ladder: Optional[Ladder] = None
+        self._received_at: Optional[float] = None
+
+    @classmethod
+    def parse_obj(cls, obj: dict) -> 'TrustedQuoteStreamFrame':
+        return cls(obj)
+
+    @property
+    def event(self) -> str:
+        return self._raw['event']
+
+    @property
+    def success(self) -> bool:
+        return self._raw['success']
+
+    @property
+    def instrument(self) -> str:
+        return self._raw['instrument']
+
+    @property
+    def timestamp(self) -> int:
+        return self._raw['timestamp']
+
+    @property
+    def levels(self) -> LevelResponse:
+        if self._levels is None:
+            raw_levels = self._raw['levels']
+            self._levels = LevelResponse.construct(
+                buy=self._construct_items(raw_levels['buy']),
+                sell=self._construct_items(raw_levels['sell']),
+            )
+
+        return self._levels
+
+    @property
+    def ladder(self) -> Ladder:
+        # Straight from the decoded frame, without Decimals
+        if self._ladder is None:
+            self._ladder = Ladder.from_levels(self._raw['levels'])
+
+        return self._ladder
+
+    @staticmethod
+    def _construct_items(items: List[dict]) -> List[LevelItem]:
+        return [
+            LevelItem.construct(
+                quantity=Decimal(item['quantity']),
+                price=Decimal(item['price']),
+            ) for item in items
+        ]
+
+    @property
+    def _key(self):
+        # Only needs the quantities, so don't build the levels
+        levels = tuple(sorted(
+            Decimal(item['quantity'])
+            for item in self._raw['levels']['buy']
+        ))
+        return (levels, self.instrument)
+
+    def _level_quantities(self) -> tuple:
+        # The raw strings, hashing them is cheaper than Decimals
+        levels = self._raw['levels']
+        return (
+            tuple(item['quantity'] for item in levels['buy']),
+            tuple(item['quantity'] for item in levels['sell']),
+        )
+
+    def _select_levels(
+        self, buy: List[int], sell: List[int]
+    ) -> 'TrustedQuoteStreamFrame':
+        """
+        :returns: a copy with only the levels at these positions
+        """
+        levels = self._raw['levels']
+        return self._with_levels({
+            'buy': [levels['buy'][i] for i in buy],
+            'sell': [levels['sell'][i] for i in sell],
+        })
+
+    def filter_levels(
+        self, quantities: Set[Decimal]
+    ) -> 'TrustedQuoteStreamFrame':
+        """
+        :returns: a copy with only the levels for these quantities
+        """
+        levels = self._raw['levels']
+        return self._with_levels({
+            side: [
+                item for item in levels[side]
+                if Decimal(item['quantity']) in quantities
+            ] for side in ('buy', 'sell')
+        })
+
+    def _with_levels(self, levels: dict) -> 'TrustedQuoteStreamFrame':
+        copied = self.__class__({**self._raw, 'levels': levels})
+        copied._received_at = self._received_at
+        return copied
+
+    def validate(self) -> QuoteStreamFrame:
+        return QuoteStreamFrame.parse_obj(self._raw)
+
+    def dict(self) -> dict:
+        return self.validate().dict()
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self._raw)
+
+
 class ErrorResponseFrame(BaseRepsonseFrame):
     error_code: int
     error_message: str
@@ -0,0 +1,304 @@
+import math
+import time
+
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+
+class LatencyHistogram:
+    """
+    A histogram of latencies in the style of HdrHistogram.
+
+    Values are kept in microseconds. Values under 128us get a
+    bucket each, above that every power of two is split into 64
+    buckets, so any recorded value is accurate to within 1/64
+    (about 1.5%) however large it is. Recording is a couple of
+    integer operations and a list increment, which is cheap
+    enough to do for every frame.
+    """
+    # log2 of the number of buckets per power of two
+    _sub_bits = 6
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self._counts: List[int] = []
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        if value < (2 << cls._sub_bits):
+            return value
+
+        shift = value.bit_length() - cls._sub_bits - 1
+        return (shift << cls._sub_bits) + (value >> shift)
+
+    @classmethod
+    def _highest_equivalent(cls, index: int) -> int:
+        """
+        The largest value that lands in the bucket
+        """
+        if index < (2 << cls._sub_bits):
+            return index
+
+        shift = (index >> cls._sub_bits) - 1
+        sub = index - (shift << cls._sub_bits)
+        return ((sub + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        value = int(seconds * 1_000_000)
+        if value < 0:
+            value = 0
+
+        index = self._index(value)
+        counts = self._counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+
+        counts[index] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percentile: float) -> int:
+        """
+        :returns: the value (in microseconds) at this percentile
+        """
+        if not self.count:
+            return 0
+
+        target = max(math.ceil(percentile / 100 * self.count), 1)
+        highest = self.max or 0
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= target:
+                return min(self._highest_equivalent(index), highest)
+
+        return highest
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        counts = self._counts
+        if len(other._counts) > len(counts):
+            counts.extend([0] * (len(other._counts) - len(counts)))
+        for index, count in enumerate(other._counts):
+            counts[index] += count
+
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is None:
+                continue
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def snapshot(self) -> dict:
+        """
+        :returns: a summary in microseconds
+        """
+        return {
+            'count': self.count,
+            'min': self.min or 0,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p99.9': self.percentile(99.9),
+            'max': self.max or 0,
+        }
+
+    def __repr__(self):
+        return '{}(count={}, p50={}us, p99={}us)'.format(
+            self.__class__.__name__, self.count,
+            self.percentile(50), self.percentile(99)
+        )
+
+
+class ClockOffsetEstimator:
+    """
+    Estimates how far the server's clock is behind ours from the
+    `timestamp` of the frames it sends.
+
+    Each frame gives `received - timestamp`, which is the clock
+    offset plus however long the frame spent in flight. The
+    smallest of these is the best guess at the offset (the frame
+    that was delayed least). The minimum is taken over a sliding
+    window so the estimate follows clock drift.
+
+    This can't separate the offset from the quickest frame's
+    network latency, so latencies measured against it are
+    relative to the fastest frame seen.
+    """
+
+    def __init__(self, window: float = 60):
+        self.window = window
+        self._window_start: Optional[float] = None
+        self._current = math.inf
+        self._previous = math.inf
+
+    def update(self, received: float, timestamp: float) -> float:
+        """
+        :param received: `time.time()` when the frame arrived
+        :param timestamp: the server's timestamp in seconds
+        :returns: the raw offset of this frame
+        """
+        if self._window_start is None:
+            self._window_start = received
+        elif received - self._window_start >= self.window:
+            self._previous, self._current = self._current, math.inf
+            self._window_start = received
+
+        offset = received - timestamp
+        if offset < self._current:
+            self._current = offset
+
+        return offset
+
+    @property
+    def offset(self) -> Optional[float]:
+        """
+        Seconds the server's clock is behind ours, None until a
+        frame has been seen
+        """
+        offset = min(self._current, self._previous)
+        return None if offset == math.inf else offset
+
+
+class InstrumentMetrics:
+    """
+    The latency histograms of one instrument:
+
+        - wire: from the server's timestamp to receiving the frame,
+          corrected by the clock offset estimate
+        - decode: decoding the message
+        - dispatch: parsing the frame and routing it to fanouts
+        - delivery: from receiving the frame to a consumer taking
+          it from its queue, for each consumer fanout
+    """
+
+    def __init__(self):
+        self.wire = LatencyHistogram()
+        self.decode = LatencyHistogram()
+        self.dispatch = LatencyHistogram()
+        self.delivery: Dict[str, LatencyHistogram] = (
+            defaultdict(LatencyHistogram)
+        )
+
+    def reset(self) -> None:
+        for histogram in (self.wire, self.decode, self.dispatch):
+            histogram.reset()
+        for histogram in self.delivery.values():
+            histogram.reset()
+
+    def snapshot(self) -> dict:
+        return {
+            'wire': self.wire.snapshot(),
+            'decode': self.decode.snapshot(),
+            'dispatch': self.dispatch.snapshot(),
+            'delivery': {
+                name: histogram.snapshot()
+                for name, histogram in self.delivery.items()
+            },
+        }
+
+
+class ClientMetrics:
+    """
+    Tick to handler latency of a websocket client, see
+    `B2C2WebsocketClient(metrics=True)`.
+
+    .. code-block:: python
+
+        client = B2C2WebsocketClient(api_client, metrics=True)
+        ...
+        client.metrics.instrument('BTCUSD.SPOT').dispatch.percentile(99)
+
+        # Everything, as a JSON serialisable dict
+        client.metrics.snapshot()
+
+    A `wire` or `delivery` latency that keeps growing means the
+    listener or a consumer is falling behind.
+    """
+
+    def __init__(self, clock_window: float = 60):
+        self.instruments: Dict[str, InstrumentMetrics] = (
+            defaultdict(InstrumentMetrics)
+        )
+        self.clock = ClockOffsetEstimator(clock_window)
+        # Set by the client for the frame being handled
+        self.received_at = 0.0
+        self.received_wall = 0.0
+        self.decode_time = 0.0
+
+    def instrument(self, instrument: str) -> InstrumentMetrics:
+        return self.instruments[instrument]
+
+    def on_receive(self) -> float:
+        self.received_wall = time.time()
+        self.received_at = time.perf_counter()
+        return self.received_at
+
+    def on_dispatch(self, frame: dict, dispatch_time: float) -> None:
+        """
+        Records the frame that was just received, decoded and
+        dispatched. Only price frames (which have an instrument
+        and a server timestamp) are recorded.
+        """
+        timestamp = frame.get('timestamp')
+        instrument = frame.get('instrument')
+        if timestamp is None or instrument is None:
+            return
+
+        metrics = self.instruments[instrument]
+        metrics.decode.record(self.decode_time)
+        metrics.dispatch.record(dispatch_time)
+
+        # The server's timestamps are in milliseconds
+        raw = self.clock.update(self.received_wall, timestamp / 1000)
+        metrics.wire.record(raw - self.clock.offset)  # type: ignore
+
+    def delivery_observer(
+        self, instrument: str, name: str
+    ) -> Callable[[object], None]:
+        """
+        :returns: a fanout `on_deliver` hook recording the
+            delivery lag of frames stamped by the client
+        """
+        histogram = self.instruments[instrument].delivery[name]
+        perf_counter = time.perf_counter
+
+        def _on_deliver(frame):
+            received = getattr(frame, '_received_at', None)
+            if received is not None:
+                histogram.record(perf_counter() - received)
+
+        return _on_deliver
+
+    def snapshot(self) -> dict:
+        return {
+            'clock_offset': self.clock.offset,
+            'instruments': {
+                instrument: metrics.snapshot()
+                for instrument, metrics in self.instruments.items()
+            },
+        }
+
+    def reset(self) -> None:
+        """
+        Clears the histograms, the clock offset estimate is kept
+        """
+        for metrics in self.instruments.values():
+            metrics.reset()
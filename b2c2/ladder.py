@@ -0,0 +1,127 @@
+"""
+Array backed price ladders.
+
+A B2C2 price level is an all-in price for a quantity. The `buy`
+side of a quote holds the prices we can buy at (the asks) and the
+`sell` side the prices we can sell at (the bids).
+"""
+import numpy as np
+
+from typing import Iterable, Union
+
+
+Side = str
+Sizes = Union[float, Iterable[float]]
+
+
+def _side_array(items) -> np.ndarray:
+    """
+    Builds a (2, n) float array of quantities and prices,
+    sorted by quantity.
+    """
+    arr = np.array(
+        [(item['quantity'], item['price']) for item in items],
+        dtype=np.float64
+    ).reshape(-1, 2).T
+
+    if arr.shape[1] > 1 and np.any(arr[0, 1:] < arr[0, :-1]):
+        arr = arr[:, np.argsort(arr[0], kind='stable')]
+
+    return np.ascontiguousarray(arr)
+
+
+class Ladder:
+    """
+    Parallel quantity and price arrays for each side of a quote.
+
+    This is a lot lighter than lists of `LevelItem` models holding
+    Decimals, which matters when holding many snapshots. The
+    trade-off is that prices are floats: use the models when
+    exact decimal arithmetic is needed.
+    """
+    __slots__ = ('_bids', '_asks')
+
+    def __init__(self, bids: np.ndarray, asks: np.ndarray):
+        self._bids = bids
+        self._asks = asks
+
+    @classmethod
+    def from_levels(cls, levels) -> 'Ladder':
+        """
+        :param levels: the decoded `levels` of a price frame, or
+            a `LevelResponse`.
+        """
+        if not isinstance(levels, dict):
+            levels = levels.dict()
+
+        return cls(_side_array(levels['sell']), _side_array(levels['buy']))
+
+    @property
+    def bid_quantity(self) -> np.ndarray:
+        return self._bids[0]
+
+    @property
+    def bid_price(self) -> np.ndarray:
+        return self._bids[1]
+
+    @property
+    def ask_quantity(self) -> np.ndarray:
+        return self._asks[0]
+
+    @property
+    def ask_price(self) -> np.ndarray:
+        return self._asks[1]
+
+    @property
+    def best_bid(self) -> float:
+        """
+        The bid for the smallest quantity.
+        """
+        return self._bids[1, 0] if self._bids.shape[1] else np.nan
+
+    @property
+    def best_ask(self) -> float:
+        """
+        The ask for the smallest quantity.
+        """
+        return self._asks[1, 0] if self._asks.shape[1] else np.nan
+
+    @property
+    def mid(self) -> float:
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def spread(self) -> float:
+        return self.best_ask - self.best_bid
+
+    def vwap(self, side: Side, size: Sizes):
+        """
+        Average price for trading ``size`` on a side.
+
+        Level prices are already all-in prices for their
+        quantity, so this is the price of the smallest level that
+        covers the size. Sizes beyond the deepest level are NaN.
+
+        :param side: 'buy' (trade on the asks) or 'sell' (trade on
+            the bids)
+        :param size: a size or an array of sizes
+        """
+        if side == 'buy':
+            quantity, price = self._asks
+        elif side == 'sell':
+            quantity, price = self._bids
+        else:
+            raise ValueError('Side must be buy or sell, not {!r}'.format(side))
+
+        index = np.searchsorted(
+            quantity, np.asarray(size, dtype=np.float64), side='left'
+        )
+        # An index past the last level lands on the NaN
+        result = np.append(price, np.nan)[index]
+
+        return result if result.ndim else float(result)
+
+    def __repr__(self):
+        return '{}(bid={}, ask={})'.format(
+            self.__class__.__name__, self.best_bid, self.best_ask
+        )
@@ -0,0 +1,668 @@
+"""
+A local stand-in for the B2C2 REST and websocket APIs, for
+testing and benchmarking the clients without UAT.
+
+    $ python -m b2c2.mock_server --instruments 8 --tick-rate 50
+
+Or from asyncio code:
+
+.. code-block:: python
+
+    async with MockB2C2Server(tick_rate=100) as server:
+        api_client = B2C2APIClient(env=server.env)
+        ws_client = B2C2WebsocketClient(api_client)
+        ...
+
+Prices follow a random walk around a mid per instrument. Quotes
+and trades are checked and balances are kept like the real
+thing, but nothing else about it is realistic.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+import websockets
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set
+from enum import Enum
+from pydantic import ValidationError
+from pydantic.json import pydantic_encoder
+
+from b2c2.models import (
+    Balances, Instrument, Instruments, Quote, RequestForQuote, SideEnum,
+    Trade, TradeResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+
+BASES = ['BTC', 'ETH', 'LTC', 'XRP', 'BCH', 'EOS', 'XLM', 'ADA']
+QUOTES = ['USD', 'EUR', 'GBP']
+MIDS = {
+    'BTC': 9000.0, 'ETH': 200.0, 'LTC': 60.0, 'XRP': 0.25,
+    'BCH': 300.0, 'EOS': 3.0, 'XLM': 0.07, 'ADA': 0.05,
+}
+
+# Websocket error codes
+INVALID_MESSAGE = 3000
+INVALID_SUBSCRIPTION = 3004
+ALREADY_SUBSCRIBED = 3005
+NOT_SUBSCRIBED = 3006
+
+
+def _encode(obj):
+    # Like the real API: decimals are strings, not floats
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+
+    return pydantic_encoder(obj)
+
+
+def _to_json(model) -> str:
+    return model.json(encoder=_encode)
+
+
+class MockAPIError(Exception):
+    def __init__(self, status: int, message: str, code: int = 1000):
+        self.status = status
+        self.code = code
+        super().__init__(message)
+
+    def body(self) -> dict:
+        return {'errors': [{'code': self.code, 'message': str(self)}]}
+
+
+class MockExchange:
+    """
+    The state behind the mock APIs: instruments, prices, quotes
+    and balances. Shared between the REST server's threads and
+    the websocket server's loop, so it locks.
+    """
+
+    def __init__(
+        self, instruments: int = 4, spread_bps: float = 5,
+        volatility_bps: float = 2, quote_ttl: float = 10,
+        seed: Optional[int] = None
+    ):
+        """
+        :param instruments: how many instruments to list
+        :param spread_bps: half spread of the smallest level
+        :param volatility_bps: standard deviation of each tick
+        :param quote_ttl: seconds a quote can be traded
+        """
+        pairs = [base + quote for base in BASES for quote in QUOTES]
+        self.instruments = [
+            pair + '.SPOT' for pair in pairs[:instruments]
+        ]
+        self.spread = spread_bps / 10000
+        self.volatility = volatility_bps / 10000
+        self.quote_ttl = quote_ttl
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._mids = {
+            instrument: MIDS[instrument[:3]]
+            for instrument in self.instruments
+        }
+        self._quotes: Dict[str, Quote] = {}
+        self._traded: Set[str] = set()
+        self._balances = {
+            currency: Decimal(0) for currency in BASES + QUOTES
+        }
+        self._balances['USD'] = Decimal(1000000)
+
+    def list_instruments(self, instruments: List[str]) -> None:
+        """
+        Replaces the listed instruments. New ones start at the mid
+        of their base currency, which must be one of `BASES` (and
+        the quote currency one of `QUOTES`).
+        """
+        for instrument in instruments:
+            base, counter = instrument[:3], instrument[3:6]
+            if base not in BASES or counter not in QUOTES:
+                raise ValueError(
+                    'Cannot list {!r}, no balance for {} or {}'.format(
+                        instrument, base, counter
+                    )
+                )
+
+        with self._lock:
+            self.instruments = list(instruments)
+            for instrument in instruments:
+                self._mids.setdefault(instrument, MIDS[instrument[:3]])
+
+    def tick(self, instrument: str) -> None:
+        with self._lock:
+            self._mids[instrument] *= (
+                1 + self._random.gauss(0, self.volatility)
+            )
+
+    def price(self, instrument: str, side: SideEnum, quantity) -> Decimal:
+        """
+        The all-in price for a quantity, bigger quantities pay
+        a wider spread
+        """
+        mid = self._mids[instrument]
+        spread = self.spread * (1 + float(quantity) / 10)
+        if side == SideEnum.buy:
+            price = mid * (1 + spread)
+        else:
+            price = mid * (1 - spread)
+
+        return Decimal(price).quantize(
+            Decimal('0.01') if mid >= 1 else Decimal('0.00001')
+        )
+
+    def price_frame(self, instrument: str, levels: List[str]) -> dict:
+        with self._lock:
+            return {
+                'event': 'price',
+                'success': True,
+                'instrument': instrument,
+                'timestamp': int(time.time() * 1000),
+                'levels': {
+                    side.value: [
+                        {
+                            'quantity': quantity,
+                            'price': str(
+                                self.price(instrument, side, quantity)
+                            ),
+                        } for quantity in levels
+                    ] for side in SideEnum
+                },
+            }
+
+    def instrument_list(self) -> Instruments:
+        return Instruments(__root__=[
+            Instrument(name=name) for name in self.instruments
+        ])
+
+    def request_for_quote(self, rfq: RequestForQuote) -> Quote:
+        if rfq.instrument not in self._mids:
+            raise MockAPIError(400, 'Unknown instrument', 1003)
+        if rfq.quantity <= 0:
+            raise MockAPIError(400, 'Quantity must be positive', 1004)
+
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            quote = Quote(
+                valid_until=now + timedelta(seconds=self.quote_ttl),
+                rfq_id=str(uuid.uuid4()),
+                client_rfq_id=rfq.client_rfq_id or str(uuid.uuid4()),
+                quantity=rfq.quantity,
+                side=rfq.side,
+                instrument=rfq.instrument,
+                price=self.price(rfq.instrument, rfq.side, rfq.quantity),
+                created=now,
+            )
+            self._quotes[quote.rfq_id] = quote
+
+        return quote
+
+    def trade(self, trade: Trade) -> TradeResponse:
+        with self._lock:
+            quote = self._quotes.get(trade.rfq_id)
+            if quote is None:
+                raise MockAPIError(400, 'Unknown rfq_id', 1005)
+            if trade.rfq_id in self._traded:
+                raise MockAPIError(400, 'Quote already traded', 1006)
+            if quote.valid_until < datetime.now(timezone.utc):
+                raise MockAPIError(400, 'Quote expired', 1007)
+            if (
+                trade.price != quote.price or
+                trade.quantity != quote.quantity or
+                trade.side != quote.side or
+                trade.instrument != quote.instrument
+            ):
+                raise MockAPIError(400, 'Trade does not match quote', 1008)
+
+            self._traded.add(trade.rfq_id)
+            base, counter = trade.instrument[:3], trade.instrument[3:6]
+            notional = trade.quantity * trade.price
+            if trade.side == SideEnum.buy:
+                self._balances[base] += trade.quantity
+                self._balances[counter] -= notional
+            else:
+                self._balances[base] -= trade.quantity
+                self._balances[counter] += notional
+
+        return TradeResponse(
+            created=datetime.now(timezone.utc),
+            price=trade.price,
+            instrument=trade.instrument,
+            trade_id=str(uuid.uuid4()),
+            origin='rest',
+            rfq_id=trade.rfq_id,
+            side=trade.side,
+            quantity=trade.quantity,
+            user='mock',
+            order=str(uuid.uuid4()),
+            executing_unit=trade.executing_unit,
+        )
+
+    def balances(self) -> Balances:
+        with self._lock:
+            return Balances(__root__=dict(self._balances))
+
+
+class MockRESTServer:
+    """
+    The REST API, served from a thread by `http.server`.
+
+    .. code-block:: python
+
+        with MockRESTServer(MockExchange()) as server:
+            client = B2C2APIClient(env={'rest_api': server.url, ...})
+
+    :param latency: seconds added to every response
+    :param api_key: the token every request must have, any token
+        is accepted when None
+    """
+
+    def __init__(
+        self, exchange: MockExchange, host: str = '127.0.0.1',
+        port: int = 0, latency: float = 0,
+        api_key: Optional[str] = None
+    ):
+        self.exchange = exchange
+        self.latency = latency
+        self.api_key = api_key
+        self.requests = 0
+        # Requests are handled by a thread each
+        self._requests_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return 'http://{}:{}/'.format(host, port)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like the real API
+            protocol_version = 'HTTP/1.1'
+            # The headers and body are written separately, without
+            # this every response waits on a delayed ACK (~40ms)
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionResetError:
+                    # The client closed a kept-alive connection,
+                    # e.g. without reading an error response
+                    pass
+
+            def do_GET(self):
+                self._respond('GET')
+
+            def do_POST(self):
+                self._respond('POST')
+
+            def _respond(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                try:
+                    status, response = server._route(
+                        method, self.path, self.headers, body
+                    )
+                except MockAPIError as e:
+                    status, response = e.status, json.dumps(e.body())
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                data = response.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _route(self, method: str, path: str, headers, body: bytes):
+        with self._requests_lock:
+            self.requests += 1
+        token = headers.get('Authorization', '')
+        if not token.startswith('Token ') or (
+            self.api_key is not None and token != 'Token ' + self.api_key
+        ):
+            raise MockAPIError(401, 'Invalid token', 1001)
+
+        exchange = self.exchange
+        try:
+            if (method, path) == ('GET', '/instruments/'):
+                return 200, _to_json(exchange.instrument_list())
+            if (method, path) == ('GET', '/balance/'):
+                return 200, _to_json(exchange.balances())
+            if (method, path) == ('POST', '/request_for_quote/'):
+                rfq = RequestForQuote.parse_raw(body)
+                return 201, _to_json(exchange.request_for_quote(rfq))
+            if (method, path) == ('POST', '/trade/'):
+                trade = Trade.parse_raw(body)
+                return 201, _to_json(exchange.trade(trade))
+        except ValidationError as e:
+            raise MockAPIError(400, str(e), 1002)
+
+        raise MockAPIError(404, 'Not found', 1404)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class MockWebsocketServer:
+    """
+    The websocket API: answers subscribe and unsubscribe requests
+    (or sends error frames), streams prices of subscribed
+    instruments `tick_rate` times a second and sends the tradable
+    instruments on connection.
+
+    :param latency: seconds added before every response
+    """
+
+    def __init__(
+        self, exchange: MockExchange, host: str = '127.0.0.1',
+        port: int = 0, tick_rate: float = 10, latency: float = 0,
+        api_key: Optional[str] = None
+    ):
+        self.exchange = exchange
+        self.host = host
+        self.port = port
+        self.tick_rate = tick_rate
+        self.latency = latency
+        self.api_key = api_key
+        # websocket -> instrument -> levels
+        self.connections: Dict = {}
+        self.frames_sent = 0
+        self._server: Optional[websockets.WebSocketServer] = None
+        self._ticker: Optional[asyncio.Future] = None
+
+    @property
+    def url(self) -> str:
+        return 'ws://{}:{}/quotes'.format(self.host, self.port)
+
+    async def start(self) -> None:
+        server = self._server = await websockets.serve(
+            self._handler, self.host, self.port,
+            process_request=self._check_token,
+        )
+        self.port = server.sockets[0].getsockname()[1]  # type: ignore
+        if self.tick_rate:
+            self._ticker = asyncio.ensure_future(self._tick())
+
+    async def stop(self) -> None:
+        if self._ticker is not None:
+            self._ticker.cancel()
+        self._server.close()  # type: ignore
+        await self._server.wait_closed()  # type: ignore
+
+    async def _check_token(self, path, headers):
+        token = headers.get('Authorization', '')
+        if self.api_key is not None and token != 'Token ' + self.api_key:
+            return 401, [], b'Invalid token'
+
+        return None
+
+    async def _send(self, websocket, frame: dict) -> None:
+        await websocket.send(json.dumps(frame))
+        self.frames_sent += 1
+
+    async def _handler(self, websocket, path):
+        subscriptions: Dict[str, List[str]] = {}
+        self.connections[websocket] = subscriptions
+        try:
+            await self._send(websocket, {
+                'event': 'tradable_instruments',
+                'success': True,
+                'tradable_instruments': self._tradable_instruments(),
+            })
+            async for message in websocket:
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                await self._send(
+                    websocket, self._on_message(subscriptions, message)
+                )
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            del self.connections[websocket]
+
+    def _tradable_instruments(self) -> List[str]:
+        return [name.split('.')[0] for name in self.exchange.instruments]
+
+    def _on_message(self, subscriptions: dict, message) -> dict:
+        try:
+            request = json.loads(message)
+            event = request['event']
+        except (ValueError, KeyError, TypeError):
+            return _error_frame(
+                {'event': 'error'}, INVALID_MESSAGE, 'Invalid message.'
+            )
+
+        instrument = request.get('instrument')
+        if event == 'subscribe':
+            levels = request.get('levels')
+            if instrument not in self.exchange.instruments:
+                return _error_frame(
+                    request, INVALID_SUBSCRIPTION,
+                    'Invalid subscription request.',
+                    {'instrument': ['Unknown instrument.']}
+                )
+            if (
+                not isinstance(levels, list) or not levels or
+                not all(_positive(level) for level in levels)
+            ):
+                return _error_frame(
+                    request, INVALID_SUBSCRIPTION,
+                    'Invalid subscription request.',
+                    {'levels': ['Must be a list of positive numbers.']}
+                )
+            if instrument in subscriptions:
+                return _error_frame(
+                    request, ALREADY_SUBSCRIBED,
+                    'Already subscribed to this instrument.'
+                )
+
+            subscriptions[instrument] = [str(level) for level in levels]
+            return {**request, 'success': True}
+
+        if event == 'unsubscribe':
+            if subscriptions.pop(instrument, None) is None:
+                return _error_frame(
+                    request, NOT_SUBSCRIBED,
+                    'Not subscribed to this instrument.'
+                )
+            return {**request, 'success': True}
+
+        return _error_frame(request, INVALID_MESSAGE, 'Unknown event.')
+
+    async def _tick(self) -> None:
+        interval = 1 / self.tick_rate
+        loop = asyncio.get_event_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += interval
+            await asyncio.sleep(max(next_tick - loop.time(), 0))
+
+            subscribed = {
+                instrument
+                for subscriptions in self.connections.values()
+                for instrument in subscriptions
+            }
+            for instrument in subscribed:
+                self.exchange.tick(instrument)
+
+            for websocket, subscriptions in list(self.connections.items()):
+                for instrument, levels in list(subscriptions.items()):
+                    try:
+                        await self._send(
+                            websocket,
+                            self.exchange.price_frame(instrument, levels)
+                        )
+                    except websockets.ConnectionClosed:
+                        break
+
+    async def update_tradable_instruments(self, instruments: List[str]):
+        """
+        Changes the listed instruments and tells every connection
+        (see `MockExchange.list_instruments`)
+        """
+        self.exchange.list_instruments(instruments)
+        for websocket in list(self.connections):
+            await self._send(websocket, {
+                'event': 'tradable_instruments_update',
+                'success': True,
+                'tradable_instruments': self._tradable_instruments(),
+            })
+
+    async def drop_connections(self) -> None:
+        """
+        Closes every connection, for testing reconnects
+        """
+        await asyncio.gather(*(
+            websocket.close(1011, 'Dropped by the mock server')
+            for websocket in list(self.connections)
+        ))
+
+
+def _positive(level) -> bool:
+    try:
+        return Decimal(str(level)) > 0
+    except ArithmeticError:
+        return False
+
+
+def _error_frame(request: dict, code: int, message: str, errors=None):
+    frame = {
+        'event': request.get('event'),
+        'success': False,
+        'error_code': code,
+        'error_message': message,
+        'errors': errors or {},
+    }
+    if 'tag' in request:
+        frame['tag'] = request['tag']
+
+    return frame
+
+
+class MockB2C2Server:
+    """
+    The REST and websocket servers with a shared exchange.
+
+    :param instruments: how many instruments to list
+    :param tick_rate: price frames per second per subscription
+    :param latency: seconds added to every REST and websocket
+        response
+    :param api_key: the token clients must send, any token is
+        accepted when None
+    """
+
+    def __init__(
+        self, instruments: int = 4, tick_rate: float = 10,
+        latency: float = 0, host: str = '127.0.0.1',
+        rest_port: int = 0, ws_port: int = 0,
+        api_key: Optional[str] = None, seed: Optional[int] = None,
+    ):
+        self.exchange = MockExchange(instruments, seed=seed)
+        self.rest = MockRESTServer(
+            self.exchange, host, rest_port, latency, api_key
+        )
+        self.websocket = MockWebsocketServer(
+            self.exchange, host, ws_port, tick_rate, latency, api_key
+        )
+
+    @property
+    def env(self) -> dict:
+        """
+        Pass to the API clients like `b2c2.client.env.uat`
+        """
+        return {'websocket': self.websocket.url, 'rest_api': self.rest.url}
+
+    async def start(self) -> None:
+        self.rest.start()
+        await self.websocket.start()
+
+    async def stop(self) -> None:
+        await self.websocket.stop()
+        self.rest.stop()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Serve a mock B2C2 REST and websocket API'
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--rest-port', type=int, default=8000)
+    parser.add_argument('--ws-port', type=int, default=8001)
+    parser.add_argument('--instruments', type=int, default=4)
+    parser.add_argument(
+        '--tick-rate', type=float, default=10,
+        help='price frames per second per subscription'
+    )
+    parser.add_argument(
+        '--latency', type=float, default=0,
+        help='seconds added to every response'
+    )
+    parser.add_argument('--api-key')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    server = MockB2C2Server(
+        args.instruments, args.tick_rate, args.latency, args.host,
+        args.rest_port, args.ws_port, args.api_key, args.seed
+    )
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(server.start())
+    print('Serving: {}'.format(json.dumps(server.env)))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(server.stop())
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,8 @@ from devtools import pformat
 from IPython.display import display
 from pydantic import BaseModel as PydanticBaseModel, PrivateAttr
 
+from b2c2 import codecs
+
 if TYPE_CHECKING:
     from b2c2.client import B2C2APIClient
 
@@ -30,8 +32,13 @@ def requires_bind(func):
     return wrapper
 
 
+def _format_quantity(quantity: Decimal) -> str:
+    return '{:0.4f}'.format(quantity)
+
+
 class BaseModel(PydanticBaseModel):
-    _client = PrivateAttr(Optional['B2C2APIClient'])  # noqa
+    # A `B2C2APIClient`, set by `bind_to_client`
+    _client = PrivateAttr(None)
     _widgets_cache = PrivateAttr(None)
 
     def bind_to_client(self, client: 'B2C2APIClient') -> None:  # noqa
@@ -131,7 +138,8 @@ class Balances(BaseModel, SubscriptableSchema):
             )
 
     def __add__(self, trade_resp):
-        new_balance = self.copy()
+        # A shallow copy would share (and change) our dict
+        new_balance = self.copy(update={'__root__': dict(self.__root__)})
 
         # Balances are 3 chars?
         instrument_trucated = trade_resp.instrument[:3]
@@ -165,7 +173,7 @@ class RequestForQuote(BaseModel):
     def dict(self, *args, **kwargs):
         kwargs['exclude_none'] = True
         res = super().dict(*args, **kwargs)
-        res['quantity'] = '{:0.4f}'.format(self.quantity)
+        res['quantity'] = _format_quantity(self.quantity)
         return res
 
 
@@ -249,7 +257,7 @@ class Trade(BaseModel):
     def dict(self, *args, **kwargs):
         kwargs['exclude_none'] = True
         res = super().dict(*args, **kwargs)
-        res['quantity'] = '{:0.4f}'.format(self.quantity)
+        res['quantity'] = _format_quantity(self.quantity)
         return res
 
 
@@ -267,3 +275,10 @@ class TradeResponse(BaseModel):
     # Probably a dict?
     order: Any
     executing_unit: Optional[str] = None
+
+
+# The RFQ and trade endpoints skip pydantic, see `b2c2.codecs`
+codecs.register_encoder(RequestForQuote, quantity=_format_quantity)
+codecs.register_encoder(Trade, quantity=_format_quantity)
+codecs.register_decoder(Quote)
+codecs.register_decoder(TradeResponse)
@@ -1,14 +1,132 @@
-from typing import Any, Generator, NamedTuple
+import asyncio
+import logging
+import threading
+
+from typing import Any, Dict, Generator, NamedTuple, Optional, Tuple
 from requests import Session
 from urllib.parse import urljoin
 from pydantic import BaseModel
 
+from b2c2 import codecs
+from b2c2.cache import ResponseCache, CachePolicy, FRESH, STALE
+from b2c2.single_flight import SingleFlight, AsyncSingleFlight
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None  # type: ignore
+
+
+logger = logging.getLogger(__name__)
+
 
 class Rule(NamedTuple):
     method: str
     api_path: str
     response: Any
     body: Any
+    # See `b2c2.cache`
+    cache: Optional[CachePolicy] = None
+    # API paths dropped from the cache by this request
+    invalidates: Tuple[str, ...] = ()
+
+
+def _is_model(cls) -> bool:
+    return isinstance(cls, type) and issubclass(cls, BaseModel)
+
+
+def _encode_model(body: BaseModel) -> str:
+    return body.json()
+
+
+def _unchanged(body):
+    return body
+
+
+class Endpoint:
+    """
+    A `Rule` compiled once, when the client class is created.
+
+    Everything about a request that doesn't change between calls
+    is worked out here: how the body is encoded, its headers and
+    how the response is parsed. What's left per request is
+    encoding the body and the request id. The absolute URL
+    depends on the client, each client resolves it once (see
+    `_url`).
+
+    Models with a fast encoder or decoder (see `b2c2.codecs`) use
+    them, `strict_encode` and `strict_parse` always go through
+    pydantic.
+    """
+    __slots__ = (
+        'rule', 'method', 'api_path', 'cache', 'invalidates',
+        'cache_key', 'coalesce', 'encode', 'strict_encode', 'headers',
+        'parses_json', 'parse', 'strict_parse',
+    )
+
+    def __init__(self, rule: Rule):
+        self.rule = rule
+        self.method = rule.method
+        self.api_path = rule.api_path
+        self.cache = rule.cache
+        self.invalidates = rule.invalidates
+        self.cache_key = (rule.method, rule.api_path)
+        # Only idempotent requests are shared, see `b2c2.single_flight`
+        self.coalesce = rule.method == 'GET'
+
+        self.encode: Any
+        self.strict_encode: Any
+        self.headers: Optional[Dict[str, str]]
+        if _is_model(rule.body):
+            self.encode = codecs.get_encoder(rule.body)
+            self.strict_encode = _encode_model
+            self.headers = {'Content-type': 'application/json'}
+        else:
+            self.encode = self.strict_encode = _unchanged
+            self.headers = None
+
+        # Not everything is JSON, connection errors and
+        # proxy errors can return HTML. However as per
+        # the spec of the API everything is JSON
+        self.parses_json = _is_model(rule.response)
+        self.parse: Any
+        self.strict_parse: Any
+        if self.parses_json:
+            self.parse = codecs.get_decoder(rule.response)
+            self.strict_parse = rule.response.parse_obj
+        else:
+            self.parse = self.strict_parse = rule.response
+
+    def codec(self, strict: bool) -> Tuple[Any, Any]:
+        """
+        :returns: (encode, parse)
+        """
+        if strict:
+            return self.strict_encode, self.strict_parse
+
+        return self.encode, self.parse
+
+
+def _flight_key(cache: ResponseCache, endpoint: Endpoint):
+    # A request started before its path was invalidated (e.g. a
+    # balance from before a trade) isn't shared with later callers
+    return (
+        endpoint.method, endpoint.api_path,
+        cache.generation(endpoint.api_path)
+    )
+
+
+def _url(client, endpoint: Endpoint) -> str:
+    """
+    The endpoint's absolute URL, joined once per client
+    """
+    url = client._urls.get(endpoint.api_path)
+    if url is None:
+        url = client._urls[endpoint.api_path] = urljoin(
+            client._base_url, endpoint.api_path
+        )
+
+    return url
 
 
 class OpenAPIClientMeta(type):
@@ -52,15 +170,18 @@ class OpenAPIClientMeta(type):
         """
         for api_path, spec in specification.items():
             for method, value in spec.items():
+                cache = value.get('cache')
                 yield Rule(
                     method,
                     api_path,
                     value.get('response'),
-                    value.get('body')
+                    value.get('body'),
+                    CachePolicy(**cache) if cache else None,
+                    tuple(value.get('invalidates', ())),
                 )
 
     @staticmethod
-    def _wrap_request_in_annotations(rule: Rule):
+    def _wrap_request_in_annotations(rule: Rule, asynchronous=False):
         """
         Creates a new closure the calls the BaseAPIClient's
         client request function.
@@ -68,7 +189,18 @@ class OpenAPIClientMeta(type):
         The purpose of this is to create a new function
         for each method we find in the definition and
         add the important typing data onto the function.
+
+        Asynchronous clients get coroutine functions, annotated
+        with what they return once awaited.
+
+        The rule is compiled into an `Endpoint` here, once.
         """
+        endpoint = Endpoint(rule)
+        if asynchronous:
+            return OpenAPIClientMeta._wrap_coroutine_in_annotations(
+                rule, endpoint
+            )
+
         if rule.body:
             def wrapped(
                 self,
@@ -76,7 +208,7 @@ class OpenAPIClientMeta(type):
                 **kwargs
             ) -> rule.response:  # type: ignore
                 return self._make_request(
-                    rule,
+                    endpoint,
                     body,
                     **kwargs,
                 )
@@ -86,7 +218,32 @@ class OpenAPIClientMeta(type):
                 **kwargs,
             ) -> rule.response:  # type: ignore
                 return self._make_request(
-                    rule,
+                    endpoint,
+                    **kwargs
+                )
+
+        return wrapped
+
+    @staticmethod
+    def _wrap_coroutine_in_annotations(rule: Rule, endpoint: Endpoint):
+        if rule.body:
+            async def wrapped(
+                self,
+                body: rule.body,  # type: ignore
+                **kwargs
+            ) -> rule.response:  # type: ignore
+                return await self._make_request(
+                    endpoint,
+                    body,
+                    **kwargs,
+                )
+        else:
+            async def wrapped(  # type: ignore
+                self,
+                **kwargs,
+            ) -> rule.response:  # type: ignore
+                return await self._make_request(
+                    endpoint,
                     **kwargs
                 )
 
@@ -110,6 +267,10 @@ class OpenAPIClientMeta(type):
         if getattr(Meta, 'abstract', False):
             return super().__new__(cls, name, bases, dct)
 
+        asynchronous = dct.get('_asynchronous') or any(
+            getattr(base, '_asynchronous', False) for base in bases
+        )
+
         constructed_methods = {}
         # This is for mypy.  It tells our plugin what methods
         # we have created dynamically
@@ -119,13 +280,13 @@ class OpenAPIClientMeta(type):
             # Add the *functions* to the class dict (functions
             # are later bound)
             method_name = cls._generate_method_name(rule)
-            method = cls._wrap_request_in_annotations(rule)
+            method = cls._wrap_request_in_annotations(rule, asynchronous)
 
             # If it's already in the cls dct, it's probably
             # already been bound. No need to add it to a subclass again
             if method_name not in dct:
                 constructed_methods[method_name] = method
-                dct[method_name] = cls._wrap_request_in_annotations(rule)
+                dct[method_name] = method
 
         # This is the same the built in function type(name, bases, dict)
         return super().__new__(cls, name, bases, dct)
@@ -136,36 +297,262 @@ class OpenAPIClient(metaclass=OpenAPIClientMeta):
     class Meta:
         abstract = True
 
-    def __init__(self, base_url: str):
+    def __init__(
+        self, base_url: str, strict_validation: bool = False,
+        pin_environment: bool = False
+    ):
+        """
+        :param strict_validation: validate every response with
+            pydantic, rather than trusting the API (see
+            `b2c2.codecs`)
+        :param pin_environment: read the proxy and CA bundle
+            settings from the environment once, rather than on
+            every request as requests does. Later changes to the
+            environment are ignored, and so is .netrc.
+        """
         self._base_url = base_url
+        self.strict_validation = strict_validation
+        self._urls: Dict[str, str] = {}
         self._session = Session()
+        if pin_environment:
+            settings = self._session.merge_environment_settings(
+                base_url, {}, None, None, None
+            )
+            self._session.proxies = settings['proxies']
+            self._session.verify = settings['verify']
+            self._session.trust_env = False
+        self.cache = ResponseCache()
+        self.single_flight = SingleFlight()
 
-    def _make_request(self, rule: Rule, body=None):
+    def _make_request(self, endpoint: Endpoint, body=None):
+        try:
+            if endpoint.cache is None or body is not None:
+                return self._fetch(endpoint, body)
 
-        if isinstance(body, BaseModel):
-            response = self._session.request(
-                rule.method,
-                urljoin(self._base_url, rule.api_path),
-                headers={'Content-type': 'application/json'},
-                data=body.json(),
-            )
-        else:
-            response = self._session.request(
-                rule.method,
-                urljoin(self._base_url, rule.api_path),
-                data=body,
+            return self._cached_request(endpoint)
+        finally:
+            # Whether or not it worked, the request might have
+            # changed them
+            for api_path in endpoint.invalidates:
+                self.cache.invalidate(api_path)
+
+    def _cached_request(self, endpoint: Endpoint):
+        key = endpoint.cache_key
+        value, state, generation = self.cache.lookup(
+            key, endpoint.cache  # type: ignore
+        )
+        if state == FRESH:
+            return value
+
+        if state == STALE:
+            if self.cache.start_revalidation(key):
+                threading.Thread(
+                    target=self._revalidate,
+                    args=(endpoint, key, generation),
+                    name='b2c2-revalidate', daemon=True,
+                ).start()
+            return value
+
+        value = self._fetch(endpoint)
+        self.cache.store(key, value, generation)
+        return value
+
+    def _revalidate(self, endpoint: Endpoint, key, generation: int) -> None:
+        try:
+            self.cache.store(key, self._fetch(endpoint), generation)
+        except Exception:
+            logger.exception(
+                'Could not revalidate %s %s',
+                endpoint.method, endpoint.api_path
             )
+        finally:
+            self.cache.end_revalidation(key)
 
-        # Not everything is JSON, connection errors and
-        # proxy errors can return HTML. However as per
-        # the spec of the API everything is JSON
-        if issubclass(rule.response, BaseModel):
-            response_body = response.json()
-            response_wrapped = rule.response.parse_obj(response_body)
+    def _fetch(self, endpoint: Endpoint, body=None):
+        """
+        Identical GETs made at the same time share one request
+        (and its response), see `b2c2.single_flight`.
+        """
+        if not endpoint.coalesce or body is not None:
+            return self._send_request(endpoint, body)
+
+        return self.single_flight.do(
+            _flight_key(self.cache, endpoint),
+            lambda: self._send_request(endpoint)
+        )
+
+    def _send_request(self, endpoint: Endpoint, body=None):
+        encode, parse = endpoint.codec(self.strict_validation)
+        response = self._session.request(
+            endpoint.method,
+            _url(self, endpoint),
+            headers=endpoint.headers,
+            data=encode(body),
+        )
+
+        if endpoint.parses_json:
+            response_wrapped = parse(response.json())
+            # TODO: find a better way of binding model
+            # instances to the client
             response_wrapped._client = self
         else:
-            response_wrapped = rule.response(response.text)
+            response_wrapped = parse(response.text)
+
+        return response_wrapped
+
+
+class AsyncOpenAPIClient(metaclass=OpenAPIClientMeta):
+    """
+    Like `OpenAPIClient`, but the generated methods are
+    coroutines, so requests don't block the event loop.
+
+    Requests go through an `aiohttp.ClientSession` (``pip install
+    b2c2_client[async]``) which keeps a pool of connections. It
+    is created on the first request, on the running loop, and
+    closed with `close()` or by using the client as an async
+    context manager.
+
+    :param strict_validation: see `OpenAPIClient`
+    :param session_kwargs: passed to `aiohttp.ClientSession`, e.g.
+        a `connector` with different pool limits
+    """
+    _asynchronous = True
+
+    class Meta:
+        abstract = True
+
+    def __init__(
+        self, base_url: str, strict_validation: bool = False,
+        **session_kwargs
+    ):
+        if aiohttp is None:
+            raise ImportError(
+                'aiohttp is not installed. Install it with '
+                '`pip install b2c2_client[async]`'
+            )
+
+        self._base_url = base_url
+        self.strict_validation = strict_validation
+        self._urls: Dict[str, str] = {}
+        self._session_kwargs = session_kwargs
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.cache = ResponseCache()
+        self.single_flight = AsyncSingleFlight()
+        # Background revalidations, referenced until they are done
+        self._revalidations: set = set()
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(**self._session_kwargs)
+
+        return self._session
+
+    async def close(self) -> None:
+        for task in self._revalidations:
+            task.cancel()
+        await asyncio.gather(*self._revalidations, return_exceptions=True)
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_headers(self) -> dict:
+        """
+        Headers sent with every request
+        """
+        return {}
+
+    async def _response_hook(self, response) -> None:
+        """
+        Called with every response before it's parsed, the body
+        can be read here.
+        """
+
+    async def _make_request(self, endpoint: Endpoint, body=None):
+        # See `OpenAPIClient._make_request`
+        try:
+            if endpoint.cache is None or body is not None:
+                return await self._fetch(endpoint, body)
+
+            return await self._cached_request(endpoint)
+        finally:
+            for api_path in endpoint.invalidates:
+                self.cache.invalidate(api_path)
+
+    async def _cached_request(self, endpoint: Endpoint):
+        key = endpoint.cache_key
+        value, state, generation = self.cache.lookup(
+            key, endpoint.cache  # type: ignore
+        )
+        if state == FRESH:
+            return value
+
+        if state == STALE:
+            if self.cache.start_revalidation(key):
+                task = asyncio.ensure_future(
+                    self._revalidate(endpoint, key, generation)
+                )
+                self._revalidations.add(task)
+                task.add_done_callback(self._revalidations.discard)
+            return value
+
+        value = await self._fetch(endpoint)
+        self.cache.store(key, value, generation)
+        return value
+
+    async def _revalidate(
+        self, endpoint: Endpoint, key, generation: int
+    ) -> None:
+        try:
+            self.cache.store(key, await self._fetch(endpoint), generation)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(
+                'Could not revalidate %s %s',
+                endpoint.method, endpoint.api_path
+            )
+        finally:
+            self.cache.end_revalidation(key)
+
+    async def _fetch(self, endpoint: Endpoint, body=None):
+        # See `OpenAPIClient._fetch`
+        if not endpoint.coalesce or body is not None:
+            return await self._send_request(endpoint, body)
+
+        return await self.single_flight.do(
+            _flight_key(self.cache, endpoint),
+            lambda: self._send_request(endpoint)
+        )
+
+    async def _send_request(self, endpoint: Endpoint, body=None):
+        encode, parse = endpoint.codec(self.strict_validation)
+        headers = self._get_headers()
+        if endpoint.headers:
+            headers.update(endpoint.headers)
+
+        async with self._get_session().request(
+            endpoint.method,
+            _url(self, endpoint),
+            headers=headers,
+            data=encode(body),
+        ) as response:
+            await self._response_hook(response)
+
+            # See `OpenAPIClient._send_request`, the content type
+            # isn't checked there either
+            if endpoint.parses_json:
+                response_wrapped = parse(
+                    await response.json(content_type=None)
+                )
+                response_wrapped._client = self
+            else:
+                response_wrapped = parse(await response.text())
 
-        # TODO: find a better way of binding model
-        # instances to the client
         return response_wrapped
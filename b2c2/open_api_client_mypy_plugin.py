@@ -23,8 +23,9 @@ from pydoc import locate
 from mypy.plugin import Plugin
 from mypy.plugins.common import add_method
 from mypy.nodes import Argument, Var
+from mypy.types import AnyType, TypeOfAny
 
-from b2c2.client import OpenAPIClient
+from b2c2.client import OpenAPIClient, AsyncOpenAPIClient
 
 
 def hook(ctx):
@@ -39,6 +40,13 @@ def hook(ctx):
             method.__annotations__['return'].__name__
         )
 
+        # Methods of async clients are coroutines
+        if inspect.iscoroutinefunction(method):
+            any_type = AnyType(TypeOfAny.special_form)
+            return_type = ctx.api.named_type_or_none(
+                'typing.Coroutine', [any_type, any_type, return_type]
+            ) or any_type
+
         self_type = ctx.api.named_type(ctx.cls.name)
 
         arguments = []
@@ -69,9 +77,10 @@ def hook(ctx):
 
 class APIClientPlugin(Plugin):
     def get_base_class_hook(self, fullname: str):
-        if fullname == '.'.join([
-            OpenAPIClient.__module__, OpenAPIClient.__name__
-        ]):
+        if fullname in {
+            '.'.join([client.__module__, client.__name__])
+            for client in (OpenAPIClient, AsyncOpenAPIClient)
+        }:
             return hook
 
 
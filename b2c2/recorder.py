@@ -0,0 +1,264 @@
+import os
+import time
+import logging
+import asyncio
+import numpy as np
+
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+from b2c2.exceptions import SlowConsumerException
+from b2c2.tick_format import (
+    TickFileHeader, IndexBlock, record_dtype, to_fixed, start_index,
+    append_index, TICK_SUFFIX,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TickRecorder:
+    """
+    Records price frames to compact binary tick files (the format
+    is described in `b2c2.tick_format`) for post-trade analysis,
+    they can be read back with `b2c2.archive.TickArchive`.
+
+    Frames are packed into a NumPy buffer and written in bulk:
+    when the buffer is full, every `flush_interval` seconds and on
+    close. Each write is a block, appended to the file's index.
+    Files are rotated when they reach `max_bytes` or `max_age`
+    seconds.
+
+    Writes are blocking, but they are one `write()` per block
+    rather than one per frame, so this is fine to run on the
+    event loop.
+
+    .. code-block:: python
+
+        with TickRecorder('ticks/') as recorder:
+            async with ws_client.quote_subscribe(sub) as fanout:
+                await recorder.consume(fanout)
+
+    Levels beyond `depth` are not recorded (they are counted in
+    `truncated`).
+    """
+
+    def __init__(
+        self, directory: str, prefix: str = 'b2c2',
+        depth: int = 8, price_decimals: int = 8,
+        quantity_decimals: int = 8, buffer_size: int = 4096,
+        flush_interval: float = 1.0, max_bytes: int = 256 * 2 ** 20,
+        max_age: Optional[float] = 3600,
+    ):
+        """
+        :param directory: where tick files are written
+        :param depth: the most levels recorded per side
+        :param price_decimals: decimal places of prices kept
+        :param quantity_decimals: decimal places of quantities kept
+        :param buffer_size: records buffered before writing
+        :param flush_interval: the most seconds a frame is buffered
+            while `consume()` runs. Frames passed to `record()`
+            directly are written when a frame arrives after the
+            interval, or on `flush()`.
+        :param max_bytes: rotate files at about this size
+        :param max_age: rotate files after this many seconds
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.depth = depth
+        self.price_decimals = price_decimals
+        self.quantity_decimals = quantity_decimals
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        self._dtype = record_dtype(depth)
+        self._buffer = np.zeros(buffer_size, dtype=self._dtype)
+        self._empty = np.zeros((), dtype=self._dtype)
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+
+        self.instrument_ids: Dict[str, int] = {}
+        self.path: Optional[str] = None
+        self._file = None
+        self._index = None
+        self._opened = 0.0
+        self._records = 0
+        # Instrument ids already in the file's index
+        self._indexed: Set[int] = set()
+        self._file_sequence = 0
+
+        self.recorded = 0
+        self.truncated = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _open(self):
+        self._file_sequence += 1
+        created = time.time()
+        name = '{}-{}-{:04d}{}'.format(
+            self.prefix,
+            datetime.utcfromtimestamp(created).strftime('%Y%m%dT%H%M%S'),
+            self._file_sequence, TICK_SUFFIX
+        )
+        self.path = os.path.join(self.directory, name)
+        self._file = open(self.path, 'wb')
+        self._file.write(TickFileHeader(
+            self.depth, self.price_decimals, self.quantity_decimals,
+            int(created * 1000)
+        ).pack())
+        self._opened = time.monotonic()
+        self._records = 0
+        self._indexed = set()
+        self._index = start_index(self.path, {
+            'depth': self.depth,
+            'price_decimals': self.price_decimals,
+            'quantity_decimals': self.quantity_decimals,
+        })
+
+    def _append_index(self, block: IndexBlock) -> None:
+        new = [id_ for id_ in block.instruments if id_ not in self._indexed]
+        if new:
+            self._indexed.update(new)
+            names = {id_: name for name, id_ in self.instrument_ids.items()}
+            new_instruments = {names[id_]: id_ for id_ in new}
+        else:
+            new_instruments = {}
+
+        append_index(self._index, block, new_instruments)  # type: ignore
+
+    def _instrument_id(self, instrument: str) -> int:
+        id_ = self.instrument_ids.get(instrument)
+        if id_ is None:
+            id_ = self.instrument_ids[instrument] = len(self.instrument_ids)
+
+        return id_
+
+    def _pack_side(self, row, side: str, items) -> int:
+        depth = self.depth
+        if len(items) > depth:
+            self.truncated += len(items) - depth
+            items = items[:depth]
+
+        quantities = row[side + '_quantity']
+        prices = row[side + '_price']
+        for i, item in enumerate(items):
+            quantities[i] = to_fixed(item['quantity'], self.quantity_decimals)
+            prices[i] = to_fixed(item['price'], self.price_decimals)
+
+        return len(items)
+
+    def record(self, frame) -> None:
+        """
+        :param frame: a `QuoteStreamFrame` or
+            `TrustedQuoteStreamFrame`
+        """
+        # Trusted frames keep the raw strings, no need to build
+        # the level models
+        raw = getattr(frame, '_raw', None)
+        levels = raw['levels'] if raw is not None else frame.levels.dict()
+
+        self._buffer[self._buffered] = self._empty
+        row = self._buffer[self._buffered]
+        row['timestamp'] = frame.timestamp
+        row['instrument'] = self._instrument_id(frame.instrument)
+        row['buy_count'] = self._pack_side(row, 'buy', levels['buy'])
+        row['sell_count'] = self._pack_side(row, 'sell', levels['sell'])
+
+        self._buffered += 1
+        self.recorded += 1
+
+        if (
+            self._buffered == len(self._buffer) or
+            time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def record_many(self, frames: Iterable) -> None:
+        for frame in frames:
+            self.record(frame)
+
+    def flush(self) -> None:
+        """
+        Writes the buffered records as a block, then rotates the
+        file if it's due.
+        """
+        self._last_flush = time.monotonic()
+        if not self._buffered:
+            return
+
+        if self._file is None:
+            self._open()
+
+        records = self._buffer[:self._buffered]
+        self._file.write(records.tobytes())  # type: ignore
+        self._file.flush()  # type: ignore
+
+        instruments: Set[int] = set(records['instrument'].tolist())
+        # After the records, so a reader never maps records that
+        # aren't written yet
+        self._append_index(IndexBlock(
+            self._records, len(records),
+            int(records['timestamp'].min()), int(records['timestamp'].max()),
+            sorted(instruments),
+        ))
+        self._records += len(records)
+        self._buffered = 0
+
+        if (
+            self._file.tell() >= self.max_bytes or  # type: ignore
+            self.max_age is not None and
+            time.monotonic() - self._opened >= self.max_age
+        ):
+            self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._index.close()  # type: ignore
+            self._file = self._index = None
+
+    def close(self) -> None:
+        self.flush()
+        self._close_file()
+
+    async def consume(
+        self, fanout, name: str = 'tick-recorder', max_items: int = 1000
+    ) -> None:
+        """
+        Records every frame from a fanout until cancelled. Frames
+        are taken in batches (see `stream_batches`), and written
+        at least every `flush_interval` seconds, even when the
+        stream goes quiet.
+        """
+        flusher = asyncio.ensure_future(self._flush_periodically())
+        try:
+            while True:
+                try:
+                    async with fanout.stream_batches(
+                        max_items=max_items, name=name
+                    ) as batches:
+                        async for batch in batches:
+                            self.record_many(batch)
+                except SlowConsumerException as e:
+                    # Carry on, the gap is in the timestamps
+                    logger.error('Tick recorder fell behind', exc_info=e)
+        finally:
+            flusher.cancel()
+            self.flush()
+
+    async def _flush_periodically(self) -> None:
+        if self.flush_interval <= 0:
+            # `record()` writes every frame
+            return
+
+        while True:
+            due = self._last_flush + self.flush_interval
+            await asyncio.sleep(max(due - time.monotonic(), 0))
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
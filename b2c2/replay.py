@@ -0,0 +1,290 @@
+import json
+import time
+import asyncio
+import logging
+
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import Iterable, Iterator, NamedTuple, Optional
+from websockets.exceptions import ConnectionClosedOK
+
+from b2c2.archive import TickArchive, Timestamp
+from b2c2.frames import QuoteSubscribeFrame
+from b2c2.websocket import B2C2WebsocketClient
+from b2c2.instrumentation import LatencyHistogram
+
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayReport(NamedTuple):
+    # Frames sent
+    frames: int
+    # Seconds from the first frame to the last being consumed,
+    # less the time spent encoding recorded frames
+    elapsed: float
+    # Frames per second
+    throughput: float
+    # None is as fast as possible
+    speed: Optional[float]
+    # How late frames were sent compared to the recording's
+    # timing (see `LatencyHistogram.snapshot`)
+    schedule_lag: dict
+    # The client's `ClientMetrics.snapshot()`, when it has metrics
+    metrics: Optional[dict]
+    # Frames consumed, fewer than were sent if some were dropped
+    # (e.g. by a fanout's overflow policy)
+    consumed: int
+
+
+class ReplayAPIClient:
+    """
+    Stands in for the REST client, a replay needs no URL or
+    credentials.
+    """
+    env = {'websocket': 'replay://'}
+
+    def _get_headers(self):
+        return {}
+
+
+class ReplayWebsocket:
+    """
+    One connection of a `TickReplay`. Answers requests like the
+    server and sends the recorded price frames of subscribed
+    instruments once the replay is started.
+    """
+    _start = object()
+
+    def __init__(self, replay: 'TickReplay'):
+        self._replay = replay
+        self._responses: asyncio.Queue = asyncio.Queue()
+        self._started = False
+        self.subscribed: set = set()
+
+    def start(self):
+        self._responses.put_nowait(self._start)
+
+    async def send(self, message):
+        request = json.loads(message)
+        if request['event'] == 'subscribe':
+            self.subscribed.add(request['instrument'])
+        elif request['event'] == 'unsubscribe':
+            self.subscribed.discard(request['instrument'])
+
+        self._responses.put_nowait(json.dumps({**request, 'success': True}))
+
+    async def recv(self):
+        while not self._started:
+            response = await self._responses.get()
+            if response is not self._start:
+                return response
+            self._started = True
+
+        if not self._responses.empty():
+            return self._responses.get_nowait()
+
+        return await self._replay._next_message(self)
+
+
+class TickReplay:
+    """
+    A transport for `B2C2WebsocketClient` that plays back ticks
+    from a `b2c2.archive.TickArchive` instead of connecting to
+    the server, so frames go through the real `listen()`, router
+    and fanouts.
+
+    :param speed: 1 is real time, 10 is ten times faster and
+        None is as fast as the client can take them
+
+    `run()` subscribes to every instrument, plays the archive
+    through and reports the throughput and (with a client that
+    has metrics) the latency of each stage:
+
+    .. code-block:: python
+
+        replay = TickReplay(TickArchive('ticks/'), speed=None)
+        report = await replay.run(replay.client())
+
+    Clients can also be driven by hand. Playback starts with
+    `start()`, after subscribing:
+
+    .. code-block:: python
+
+        client = B2C2WebsocketClient(
+            ReplayAPIClient(), transport=replay
+        )
+        async with client.connect():
+            ...
+            replay.start()
+
+    The connection closes when the archive has been played.
+    """
+
+    def __init__(
+        self, archive: TickArchive, speed: Optional[float] = None,
+        instruments: Optional[Iterable[str]] = None,
+        start: Timestamp = None, end: Timestamp = None,
+    ):
+        self.archive = archive
+        self.speed = speed
+        self.instruments = (
+            set(instruments) if instruments is not None
+            else archive.instruments
+        )
+        self._query = (start, end)
+        self.websocket: Optional[ReplayWebsocket] = None
+
+        self._records: Optional[Iterator] = None
+        self._started_at: Optional[float] = None
+        self._first_timestamp = 0
+        self.sent = 0
+        # Time spent turning records into messages
+        self.overhead = 0.0
+        self.schedule_lag = LatencyHistogram()
+
+    def __call__(self, url, **kwargs):
+        # Called like `websockets.connect`
+        return self._connect()
+
+    @asynccontextmanager
+    async def _connect(self):
+        self.websocket = ReplayWebsocket(self)
+        yield self.websocket
+
+    def client(self, **kwargs):
+        """
+        :returns: a `B2C2WebsocketClient` (with metrics) connected
+            to this replay
+        """
+        kwargs.setdefault('metrics', True)
+        return B2C2WebsocketClient(
+            ReplayAPIClient(), transport=self, **kwargs
+        )
+
+    def start(self):
+        self.websocket.start()  # type: ignore
+
+    def _iter_records(self):
+        start, end = self._query
+        for chunk in self.archive.query(self.instruments, start, end):
+            tick_file = chunk.tick_file
+            instruments = chunk.instruments()
+            for instrument, record in zip(instruments, chunk.records):
+                yield instrument, record, tick_file
+
+    async def _next_message(self, websocket: ReplayWebsocket):
+        if self._records is None:
+            self._records = self._iter_records()
+
+        while True:
+            encode_started = time.perf_counter()
+            try:
+                instrument, record, tick_file = next(self._records)
+            except StopIteration:
+                raise ConnectionClosedOK(1000, 'Replay finished')
+
+            if instrument not in websocket.subscribed:
+                self.overhead += time.perf_counter() - encode_started
+                continue
+
+            message = json.dumps(tick_file.to_raw(record))
+            self.overhead += time.perf_counter() - encode_started
+            break
+
+        timestamp = int(record['timestamp'])
+        now = time.perf_counter()
+        if self._started_at is None:
+            self._started_at = now
+            self._first_timestamp = timestamp
+            # Opening the archive isn't part of the replay
+            self.overhead = 0.0
+
+        if self.speed:
+            due = self._started_at + (
+                (timestamp - self._first_timestamp) / 1000 / self.speed
+            )
+            if due > now:
+                await asyncio.sleep(due - now)
+            self.schedule_lag.record(time.perf_counter() - due)
+
+        self.sent += 1
+        return message
+
+    async def run(
+        self, client, levels=(1,), timeout: float = 10.0
+    ) -> ReplayReport:
+        """
+        Subscribes the client to every instrument of the replay,
+        plays back the archive and waits for every frame to be
+        consumed.
+
+        :param timeout: the most seconds to wait for the frames
+            still being consumed once the archive has been played,
+            frames that were dropped never are
+        """
+        consumed = 0
+        last_consumed = 0.0
+        all_consumed = asyncio.Event()
+
+        async def _consume(batches):
+            nonlocal consumed, last_consumed
+            async for batch in batches:
+                consumed += len(batch)
+                last_consumed = time.perf_counter()
+                if consumed >= self.sent:
+                    all_consumed.set()
+
+        async with client.connect():
+            listener = asyncio.ensure_future(client.listen())
+            consumers = []
+
+            async with AsyncExitStack() as stack:
+                for instrument in sorted(self.instruments):
+                    fanout = await stack.enter_async_context(
+                        client.quote_subscribe(QuoteSubscribeFrame(
+                            instrument=instrument, levels=list(levels)
+                        ))
+                    )
+                    batches = await stack.enter_async_context(
+                        fanout.stream_batches(max_items=1000)
+                    )
+                    consumers.append(
+                        asyncio.ensure_future(_consume(batches))
+                    )
+
+                self.start()
+                try:
+                    await listener
+                except ConnectionClosedOK:
+                    pass
+
+                if consumed < self.sent:
+                    # Set while the archive was played, when the
+                    # consumers had caught up
+                    all_consumed.clear()
+                    try:
+                        await asyncio.wait_for(all_consumed.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        logger.warning(
+                            'Replay: %d of %d frames consumed after %ss',
+                            consumed, self.sent, timeout
+                        )
+                finished = last_consumed if consumed else time.perf_counter()
+
+                for consumer in consumers:
+                    consumer.cancel()
+                await asyncio.gather(*consumers, return_exceptions=True)
+
+        elapsed = (
+            finished - self._started_at - self.overhead
+            if self._started_at is not None else 0.0
+        )
+        return ReplayReport(
+            frames=self.sent,
+            elapsed=elapsed,
+            throughput=self.sent / elapsed if elapsed > 0 else 0.0,
+            speed=self.speed,
+            schedule_lag=self.schedule_lag.snapshot(),
+            metrics=client.metrics.snapshot() if client.metrics else None,
+            consumed=consumed,
+        )
@@ -0,0 +1,67 @@
+import logging
+
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class Route(NamedTuple):
+    frame_cls: Any
+    handler: Callable[[Any], Awaitable[None]]
+
+
+class FrameRouter:
+    """
+    Routes decoded websocket frames to a frame class and a
+    handler.
+
+    The old approach walked a list of pampy patterns for every
+    frame. Price frames (by far the most common) sat near the
+    end of that list, so every tick paid for half a dozen failed
+    matches. Here a route is a single dictionary lookup on the
+    `event` field.
+
+    Error frames are the exception: they reuse the event of the
+    request that caused them, so they are checked first with a
+    cheap test on `success` and `error_code`.
+
+    New event types can be added with `add_route`:
+
+    .. code-block:: python
+
+        router.add_route('my_event', MyEventFrame, on_my_event)
+
+    """
+
+    def __init__(self):
+        self._routes: Dict[str, Route] = {}
+        self._error_route: Optional[Route] = None
+
+    def add_route(self, event: str, frame_cls, handler) -> None:
+        self._routes[event] = Route(frame_cls, handler)
+
+    def set_error_route(self, frame_cls, handler) -> None:
+        self._error_route = Route(frame_cls, handler)
+
+    def match(self, frame: dict) -> Optional[Route]:
+        if frame.get('success') is False and 'error_code' in frame:
+            return self._error_route
+
+        return self._routes.get(frame.get('event'))  # type: ignore
+
+    async def dispatch(self, frame: dict) -> None:
+        route = self.match(frame)
+
+        if route is None:
+            logger.error(
+                'No handler for Frame:\n %r', frame
+            )
+            return
+
+        parsed = route.frame_cls.parse_obj(frame)
+        logger.debug(
+            'Incoming Frame:\n %r', parsed
+        )
+
+        await route.handler(parsed)
@@ -0,0 +1,94 @@
+"""
+Coalesces identical calls that run at the same time: the first
+caller makes the call and everyone who asks for the same key
+before it's finished waits for, and gets, its result (or its
+exception).
+
+Used by the API clients so a burst of identical GETs, e.g. every
+view refreshing the balance, is one request.
+"""
+import asyncio
+import threading
+
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    For threads
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # Callers that got someone else's result
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            leader = key not in self._calls
+            if leader:
+                self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+            call = self._calls[key]
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    For coroutines on one event loop
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        # Callers that got someone else's result
+        self.coalesced = 0
+
+    def _done(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+        # Everyone waiting might have been cancelled
+        if not future.cancelled():
+            future.exception()
+
+    async def do(
+        self, key: Hashable, func: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            # A task of its own, so cancelling the first caller
+            # doesn't cancel the call for the others
+            future = self._calls[key] = asyncio.ensure_future(func())
+            future.add_done_callback(
+                lambda future: self._done(key, future)
+            )
+
+        return await asyncio.shield(future)
@@ -0,0 +1,179 @@
+import weakref
+
+from decimal import Decimal
+from weakref import WeakValueDictionary
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+Levels = Tuple[Decimal, ...]
+
+
+class InstrumentRoute:
+    """
+    The consumer fanouts of one instrument, indexed so a price
+    frame can be routed without sorting levels or hashing
+    Decimals on every tick.
+
+    When the consumers change, a plan is built listing each
+    consumer fanout and whether it needs filtering (its levels
+    differ from the upstream subscription's). When none of them
+    do, e.g. a single consumer, the frame is passed on without
+    looking at its levels. Otherwise the first time a
+    frame arrives with a given set of quantities, the positions
+    of each filtered consumer's levels are worked out and cached
+    against the quantities as the server sent them (usually the
+    same strings every tick).
+
+    The server's quantities are compared as Decimals, so '1' and
+    '1.0' are the same level whatever the request's formatting.
+    """
+    # Plenty for the handful of quantity layouts a server uses
+    _max_selections = 64
+
+    def __init__(self):
+        self.consumers: WeakValueDictionary = WeakValueDictionary()
+        self._upstream_levels: frozenset = frozenset()
+        self._plan: Optional[List[Tuple[Any, Optional[frozenset]]]] = None
+        # Nobody in the plan needs filtering
+        self._passthrough = False
+        self._selections: Dict[tuple, list] = {}
+        self._decimals: Dict[Any, Decimal] = {}
+
+    def add(self, levels: Levels, fanout) -> None:
+        self.consumers[levels] = fanout
+        self.invalidate()
+
+    def set_upstream(self, levels) -> None:
+        self._upstream_levels = frozenset(levels)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        self._plan = None
+        self._selections = {}
+
+    def wanted_levels(self) -> set:
+        wanted: set = set()
+        for levels in self.consumers.keys():
+            wanted.update(levels)
+
+        return wanted
+
+    def _build_plan(self):
+        self._plan = [
+            (
+                weakref.ref(fanout),
+                None if set(levels) == self._upstream_levels
+                else frozenset(levels)
+            )
+            for levels, fanout in self.consumers.items()
+        ]
+        self._passthrough = all(
+            levels is None for _, levels in self._plan
+        )
+        return self._plan
+
+    def _positions(self, quantities: tuple, levels: frozenset):
+        decimals = self._decimals
+        positions = []
+        for position, quantity in enumerate(quantities):
+            decimal = decimals.get(quantity)
+            if decimal is None:
+                decimal = decimals[quantity] = Decimal(quantity)
+            if decimal in levels:
+                positions.append(position)
+
+        return positions
+
+    def _select(self, layout: tuple, plan) -> list:
+        """
+        :returns: for each consumer in the plan, None when it
+            takes the frame as is, or the positions of its buy and
+            sell levels
+        """
+        buy, sell = layout
+        selection: list = []
+        for _, levels in plan:
+            if levels is None:
+                selection.append(None)
+                continue
+
+            buy_positions = self._positions(buy, levels)
+            sell_positions = self._positions(sell, levels)
+            if (
+                len(buy_positions) == len(buy) and
+                len(sell_positions) == len(sell)
+            ):
+                # It asked for everything the server sent
+                selection.append(None)
+            else:
+                selection.append((buy_positions, sell_positions))
+
+        if len(self._selections) >= self._max_selections:
+            self._selections = {}
+        self._selections[layout] = selection
+        return selection
+
+    def targets(self, frame) -> Iterator[Tuple[Any, Any]]:
+        """
+        :returns: each consumer fanout with the frame it should get
+        """
+        plan = self._plan or self._build_plan()
+        if self._passthrough:
+            for fanout_ref, _ in plan:
+                fanout = fanout_ref()
+                if fanout is None:
+                    self.invalidate()
+                    continue
+
+                yield fanout, frame
+            return
+
+        layout = frame._level_quantities()
+        selection = self._selections.get(layout)
+        if selection is None:
+            selection = self._select(layout, plan)
+
+        for (fanout_ref, _), positions in zip(plan, selection):
+            fanout = fanout_ref()
+            if fanout is None:
+                # Garbage collected, rebuild next time
+                self.invalidate()
+                continue
+
+            if positions is None:
+                yield fanout, frame
+            else:
+                yield fanout, frame._select_levels(*positions)
+
+
+class SubscriptionIndex:
+    """
+    instrument -> levels -> consumer fanout
+    """
+
+    def __init__(self):
+        self._routes: Dict[str, InstrumentRoute] = {}
+
+    def get(self, instrument: str) -> Optional[InstrumentRoute]:
+        return self._routes.get(instrument)
+
+    def route(self, instrument: str) -> InstrumentRoute:
+        route = self._routes.get(instrument)
+        if route is None:
+            route = self._routes[instrument] = InstrumentRoute()
+
+        return route
+
+    def wanted_levels(self, instrument: str) -> set:
+        route = self._routes.get(instrument)
+        return route.wanted_levels() if route else set()
+
+    def prune(self, instrument: str) -> None:
+        """
+        Forgets the instrument once it has no consumers left
+        """
+        route = self._routes.get(instrument)
+        if route is not None:
+            route.invalidate()
+            if not len(route.consumers):
+                del self._routes[instrument]
@@ -0,0 +1,187 @@
+"""
+The on-disk format of recorded ticks, shared by the recorder
+(`b2c2.recorder`) and the archive reader (`b2c2.archive`).
+
+A tick file is a fixed size header followed by fixed size
+records, so record `n` is always at
+`HEADER.size + n * dtype.itemsize` and a file can be memory
+mapped as a NumPy structured array.
+
+Each record is (little endian, no padding):
+
+    ============== ======== =====================================
+    timestamp      int64    the server's timestamp (ms)
+    instrument     uint32   id from the sidecar index
+    buy_count      uint16   levels used on the buy side
+    sell_count     uint16   levels used on the sell side
+    buy_quantity   int64[d] fixed point, `d` is the file's depth
+    buy_price      int64[d]
+    sell_quantity  int64[d]
+    sell_price     int64[d]
+    ============== ======== =====================================
+
+Quantities and prices are stored as integers scaled by
+`10 ** decimals`, unused levels are zero. The decimals are in
+the header.
+
+Next to every tick file is an index (`<file>.jsonl`), one JSON
+document per line. The first line has the file's settings, then
+there's a line per block of records written together: where it
+starts, its size in records, its first and last timestamps, the
+instruments in it and the ids of instruments new to the file.
+Lines are only appended, a reader ignores a last line that isn't
+complete yet.
+"""
+import json
+import struct
+import numpy as np
+
+from decimal import Decimal
+from typing import Dict, NamedTuple, List, TextIO
+
+
+MAGIC = b'B2C2TCK\x00'
+VERSION = 1
+
+# magic, version, depth, price decimals, quantity decimals,
+# record size, created (ms), padded to 32 bytes
+HEADER = struct.Struct('<8sHHBBxxIq4x')
+
+TICK_SUFFIX = '.ticks'
+INDEX_SUFFIX = '.jsonl'
+
+
+class TickFileHeader(NamedTuple):
+    depth: int
+    price_decimals: int
+    quantity_decimals: int
+    created: int
+
+    def pack(self) -> bytes:
+        return HEADER.pack(
+            MAGIC, VERSION, self.depth, self.price_decimals,
+            self.quantity_decimals, record_dtype(self.depth).itemsize,
+            self.created,
+        )
+
+    @classmethod
+    def unpack(cls, data: bytes) -> 'TickFileHeader':
+        (
+            magic, version, depth, price_decimals, quantity_decimals,
+            record_size, created
+        ) = HEADER.unpack(data[:HEADER.size])
+
+        if magic != MAGIC:
+            raise ValueError('Not a tick file')
+        if version != VERSION:
+            raise ValueError(
+                'Unsupported tick file version {}'.format(version)
+            )
+        if record_size != record_dtype(depth).itemsize:
+            raise ValueError('Tick file record size does not match')
+
+        return cls(depth, price_decimals, quantity_decimals, created)
+
+
+def record_dtype(depth: int) -> np.dtype:
+    return np.dtype([
+        ('timestamp', '<i8'),
+        ('instrument', '<u4'),
+        ('buy_count', '<u2'),
+        ('sell_count', '<u2'),
+        ('buy_quantity', '<i8', (depth,)),
+        ('buy_price', '<i8', (depth,)),
+        ('sell_quantity', '<i8', (depth,)),
+        ('sell_price', '<i8', (depth,)),
+    ])
+
+
+def record_struct(depth: int) -> struct.Struct:
+    """
+    The record layout as a `struct`, matches `record_dtype`
+    """
+    return struct.Struct('<qIHH{}q'.format(4 * depth))
+
+
+def to_fixed(value, decimals: int) -> int:
+    """
+    :param value: a Decimal or its string
+    """
+    return int(Decimal(value).scaleb(decimals))
+
+
+def from_fixed(value: int, decimals: int) -> Decimal:
+    return Decimal(int(value)).scaleb(-decimals)
+
+
+class IndexBlock(NamedTuple):
+    # Record number of the first record
+    offset: int
+    size: int
+    first_timestamp: int
+    last_timestamp: int
+    instruments: List[int]
+
+
+def index_path(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+
+def _append_line(f: TextIO, document: dict) -> None:
+    # One write per line, so a reader sees whole lines or a
+    # partial last one
+    f.write(json.dumps(document) + '\n')
+    f.flush()
+
+
+def start_index(path: str, settings: dict) -> TextIO:
+    """
+    Creates the index with the file's settings
+
+    :returns: the index, open to `append_index` to
+    """
+    f = open(index_path(path), 'w')
+    _append_line(f, settings)
+    return f
+
+
+def append_index(
+    f: TextIO, block: IndexBlock, new_instruments: Dict[str, int]
+) -> None:
+    """
+    :param new_instruments: ids of the instruments in the block
+        that are not in the index yet
+    """
+    _append_line(f, {
+        'block': list(block),
+        'instruments': new_instruments,
+    })
+
+
+def read_index(path: str) -> dict:
+    """
+    :returns: the file's settings, with `records`, `blocks` and
+        `instruments` (id and the offsets of the blocks it's in)
+    """
+    with open(index_path(path)) as f:
+        lines = f.read().split('\n')
+
+    # The last line is empty, or still being written
+    index = json.loads(lines[0])
+    index.update(records=0, blocks=[], instruments={})
+    by_id: Dict[int, dict] = {}
+    for line in lines[1:-1]:
+        entry = json.loads(line)
+        offset, size, _, _, ids = block = entry['block']
+        for name, id_ in entry['instruments'].items():
+            index['instruments'][name] = by_id[id_] = {
+                'id': id_, 'offsets': []
+            }
+
+        for id_ in ids:
+            by_id[id_]['offsets'].append(offset)
+
+        index['blocks'].append(block)
+        index['records'] = offset + size
+
+    return index
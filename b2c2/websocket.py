@@ -1,86 +1,37 @@
 import websockets
 import asyncio
 import weakref
-import json
-# This is a nice little pattern matching library
-# (I hate if, elif, elif, chains with a passion)
-import pampy
 import logging
+import time
+import uuid
 
-from weakref import WeakKeyDictionary, WeakValueDictionary, WeakSet
+from weakref import WeakValueDictionary
 from collections import defaultdict
 from contextlib import asynccontextmanager
-from typing import Any
+from typing import Optional
 from pydantic import BaseModel
 
 from b2c2.frames import (
     ErrorResponseFrame, TradableInstrumentsFrame, UsernameUpdateFrame,
     # Clean up the names of these frames
     QuoteUnsubscribeFrame, QuoteUnsubscribeResponseFrame,
-    QuoteStreamFrame,
+    QuoteStreamFrame, TrustedQuoteStreamFrame,
     QuoteSubscribeFrame, QuoteSubscribeResponseFrame,
+    ConnectionLostFrame, ConnectionGapFrame,
 )
+from b2c2.exceptions import QuoteException, WebsocketDisconnectedException
+from b2c2.decoding import get_default_decoder
+from b2c2.fanout import Fanout
+from b2c2.router import FrameRouter
+from b2c2.subscription_index import SubscriptionIndex
+from b2c2.instrumentation import ClientMetrics
 
 logger = logging.getLogger(__name__)
 
-
-class Fanout:
-    """
-    This provides fan out functionality so that
-    multiple objects can listen to an async websocket
-    stream
-
-    I don't really know the AsyncIO ecosystem that well
-    and every time I take a look at it I get the sense
-    it's still a bit immature. Something like this, while
-    not in the standard library should have a well known
-    library that does it. But I couldn't work out what to use.
-    """
-
-    def __init__(self, queue):
-        self._queue = queue
-        # Only the subscribing objects should
-        # have a ref to the queue
-        self._fanout_queues = WeakSet()
-        self._fanout_task = None
-
-    @asynccontextmanager
-    async def stream(self):
-        async with self.queue() as queue:
-            # tranforms a queue into an async generator
-            async def _async_gen():
-                while True:
-                    yield await queue.get()  # noqa
-
-            yield _async_gen()
-            del _async_gen
-
-    @asynccontextmanager
-    async def queue(self):
-        if not self._fanout_task:
-            self._fanout_task = (
-                asyncio.create_task(self._fanout_job())
-            )
-
-        queue = asyncio.Queue()
-        self._fanout_queues.add(queue)
-        yield queue
-        del queue
-
-    async def _fanout_job(self):
-        while True:
-            frame = await self._queue.get()
-
-            queue = None
-
-            for queue in self._fanout_queues:
-                queue.put_nowait(frame)
-
-            # Because python is block scoped this
-            # task will keep a reference to the single
-            # queue that existed in the last fanout job
-            # Unless we delete it
-            del queue  # noqa
+# What a request raises when the connection drops under it
+_DISCONNECTED = (
+    WebsocketDisconnectedException, websockets.exceptions.ConnectionClosed,
+)
 
 
 class B2C2WebsocketClient:
@@ -98,98 +49,257 @@ class B2C2WebsocketClient:
         - unsubscribe - request
     """
 
-    # List of rules - paired (not the most readable API, but
-    # it is a lot more readable, testable, and maintainable
-    # than the if else statements).
-    _frame_matching_rules = (
-        # This pair is a matching rule. It will match
-        # all dictionaries where success=False and the
-        # error_code=Any. On match the lambda is called and returned
-        {'success': False, 'error_code': Any},
-        lambda _: ErrorResponseFrame,
+    @asynccontextmanager
+    async def connect(self):
+        async with self._open_websocket() as ws:
+            self._websocket = ws
+            try:
+                yield self
+            finally:
+                self._websocket = None
+
+    def _open_websocket(self):
+        # A new connect object (and request id) per connection
+        return self._transport(
+            self._api_client.env['websocket'],
+            extra_headers=self._api_client._get_headers()
+        )
+
+    async def supervise(
+        self, backoff: float = 0.5, max_backoff: float = 30.0
+    ):
+        """
+        Connects and listens forever.
+
+        When the connection drops it reconnects with exponential
+        backoff, replays every active quote subscription so the
+        existing fanouts carry on receiving, and publishes
+        `ConnectionLostFrame` and `ConnectionGapFrame` events on
+        `connection_events` so consumers know there is a hole in
+        the data.
 
-        # Statements are checked in order (so check for errors first)
-        {'event': 'tradable_instruments'},
-        lambda _: TradableInstrumentsFrame,
+        .. code-block:: python
 
-        {'event': 'tradable_instruments_update'},
-        lambda _: TradableInstrumentsFrame,
+            asyncio.ensure_future(ws_client.supervise())
 
-        {'event': 'username_update'},
-        lambda _: UsernameUpdateFrame,
+            async with ws_client.quote_subscribe(sub) as fanout:
+                ...
 
-        {'event': 'unsubscribe'},
-        lambda _: QuoteUnsubscribeResponseFrame,
+        :param backoff: seconds to wait before the first retry
+        :param max_backoff: the most seconds to wait between retries
+        """
+        attempts = 0
+        disconnected_at = None
+        disconnected_monotonic = 0.0
 
-        {'event': 'price'},
-        lambda _: QuoteStreamFrame,
+        while True:
+            try:
+                async with self.connect():
+                    listener = asyncio.ensure_future(self.listen())
+                    listener.add_done_callback(self._on_listener_done)
 
-        {'event': 'subscribe'},
-        lambda _: QuoteSubscribeResponseFrame,
+                    try:
+                        if disconnected_at is not None:
+                            resubscribed = await self._resubscribe()
+                            await self.connection_events._queue.put(
+                                ConnectionGapFrame(
+                                    disconnected_at=disconnected_at,
+                                    reconnected_at=time.time(),
+                                    downtime=(
+                                        time.monotonic() -
+                                        disconnected_monotonic
+                                    ),
+                                    attempts=attempts,
+                                    resubscribed=resubscribed,
+                                )
+                            )
+                            disconnected_at = None
+
+                        attempts = 0
+                        await listener
+                    finally:
+                        listener.cancel()
+
+            except (
+                websockets.exceptions.ConnectionClosed,
+                websockets.exceptions.InvalidHandshake,
+                OSError, asyncio.TimeoutError,
+                WebsocketDisconnectedException,
+            ) as e:
+                logger.warning('Websocket connection lost', exc_info=e)
+
+                if disconnected_at is None:
+                    disconnected_at = time.time()
+                    disconnected_monotonic = time.monotonic()
+                    await self.connection_events._queue.put(
+                        ConnectionLostFrame(
+                            disconnected_at=disconnected_at,
+                            reason=repr(e),
+                        )
+                    )
+
+            self._websocket = None
+            self._fail_pending_tags()
+            delay = min(max_backoff, backoff * 2 ** attempts)
+            attempts += 1
+            await asyncio.sleep(delay)
+
+    def _on_listener_done(self, listener: asyncio.Future):
+        # Nothing will answer outstanding requests now
+        self._fail_pending_tags()
+
+    def _fail_pending_tags(self):
+        pending, self._pending_tags = self._pending_tags, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(WebsocketDisconnectedException(
+                    'Connection lost waiting for a response', None
+                ))
+
+    async def _resubscribe(self):
+        """
+        Replays the subscriptions of every live fanout.
 
-        # Catch all
-        pampy._, lambda _: None,
-    )
+        :returns: the instruments that were resubscribed
+        """
+        resubscribed = []
+        for req in list(self._active_subscriptions.values()):
+            replay = req.copy(update={'tag': str(uuid.uuid4())})
+            try:
+                await asyncio.wait_for(self._rpc_request(replay), 5)
+            except (QuoteException, asyncio.TimeoutError) as e:
+                logger.error(
+                    'Could not resubscribe to %r', req, exc_info=e
+                )
+            else:
+                resubscribed.append(req.instrument)
 
-    @asynccontextmanager
-    async def connect(self):
-        async with self._websocket_connect as ws:
-            self._websocket = ws
-            yield self
+        return resubscribed
 
     async def stream(self):
+        decode = self._decoder.decode
+        metrics = self.metrics
         while True:
-            # TODO add error handling for when the stream
-            # is not JSON
-            yield json.loads(await self._websocket.recv())
+            message = await self._websocket.recv()
+            if metrics is not None:
+                received = metrics.on_receive()
+            try:
+                frame = decode(message)
+            except ValueError as e:
+                logger.error(
+                    'Could not decode frame %r', message, exc_info=e
+                )
+                continue
+
+            if metrics is not None:
+                metrics.decode_time = time.perf_counter() - received
+
+            yield frame
 
     async def listen(self):
+        router = self._router
+        metrics = self.metrics
         async for frame in self.stream():
-            frame_cls = self._match_frame(frame)
-            if frame_cls:
-                frame = frame_cls(**frame)
-                callback = self._resp_callbacks.get(frame_cls)
-                logger.debug(
-                    'Incoming Frame:\n %r', frame
-                )
+            if metrics is None:
+                await router.dispatch(frame)
+                continue
 
-                await callback(frame)
-            else:
-                logger.error(
-                    'No handler for Frame:\n %r', frame
-                )
+            started = time.perf_counter()
+            await router.dispatch(frame)
+            metrics.on_dispatch(frame, time.perf_counter() - started)
 
     def _match_frame(self, frame):
-        return pampy.match(frame, *self._frame_matching_rules)
+        route = self._router.match(frame)
+        return route.frame_cls if route else None
 
-    def __init__(self, api_client):
-        self._websocket_connect = websockets.connect(
-            api_client.env['websocket'],
-            extra_headers=api_client._get_headers()
+    def _build_router(self) -> FrameRouter:
+        """
+        Override this to handle new event types.
+        """
+        router = FrameRouter()
+        # Errors are checked before the event (they reuse the
+        # event of the request they are responding to)
+        router.set_error_route(ErrorResponseFrame, self._on_tag)
+
+        router.add_route(
+            'tradable_instruments',
+            TradableInstrumentsFrame, self._on_tradable_instrument
         )
+        router.add_route(
+            'tradable_instruments_update',
+            TradableInstrumentsFrame, self._on_tradable_instrument
+        )
+        router.add_route(
+            'username_update',
+            UsernameUpdateFrame, self._on_username_update
+        )
+        router.add_route(
+            'price',
+            TrustedQuoteStreamFrame if self._trusted_stream
+            else QuoteStreamFrame,
+            self._on_quote_price
+        )
+        # These all have tags - and should have corresponding
+        # futures to resolve.
+        router.add_route(
+            'unsubscribe', QuoteUnsubscribeResponseFrame, self._on_tag
+        )
+        router.add_route(
+            'subscribe', QuoteSubscribeResponseFrame, self._on_tag
+        )
+        return router
 
+    def __init__(
+        self, api_client, decoder=None, trusted_stream=False, metrics=False,
+        transport=None
+    ):
+        """
+        :param decoder: a `b2c2.decoding.FrameDecoder`, defaults to
+            the fastest one installed
+        :param trusted_stream: skip validating price frames, they are
+            yielded as `TrustedQuoteStreamFrame` objects that decode
+            their fields when accessed. Every other frame is still
+            validated.
+        :param metrics: collect latency histograms in `metrics`
+            (see `b2c2.instrumentation.ClientMetrics`)
+        :param transport: opens connections, takes the same
+            arguments as (and defaults to) `websockets.connect`. See
+            `b2c2.replay.TickReplay`.
+        """
+        self._api_client = api_client
         self._websocket = None
-
-        self._resp_callbacks = WeakKeyDictionary([
-            (TradableInstrumentsFrame, self._on_tradable_instrument),
-            (UsernameUpdateFrame, self._on_username_update),
-            (QuoteStreamFrame, self._on_quote_price),
-            # These all have tags - and should have corresponding
-            # futures to resolve.
-            (QuoteUnsubscribeResponseFrame, self._on_tag),
-            (QuoteSubscribeResponseFrame, self._on_tag),
-            (ErrorResponseFrame, self._on_tag),
-        ])
+        self._transport = transport or websockets.connect
+        # Decoded frames are handed to the router as they are
+        self._decoder = decoder or get_default_decoder()
+        self._trusted_stream = trusted_stream
+        self._router = self._build_router()
+        self.metrics = ClientMetrics() if metrics else None
 
         self.tradable_instruments = Fanout(asyncio.Queue())
         self.username_updates = Fanout(asyncio.Queue())
+        # Reconnects when using `supervise()`
+        self.connection_events = Fanout(asyncio.Queue())
         self._pending_tags = {}
 
         # Quote subscription stuff
+        # Consumer fanouts by request key
         self._instrument_fanouts = WeakValueDictionary()
+        # Consumer fanouts by instrument, then levels, indexed for
+        # routing price frames
+        self._subscription_index = SubscriptionIndex()
+        # The upstream subscription of each instrument, replayed
+        # after a reconnect
+        self._active_subscriptions = {}
         # Mapping between a instrument and a lock
-        self._instrument_creation_locks = defaultdict(asyncio.Lock)
-        self._instrument_deletion_locks = defaultdict(asyncio.Lock)
+        self._instrument_locks = defaultdict(asyncio.Lock)
+
+    @property
+    def subscribed_instruments(self) -> set:
+        return {req.instrument for req in self._active_subscriptions.values()}
+
+    @property
+    def subscription_count(self) -> int:
+        return len(self._active_subscriptions)
 
     async def _on_tradable_instrument(self, frame: TradableInstrumentsFrame):
         await self.tradable_instruments._queue.put(frame)
@@ -198,15 +308,21 @@ class B2C2WebsocketClient:
         await self.username_updates._queue.put(frame)
 
     async def _on_quote_price(self, frame: QuoteStreamFrame):
-        try:
-            fanout = self._instrument_fanouts[frame._key]
-            await fanout._queue.put(frame)
-        except KeyError as e:
+        route = self._subscription_index.get(frame.instrument)
+        if route is None or not len(route.consumers):
             logger.info(
-                'Quote price returned without open listeners %r %r %r',
-                frame, self._instrument_fanouts.data.keys(), frame._key,
-                exc_info=e
+                'Quote price returned without open listeners %r', frame
             )
+            return
+
+        if self.metrics is not None:
+            # Copies for filtered consumers keep the stamp
+            frame._received_at = self.metrics.received_at
+
+        # Which consumer gets which levels was worked out when they
+        # subscribed (and on the first tick of each quantity layout)
+        for fanout, routed in list(route.targets(frame)):
+            await fanout._queue.put(routed)
 
     async def _on_tag(self, frame):
         # There should be two ways of resolving the
@@ -230,11 +346,16 @@ class B2C2WebsocketClient:
         await self._websocket.send(frame.json())
 
     async def _rpc_request(self, request_frame):
-        # Send request
-        await self._send_frame(request_frame)
         future_resp = asyncio.Future()
-        # Add this to the subscription future registry
+        # Add this to the subscription future registry (before
+        # sending, the response can arrive while we send)
         self._pending_tags[request_frame.tag] = future_resp
+        # Send request
+        try:
+            await self._send_frame(request_frame)
+        except BaseException:
+            self._pending_tags.pop(request_frame.tag, None)
+            raise
         # Wait for it to be resolved by incoming frames
         return await future_resp
 
@@ -245,9 +366,11 @@ class B2C2WebsocketClient:
         an provides a fanout object which streams can be created
         from.
 
-        The complexity of this function stems from the fact I
-        do not know how multiple quote requests are handled by the
-        websocket. Thus the locks and weird GC code.
+        Consumers share one upstream subscription per instrument,
+        covering the union of the levels they asked for. It is
+        widened when a consumer asks for new levels, and narrowed
+        or dropped as consumer fanouts are garbage collected. Each
+        fanout only sees the levels of its request.
 
 
         Example usage:
@@ -260,54 +383,192 @@ class B2C2WebsocketClient:
                     async for price_updates in stream:
                         print(price_updates)
 
-        """
-        # We don't want people making multiple requests
-        # to do the same thing. We need to lock a particular
-        # subscribe request.
+        Consumers that only care about the latest price (GUIs,
+        risk checks) should conflate their stream, so they never
+        have a backlog of stale ticks to work through:
+
+        .. code-block:: python
+
+            async with client.quote_subscribe(quote) as fanout:
+                async with fanout.stream(conflate=True) as stream:
+                    async for latest_price in stream:
+                        print(latest_price)
 
+        """
+        # One upstream subscription per instrument carries the
+        # union of every consumer's levels. Consumers asking for
+        # the same levels share a fanout, others get their own
+        # fanout that only sees their levels.
+        #
         # as a note I made req: QuoteSubscribeFrame hashable
-        request_lock = self._instrument_creation_locks[req._key]
-        deletion_lock = self._instrument_deletion_locks[req._key]
-
-        async def _unsub():
-            # It's probably fine, but I don't want multiple
-            # deletion requests happening at once.
-            if not deletion_lock.locked():
-                async with deletion_lock:
-                    unsub = QuoteUnsubscribeFrame(instrument=req.instrument)
-                    try:
-                        await asyncio.wait_for(
-                            self._rpc_request(unsub), 5
-                        )
-                    except asyncio.TimeoutError as e:
-                        logger.error(
-                            'Could not unsubscribe from quote.',
-                            exc_info=e
+        fanout = self._instrument_fanouts.get(req._key)
+
+        if fanout is None:
+            # Changes to an instrument's upstream subscription
+            # must not overlap.
+            async with self._instrument_locks[req.instrument]:
+                # It might have been created while we waited
+                fanout = self._instrument_fanouts.get(req._key)
+
+                if fanout is None:
+                    await self._sync_upstream(req)
+
+                    fanout = Fanout(asyncio.Queue())
+                    if self.metrics is not None:
+                        fanout.on_deliver = self.metrics.delivery_observer(
+                            req.instrument,
+                            ','.join(str(level) for level in req._key[0])
                         )
+                    self._instrument_fanouts[req._key] = fanout
+                    self._subscription_index.route(req.instrument).add(
+                        req._key[0], fanout
+                    )
+                    # Because we can yield the same object multiple
+                    # times we should only cleanup when the object
+                    # is deferenced and GD'd
+                    weakref.finalize(
+                        fanout, self._on_fanout_gc, req.instrument
+                    )
+
+        yield fanout
+
+    def _on_fanout_gc(self, instrument: str):
+        # Called when a consumer fanout is garbage collected
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            # No loop in this thread (at interpreter exit)
+            return
 
-        def _gc_fanout():
-            # Called when the object is garbage collected
-            asyncio.ensure_future(_unsub())
-
-        if request_lock.locked():
-            # something else is trying to subscribe
-            await request_lock.acquire()
-            # Let us wait until that's complete
-            request_lock.release()
-
-        # Return the fanout if it already exists
-        if req._key in self._instrument_fanouts:
-            # If it already exists it means there should
-            # a reference to it (and will still be in our WeakRefs)
-            yield self._instrument_fanouts[req._key]
-
-        else:  # We need to create it
-            async with request_lock:
-                await self._rpc_request(req)
-
-            # Because we can yield the same object multiple
-            # times we should only cleanup when the object
-            # is deferenced and GD'd
-            fanout = self._instrument_fanouts[req._key] = Fanout(asyncio.Queue())  # noqa
-            weakref.finalize(fanout, _gc_fanout)
-            yield self._instrument_fanouts[req._key]
+        if not loop.is_closed():
+            loop.create_task(self._shrink_upstream(instrument))
+
+    async def _sync_upstream(self, req: QuoteSubscribeFrame):
+        """
+        Widens the upstream subscription so it covers every live
+        consumer and the request. Must hold the instrument lock.
+        """
+        instrument = req.instrument
+        wanted = self._subscription_index.wanted_levels(instrument)
+        wanted.update(req._key[0])
+        current = self._active_subscriptions.get(instrument)
+
+        if current and wanted.issubset(current._key[0]):
+            return
+
+        await self._replace_upstream(instrument, wanted, req)
+
+    async def _shrink_upstream(self, instrument: str):
+        async with self._instrument_locks[instrument]:
+            self._subscription_index.prune(instrument)
+            wanted = self._subscription_index.wanted_levels(instrument)
+            current = self._active_subscriptions.get(instrument)
+
+            if current is None or wanted == set(current._key[0]):
+                return
+
+            if self._websocket is None:
+                # Not connected, a reconnect subscribes to what is
+                # left
+                self._set_upstream(instrument, QuoteSubscribeFrame(
+                    instrument=instrument, levels=sorted(wanted)
+                ) if wanted else None)
+                return
+
+            try:
+                await asyncio.wait_for(
+                    self._replace_upstream(instrument, wanted), 5
+                )
+            except (asyncio.TimeoutError, *_DISCONNECTED) as e:
+                # A reconnect subscribes to what is left
+                logger.error(
+                    'Could not unsubscribe from quote.',
+                    exc_info=e
+                )
+
+    async def _replace_upstream(
+        self, instrument: str, levels: set,
+        req: Optional[QuoteSubscribeFrame] = None
+    ):
+        """
+        Swaps the upstream subscription for one with these levels
+        (none unsubscribes). The server takes one subscription per
+        instrument, so this unsubscribes first: existing consumers
+        miss the ticks in between.
+
+        :param req: the consumer request that triggered this, sent
+            as is when it asks for exactly these levels
+
+        If the connection drops during the swap, a reconnect (see
+        `supervise`) subscribes to the new levels.
+        """
+        current = self._active_subscriptions.get(instrument)
+        if not levels:
+            target = None
+        elif req is not None and set(req._key[0]) == levels:
+            target = req
+        else:
+            target = QuoteSubscribeFrame(
+                instrument=instrument, levels=sorted(levels)
+            )
+
+        # Frames are filtered until the new subscription is
+        # acknowledged, but it's what `_resubscribe` replays
+        self._set_upstream(instrument, None)
+        self._set_target(instrument, target)
+
+        try:
+            if current:
+                await self._rpc_request(
+                    QuoteUnsubscribeFrame(instrument=instrument)
+                )
+
+            if target is None:
+                return
+
+            try:
+                await self._rpc_request(target)
+            except QuoteException:
+                self._set_target(instrument, current)
+                if current:
+                    # Put back what the existing consumers had
+                    await self._rpc_request(
+                        current.copy(update={'tag': str(uuid.uuid4())})
+                    )
+                    self._set_upstream(instrument, current)
+                raise
+        except _DISCONNECTED:
+            # Frames only arrive again once a reconnect has
+            # subscribed to the target
+            self._set_upstream(
+                instrument, self._active_subscriptions.get(instrument)
+            )
+            raise
+
+        self._set_upstream(instrument, target)
+
+    def _set_target(
+        self, instrument: str, req: Optional[QuoteSubscribeFrame]
+    ):
+        # What a reconnect subscribes to, without routing frames
+        # as if the server had acknowledged it
+        if req is None:
+            self._active_subscriptions.pop(instrument, None)
+        else:
+            self._active_subscriptions[instrument] = req
+
+    def _set_upstream(
+        self, instrument: str, req: Optional[QuoteSubscribeFrame]
+    ):
+        # Consumers asking for exactly the upstream levels are
+        # routed frames without filtering
+        if req is None:
+            self._active_subscriptions.pop(instrument, None)
+            route = self._subscription_index.get(instrument)
+            if route is not None:
+                route.set_upstream(())
+        else:
+            self._active_subscriptions[instrument] = req
+            self._subscription_index.route(instrument).set_upstream(
+                req._key[0]
+            )
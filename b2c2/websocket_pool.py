@@ -0,0 +1,227 @@
+import asyncio
+import zlib
+
+from collections import Counter, deque
+
+from enum import Enum
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import Any, Deque, Dict, List, Optional
+
+from b2c2.fanout import Fanout
+from b2c2.frames import QuoteSubscribeFrame
+from b2c2.websocket import B2C2WebsocketClient
+
+
+class ShardingStrategy(str, Enum):
+    # The same instrument always goes to the same connection
+    hash = 'hash'
+    # New instruments go to the connection with the fewest
+    # subscriptions
+    least_loaded = 'least_loaded'
+
+
+class _ChangeLog:
+    """
+    Every connection reports the same changes (e.g. to the
+    tradable instruments), each one is published once.
+
+    A report that's already in the log after the connection's
+    previous report is that connection catching up, so a
+    connection that's behind can't republish an older state. Nor
+    can a connection repeating the latest state, e.g. after it
+    reconnects.
+    """
+    # Enough for a connection that's a few changes behind
+    _max_changes = 32
+
+    def __init__(self):
+        self._changes: Deque[Any] = deque(maxlen=self._max_changes)
+        # Position of the next change
+        self._next = 0
+        # Position after each connection's last report, by source
+        self._positions: Dict[int, int] = {}
+
+    def is_new(self, source, content) -> bool:
+        key = id(source)
+        first = self._next - len(self._changes)
+        if self._changes and self._changes[-1] == content:
+            self._positions[key] = self._next
+            return False
+
+        for position in range(
+            max(self._positions.get(key, first), first), self._next
+        ):
+            if self._changes[position - first] == content:
+                self._positions[key] = position + 1
+                return False
+
+        self._changes.append(content)
+        self._next += 1
+        self._positions[key] = self._next
+        return True
+
+
+class B2C2WebsocketPool:
+    """
+    Spreads quote subscriptions over several websocket
+    connections, each with its own listener task.
+
+    It has the same API as `B2C2WebsocketClient`:
+
+    .. code-block:: python
+
+        pool = B2C2WebsocketPool(api_client, connections=4)
+
+        async with pool.connect():
+            asyncio.ensure_future(pool.listen())
+            async with pool.quote_subscribe(sub) as fanout:
+                ...
+
+    An instrument stays on one connection while it has live
+    subscriptions (unsubscribing is per instrument).
+    `tradable_instruments` and `username_updates` merge the
+    frames of every connection, skipping duplicates.
+    """
+
+    def __init__(
+        self, api_client, connections: int = 4,
+        strategy: ShardingStrategy = ShardingStrategy.hash,
+        **client_kwargs
+    ):
+        """
+        :param connections: the number of websocket connections
+        :param strategy: how instruments are assigned a connection
+        :param client_kwargs: passed to each `B2C2WebsocketClient`
+        """
+        self.clients: List[B2C2WebsocketClient] = [
+            self._create_client(api_client, **client_kwargs)
+            for _ in range(connections)
+        ]
+        self._strategy = ShardingStrategy(strategy)
+        self._instrument_clients: Dict[str, B2C2WebsocketClient] = {}
+        # Open quote_subscribe contexts per instrument
+        self._instrument_users: Counter = Counter()
+
+        self.tradable_instruments = Fanout(asyncio.Queue())
+        self.username_updates = Fanout(asyncio.Queue())
+        self.connection_events = Fanout(asyncio.Queue())
+        self._forwarding_tasks: List[asyncio.Task] = []
+
+    def _create_client(self, api_client, **kwargs) -> B2C2WebsocketClient:
+        return B2C2WebsocketClient(api_client, **kwargs)
+
+    @asynccontextmanager
+    async def connect(self):
+        async with AsyncExitStack() as stack:
+            for client in self.clients:
+                await stack.enter_async_context(client.connect())
+
+            self._start_forwarding()
+            try:
+                yield self
+            finally:
+                self._stop_forwarding()
+
+    async def listen(self):
+        await asyncio.gather(*(
+            client.listen() for client in self.clients
+        ))
+
+    async def supervise(self, **kwargs):
+        """
+        Supervises every connection, see
+        `B2C2WebsocketClient.supervise`
+        """
+        self._start_forwarding()
+        try:
+            await asyncio.gather(*(
+                client.supervise(**kwargs) for client in self.clients
+            ))
+        finally:
+            self._stop_forwarding()
+
+    @property
+    def instrument_fanouts(self) -> dict:
+        """
+        The live quote fanouts of every connection
+        """
+        fanouts = {}
+        for client in self.clients:
+            fanouts.update(client._instrument_fanouts.items())
+
+        return fanouts
+
+    def client_for(self, instrument: str) -> B2C2WebsocketClient:
+        """
+        :returns: the connection that serves (or would serve)
+            the instrument
+        """
+        client = self._instrument_clients.get(instrument)
+        in_use = (
+            self._instrument_users[instrument] or
+            client and instrument in client.subscribed_instruments
+        )
+
+        if client is None or not in_use:
+            if self._strategy is ShardingStrategy.hash:
+                # Stable across processes, unlike hash()
+                index = zlib.crc32(instrument.encode()) % len(self.clients)
+                client = self.clients[index]
+            else:
+                client = min(
+                    self.clients, key=lambda c: c.subscription_count
+                )
+
+            self._instrument_clients[instrument] = client
+
+        return client
+
+    @asynccontextmanager
+    async def quote_subscribe(self, req: QuoteSubscribeFrame):
+        client = self.client_for(req.instrument)
+        self._instrument_users[req.instrument] += 1
+        try:
+            async with client.quote_subscribe(req) as fanout:
+                yield fanout
+        finally:
+            self._instrument_users[req.instrument] -= 1
+
+    def _start_forwarding(self):
+        if self._forwarding_tasks:
+            return
+
+        for attr in (
+            'tradable_instruments', 'username_updates', 'connection_events'
+        ):
+            # Every connection reports these, only forward changes
+            changes = (
+                _ChangeLog() if attr != 'connection_events' else None
+            )
+            for client in self.clients:
+                self._forwarding_tasks.append(asyncio.ensure_future(
+                    self._forward(
+                        getattr(client, attr), getattr(self, attr),
+                        changes
+                    )
+                ))
+
+    def _stop_forwarding(self):
+        tasks, self._forwarding_tasks = self._forwarding_tasks, []
+        for task in tasks:
+            task.cancel()
+
+    @staticmethod
+    async def _forward(
+        source: Fanout, target: Fanout, changes: Optional[_ChangeLog]
+    ):
+        async with source.stream() as stream:
+            async for frame in stream:
+                if changes is not None:
+                    content = frame.dict()
+                    # Without the event, so a tradable_instruments
+                    # and its update with the same list are the same
+                    content.pop('event', None)
+                    if not changes.is_new(source, content):
+                        continue
+
+                await target._queue.put(frame)
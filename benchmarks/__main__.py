@@ -0,0 +1,192 @@
+"""
+Runs the benchmarks and keeps their results as JSON, so they
+can be compared across commits.
+
+    $ python -m benchmarks                  # everything
+    $ python -m benchmarks frames fanout    # just these
+    $ python -m benchmarks --save-baseline  # the new reference
+
+Results are written to ``benchmarks/results/<commit>.json``
+(``latest.json`` too) and compared with
+``benchmarks/results/baseline.json``: anything more than
+``--threshold`` slower than the baseline is flagged as a
+regression, and ``--fail-on-regression`` turns that into a
+non-zero exit code for CI.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from typing import Dict, List, Optional
+
+from benchmarks._harness import report
+
+
+BENCHMARKS = [
+    'frames', 'router', 'decode', 'fanout', 'replay', 'models', 'gui',
+    'rest', 'endpoints', 'codecs',
+]
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+BASELINE = os.path.join(RESULTS_DIR, 'baseline.json')
+
+
+def _git(*args) -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ('git',) + args, stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(__file__),
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict:
+    return {
+        'commit': _git('rev-parse', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'created': int(time.time()),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def run(names: List[str]) -> Dict[str, List[Dict]]:
+    # Imported up front, `b2c2.views` wants an event loop at import
+    # time and the async benchmarks leave none behind
+    modules = {
+        name: importlib.import_module('benchmarks.bench_' + name)
+        for name in names
+    }
+
+    results = {}
+    for name, module in modules.items():
+        print('# {}'.format(name))
+        results[name] = module.run()  # type: ignore
+        report(results[name])
+        print()
+
+    return results
+
+
+def compare(
+    results: Dict[str, List[Dict]], baseline: Dict, threshold: float
+) -> List[Dict]:
+    """
+    :returns: the results that are more than `threshold` slower
+        than the baseline, with their ratio
+    """
+    previous = {
+        result['name']: result
+        for group in baseline['results'].values() for result in group
+    }
+
+    regressions = []
+    width = max(
+        len(result['name'])
+        for group in results.values() for result in group
+    )
+    for group in results.values():
+        for result in group:
+            before = previous.get(result['name'])
+            if before is None:
+                continue
+
+            # Above 1 is slower
+            ratio = result['seconds_per_op'] / before['seconds_per_op']
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                regressions.append({**result, 'ratio': ratio})
+            elif ratio < 1 - threshold:
+                flag = '  faster'
+
+            print('{name:<{width}}  {ratio:>6.2f}x{flag}'.format(
+                name=result['name'], width=width, ratio=ratio, flag=flag
+            ))
+
+    return regressions
+
+
+def _write(path: str, document: Dict) -> None:
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks', description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        'benchmarks', nargs='*', metavar='benchmark',
+        help='any of {}, defaults to all of them'.format(
+            ', '.join(BENCHMARKS)
+        ),
+    )
+    parser.add_argument('--output', default=RESULTS_DIR)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help='make these results the baseline',
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='slowdown flagged as a regression (default 0.2, i.e. 20%%)',
+    )
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(
+            'unknown benchmark {}'.format(', '.join(sorted(unknown)))
+        )
+
+    names = args.benchmarks or BENCHMARKS
+    document = {
+        'environment': environment(),
+        'results': run(names),
+    }
+
+    os.makedirs(args.output, exist_ok=True)
+    commit = document['environment']['commit'] or 'unknown'
+    path = os.path.join(args.output, '{}.json'.format(commit[:12]))
+    _write(path, document)
+    _write(os.path.join(args.output, 'latest.json'), document)
+    print('Results written to {}'.format(path))
+
+    if args.save_baseline:
+        _write(args.baseline, document)
+        print('Baseline saved to {}'.format(args.baseline))
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print('No baseline to compare with, see --save-baseline')
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    print('\n# Compared with {}'.format(
+        baseline['environment'].get('commit') or args.baseline
+    ))
+    regressions = compare(document['results'], baseline, args.threshold)
+    if regressions:
+        print('\n{} regression(s)'.format(len(regressions)))
+        if args.fail_on_regression:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Synthetic websocket traffic shaped like the frames we record
+from UAT.
+"""
+import random
+
+from typing import List
+
+
+INSTRUMENTS = [
+    'BTCUSD.SPOT', 'ETHUSD.SPOT', 'LTCUSD.SPOT', 'XRPUSD.SPOT',
+    'BTCEUR.SPOT', 'ETHEUR.SPOT', 'BTCGBP.SPOT', 'ETHBTC.SPOT',
+]
+
+
+def price_frame(
+    instrument: str = 'BTCUSD.SPOT', levels=(1, 3, 5),
+    mid: float = 8940.0, timestamp: int = 1516288053582
+) -> dict:
+    buy = []
+    sell = []
+    for i, quantity in enumerate(levels):
+        buy.append({
+            'quantity': str(quantity),
+            'price': '{:.1f}'.format(mid + 2.5 * (i + 1)),
+        })
+        sell.append({
+            'quantity': str(quantity),
+            'price': '{:.1f}'.format(mid - 2.5 * (i + 1)),
+        })
+
+    return {
+        'levels': {'buy': buy, 'sell': sell},
+        'success': True,
+        'event': 'price',
+        'instrument': instrument,
+        'timestamp': timestamp,
+    }
+
+
+def price_frames(n: int, levels=(1, 3, 5), seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    mid = 8940.0
+    frames = []
+    for i in range(n):
+        mid += rng.uniform(-1, 1)
+        frames.append(price_frame(
+            rng.choice(INSTRUMENTS), levels, mid, 1516288053582 + i
+        ))
+
+    return frames
+
+
+def mixed_frames(n: int, seed: int = 0) -> List[dict]:
+    """
+    Mostly price frames with the occasional control frame,
+    roughly the mix a busy listener sees.
+    """
+    rng = random.Random(seed)
+    control = [
+        {
+            'event': 'tradable_instruments_update',
+            'tradable_instruments': INSTRUMENTS,
+            'success': True,
+        },
+        {
+            'event': 'subscribe',
+            'instrument': 'BTCUSD.SPOT',
+            'levels': [1, 3],
+            'tag': '8c14906f-4244-4b51-86bc-553711167960',
+            'success': True,
+        },
+        {
+            'event': 'subscribe',
+            'success': False,
+            'tag': '8c14906f-4244-4b51-86bc-553711167960',
+            'error_code': 3004,
+            'error_message': 'Invalid subscription request.',
+            'errors': {'instrument': ['Must be uppercase.']},
+        },
+    ]
+    frames = price_frames(n, seed=seed)
+    for i in range(0, n, 50):
+        frames[i] = rng.choice(control)
+
+    return frames
@@ -0,0 +1,40 @@
+"""
+Tiny timing helpers shared by the benchmark scripts.
+
+Each benchmark module exposes a ``run()`` function that returns
+a list of results, and can be run on its own:
+
+    $ python -m benchmarks.bench_router
+
+"""
+import timeit
+
+from typing import Callable, Dict, List
+
+
+def measure(
+    name: str, func: Callable[[], object], number: int, repeat: int = 5,
+    ops_per_call: int = 1
+) -> Dict:
+    """
+    Times ``func`` and returns the best run (the least
+    disturbed by the rest of the machine).
+    """
+    timer = timeit.Timer(func)
+    best = min(timer.repeat(repeat=repeat, number=number))
+    ops = number * ops_per_call
+    return {
+        'name': name,
+        'seconds_per_op': best / ops,
+        'ops_per_second': ops / best,
+    }
+
+
+def report(results: List[Dict]) -> None:
+    width = max(len(r['name']) for r in results)
+    for result in results:
+        print('{name:<{width}}  {us:>10.3f} us/op  {ops:>14,.0f} ops/s'.format(
+            name=result['name'], width=width,
+            us=result['seconds_per_op'] * 1e6,
+            ops=result['ops_per_second'],
+        ))
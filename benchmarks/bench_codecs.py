@@ -0,0 +1,68 @@
+"""
+(De)serialization of the RFQ and trade models: pydantic against
+the compiled encoders and decoders of `b2c2.codecs`.
+
+    $ python -m benchmarks.bench_codecs
+
+"""
+import json
+
+from decimal import Decimal
+from typing import Callable, List, Tuple, Type
+
+from pydantic import BaseModel
+
+from b2c2 import codecs
+from b2c2.mock_server import MockExchange
+from b2c2.models import (
+    Quote, RequestForQuote, SideEnum, Trade, TradeResponse
+)
+from benchmarks._harness import measure, report
+
+
+def run(number: int = 5000, repeat: int = 3):
+    exchange = MockExchange(seed=0)
+    rfq = RequestForQuote(
+        quantity=Decimal(1), side=SideEnum.buy, instrument='BTCUSD.SPOT'
+    )
+    quote = exchange.request_for_quote(rfq)
+    trade = quote.get_trade()
+    trade_response = exchange.trade(trade)
+
+    bodies: List[Tuple[Type[BaseModel], BaseModel]] = [
+        (RequestForQuote, rfq), (Trade, trade)
+    ]
+    responses: List[Tuple[Type[BaseModel], BaseModel]] = [
+        (Quote, quote), (TradeResponse, trade_response)
+    ]
+
+    results = []
+    for model, instance in bodies:
+        encoders: List[Tuple[str, Callable]] = [
+            ('pydantic', model.json),
+            ('compiled', codecs.get_encoder(model)),
+        ]
+        for kind, encode in encoders:
+            results.append(measure(
+                'codecs/encode/{}/{}'.format(kind, model.__name__),
+                lambda: encode(instance), number, repeat=repeat,
+            ))
+
+    for model, instance in responses:
+        # As the client gets it from the response
+        raw = json.loads(instance.json())
+        decoders: List[Tuple[str, Callable]] = [
+            ('pydantic', model.parse_obj),
+            ('compiled', codecs.get_decoder(model)),
+        ]
+        for kind, decode in decoders:
+            results.append(measure(
+                'codecs/decode/{}/{}'.format(kind, model.__name__),
+                lambda: decode(raw), number, repeat=repeat,
+            ))
+
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,62 @@
+"""
+Per-frame cost of decoding recorded price frames, on their own
+and followed by frame construction.
+
+    $ python -m benchmarks.bench_decode
+
+"""
+import json
+
+from typing import List
+
+from b2c2.decoding import (
+    FrameDecoder, StdlibFrameDecoder, OrjsonFrameDecoder, orjson
+)
+from b2c2.frames import QuoteStreamFrame, TrustedQuoteStreamFrame
+from benchmarks._frames import price_frames
+from benchmarks._harness import measure, report
+
+
+def run(n_frames: int = 10000):
+    frames = price_frames(n_frames)
+    text = [json.dumps(frame) for frame in frames]
+    binary = [message.encode() for message in text]
+
+    decoders: List[FrameDecoder] = [StdlibFrameDecoder()]
+    if orjson is not None:
+        decoders.append(OrjsonFrameDecoder())
+
+    results = []
+    for decoder in decoders:
+        decode = decoder.decode
+        for kind, messages in (('str', text), ('bytes', binary)):
+            def _decode(messages=messages, decode=decode):
+                for message in messages:
+                    decode(message)
+
+            def _decode_parse(messages=messages, decode=decode):
+                for message in messages:
+                    QuoteStreamFrame.parse_obj(decode(message))
+
+            def _decode_trusted(messages=messages, decode=decode):
+                for message in messages:
+                    TrustedQuoteStreamFrame.parse_obj(decode(message))._key
+
+            results.append(measure(
+                'decode/{}/{}'.format(decoder.name, kind), _decode, 1,
+                ops_per_call=n_frames
+            ))
+            results.append(measure(
+                'decode+parse/{}/{}'.format(decoder.name, kind),
+                _decode_parse, 1, ops_per_call=n_frames
+            ))
+            results.append(measure(
+                'decode+trusted/{}/{}'.format(decoder.name, kind),
+                _decode_trusted, 1, ops_per_call=n_frames
+            ))
+
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
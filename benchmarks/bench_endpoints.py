@@ -0,0 +1,149 @@
+"""
+Per-request overhead of the REST client: the compiled endpoints
+(`b2c2.open_api_client.Endpoint`) against the request path they
+replaced, which worked out the URL, headers, serializer and parser
+on every call.
+
+Requests are timed twice: against the local mock server, and with
+the network replaced by a canned response so only the client's own
+work is left.
+
+    $ python -m benchmarks.bench_endpoints
+
+"""
+import io
+import warnings
+
+from decimal import Decimal
+from typing import Optional
+from urllib.parse import urljoin
+from pydantic import BaseModel
+from urllib3 import HTTPResponse
+
+from b2c2 import __version__
+from b2c2.client import BaseB2C2APIClient, B2C2AuthAdapter
+from b2c2.mock_server import MockExchange, MockRESTServer
+from b2c2.models import Balances, Quote, RequestForQuote, SideEnum
+from benchmarks._harness import measure, report
+
+
+class _Client(BaseB2C2APIClient):
+    # Nothing cached, every call is a request
+    class Meta:
+        definition = {
+            '/balance/': {'GET': {'response': Balances}},
+            '/request_for_quote/': {
+                'POST': {'body': RequestForQuote, 'response': Quote}
+            },
+        }
+
+
+class _LegacyClient(_Client):
+    """
+    The request path before endpoints were compiled
+    """
+
+    def _get_headers(self):
+        return {
+            'User-Agent': f'RolloB2C2Client/{__version__}',
+            'X-Request-ID': self._get_request_id(),
+            'Authorization': f'Token {self._api_key}'
+        }
+
+    def _send_request(self, endpoint, body=None):
+        rule = endpoint.rule
+        if isinstance(body, BaseModel):
+            response = self._session.request(
+                rule.method,
+                urljoin(self._base_url, rule.api_path),
+                headers={'Content-type': 'application/json'},
+                data=body.json(),
+            )
+        else:
+            response = self._session.request(
+                rule.method,
+                urljoin(self._base_url, rule.api_path),
+                data=body,
+            )
+
+        if issubclass(rule.response, BaseModel):
+            response_body = response.json()
+            response_wrapped = rule.response.parse_obj(response_body)
+            response_wrapped._client = self
+        else:
+            response_wrapped = rule.response(response.text)
+
+        return response_wrapped
+
+
+class _CannedAdapter(B2C2AuthAdapter):
+    """
+    Answers every request with the same response, without a
+    connection
+    """
+
+    def __init__(self, client, body: bytes):
+        super().__init__(client)
+        self._body = body
+
+    def get_connection(self, url, proxies=None):
+        return self
+
+    def urlopen(self, method, url, **kwargs):
+        return HTTPResponse(
+            body=io.BytesIO(self._body), status=200,
+            headers={'Content-Type': 'application/json'},
+            preload_content=False,
+        )
+
+
+def _clients(url: str, canned: Optional[bytes] = None):
+    clients = []
+    for cls in (_LegacyClient, _Client):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            # The legacy client read the environment on every
+            # request
+            client = cls(
+                {'rest_api': url}, api_key='benchmark',
+                pin_environment=cls is _Client,
+            )
+
+        if canned is not None:
+            adapter = _CannedAdapter(client, canned)
+            client._session.mount('http://', adapter)
+
+        clients.append(client)
+
+    return clients
+
+
+def run(number: int = 200, repeat: int = 3):
+    rfq = RequestForQuote(
+        quantity=Decimal(1), side=SideEnum.buy, instrument='BTCUSD.SPOT'
+    )
+    exchange = MockExchange(seed=0)
+    quote = exchange.request_for_quote(rfq).json().encode()
+
+    results = []
+    with MockRESTServer(exchange) as server:
+        for transport, canned in (('server', None), ('canned', quote)):
+            for client in _clients(server.url, canned):
+                kind = (
+                    'legacy' if isinstance(client, _LegacyClient)
+                    else 'compiled'
+                )
+                results.append(measure(
+                    'endpoints/{}/{}/request_for_quote'.format(
+                        transport, kind
+                    ),
+                    lambda: client.post_request_for_quote(rfq),
+                    number if transport == 'server' else number * 10,
+                    repeat=repeat,
+                ))
+
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
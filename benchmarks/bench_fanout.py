@@ -0,0 +1,82 @@
+"""
+Fanout throughput against the number of subscribers, for the
+per-subscriber queue `Fanout` and the shared ring `RingFanout`.
+
+    $ python -m benchmarks.bench_fanout
+
+"""
+import asyncio
+import time
+
+from b2c2.exceptions import FanoutOverrunException
+from b2c2.fanout import Fanout, RingFanout
+from benchmarks._harness import report
+
+
+async def _consume(queue, n_frames):
+    received = 0
+    while received < n_frames:
+        try:
+            await queue.get()
+            received += 1
+        except FanoutOverrunException as e:
+            received += e.missed
+
+
+async def _publish(fanout_cls, n_subscribers, n_frames, burst):
+    fanout = fanout_cls(asyncio.Queue())
+    contexts = [fanout.queue() for _ in range(n_subscribers)]
+    queues = [await context.__aenter__() for context in contexts]
+    consumers = [
+        asyncio.ensure_future(_consume(queue, n_frames)) for queue in queues
+    ]
+
+    start = time.perf_counter()
+    for i in range(0, n_frames, burst):
+        for frame in range(i, i + burst):
+            fanout._queue.put_nowait(frame)
+        # A burst of ticks, then let everyone catch up
+        await asyncio.sleep(0)
+
+    await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - start
+
+    for context in contexts:
+        await context.__aexit__(None, None, None)
+    fanout._fanout_task.cancel()
+
+    return elapsed
+
+
+def run(
+    subscriber_counts=(1, 10, 100, 500), n_frames: int = 2000,
+    burst: int = 10, repeat: int = 3
+):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    results = []
+    try:
+        for n_subscribers in subscriber_counts:
+            for fanout_cls in (Fanout, RingFanout):
+                best = min(
+                    loop.run_until_complete(_publish(
+                        fanout_cls, n_subscribers, n_frames, burst
+                    )) for _ in range(repeat)
+                )
+                results.append({
+                    'name': 'fanout/{}/{}'.format(
+                        fanout_cls.__name__, n_subscribers
+                    ),
+                    'seconds_per_op': best / n_frames,
+                    'ops_per_second': n_frames / best,
+                })
+    finally:
+        loop.close()
+        asyncio.set_event_loop(None)
+
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
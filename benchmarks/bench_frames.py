@@ -0,0 +1,101 @@
+"""
+Per-frame cost of routing a decoded frame to its frame class
+(`B2C2WebsocketClient._match_frame`) and building it, for each
+event type the server sends.
+
+    $ python -m benchmarks.bench_frames
+
+"""
+import asyncio
+
+from b2c2.websocket import B2C2WebsocketClient
+from benchmarks._frames import INSTRUMENTS, price_frame
+from benchmarks._harness import measure, report
+
+
+EVENTS = {
+    'price/1': price_frame(levels=(1,)),
+    'price/3': price_frame(levels=(1, 3, 5)),
+    'price/10': price_frame(levels=tuple(range(1, 11))),
+    'tradable_instruments': {
+        'event': 'tradable_instruments',
+        'tradable_instruments': INSTRUMENTS,
+        'success': True,
+    },
+    'tradable_instruments_update': {
+        'event': 'tradable_instruments_update',
+        'tradable_instruments': INSTRUMENTS[:4],
+        'success': True,
+    },
+    'username_update': {
+        'event': 'username_update',
+        'old_username': 'rollo',
+        'new_username': 'rollo.b2c2',
+        'success': True,
+    },
+    'subscribe': {
+        'event': 'subscribe',
+        'instrument': 'BTCUSD.SPOT',
+        'levels': [1, 3],
+        'tag': '8c14906f-4244-4b51-86bc-553711167960',
+        'success': True,
+    },
+    'unsubscribe': {
+        'event': 'unsubscribe',
+        'instrument': 'BTCUSD.SPOT',
+        'tag': '8c14906f-4244-4b51-86bc-553711167960',
+        'success': True,
+    },
+    'error': {
+        'event': 'subscribe',
+        'success': False,
+        'tag': '8c14906f-4244-4b51-86bc-553711167960',
+        'error_code': 3004,
+        'error_message': 'Invalid subscription request.',
+        'errors': {'instrument': ['Must be uppercase.']},
+    },
+}
+
+
+def _client(trusted: bool) -> B2C2WebsocketClient:
+    # The client's queues want an event loop, nothing runs on it
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return B2C2WebsocketClient(None, trusted_stream=trusted)
+    finally:
+        loop.close()
+        asyncio.set_event_loop(None)
+
+
+def run(number: int = 2000):
+    results = []
+    for trusted in (False, True):
+        client = _client(trusted)
+        match_frame = client._match_frame
+        mode = 'trusted' if trusted else 'validated'
+
+        for event, frame in EVENTS.items():
+            # Only price frames differ between the two modes
+            if trusted and not event.startswith('price'):
+                continue
+
+            def _match(frame=frame):
+                match_frame(frame)
+
+            def _match_build(frame=frame):
+                match_frame(frame).parse_obj(frame)
+
+            results.append(measure(
+                'frames/match/{}/{}'.format(mode, event), _match, number
+            ))
+            results.append(measure(
+                'frames/match+build/{}/{}'.format(mode, event),
+                _match_build, number
+            ))
+
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
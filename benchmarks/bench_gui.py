@@ -0,0 +1,91 @@
+"""
+How long `HistoryView` takes to rebuild its tables (it renders
+the whole history after every trade or quote) at 1k and 10k
+rows.
+
+    $ python -m benchmarks.bench_gui
+
+"""
+import asyncio
+import ipywidgets as widgets
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from b2c2.client import History
+from b2c2.models import Quote, SideEnum
+from b2c2.views.history import HistoryView
+from benchmarks._harness import measure, report
+from benchmarks.bench_models import trades
+
+
+def quotes(n: int):
+    created = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return [
+        Quote(
+            valid_until=created + timedelta(seconds=10),
+            rfq_id=str(i),
+            client_rfq_id=str(i),
+            quantity=Decimal(i % 100 + 1) / 10,
+            side=SideEnum.buy if i % 2 else SideEnum.sell,
+            instrument='BTCUSD.SPOT',
+            price=Decimal('8940.5'),
+            created=created,
+        )
+        for i in range(n)
+    ]
+
+
+class _Client:
+    """
+    Just the history, the views are rendered without a loop
+    """
+
+    def __init__(self, n_rows: int):
+        self.history = History()
+        self.history.completed_trades = trades(n_rows)
+        self.history.quotes = quotes(n_rows)
+
+
+def _view(n_rows: int) -> HistoryView:
+    # Bound like `B2C2APIClient.gui.history`, but without
+    # starting the watchers
+    class View(HistoryView):
+        _client = _Client(n_rows)  # type: ignore
+
+        def __init__(self):
+            self.trade_view = widgets.Box()
+            self.quote_view = widgets.Box()
+
+        def __del__(self):
+            pass
+
+    return View()
+
+
+def run(sizes=(1000, 10000), repeat: int = 3):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    results = []
+    try:
+        for n_rows in sizes:
+            view = _view(n_rows)
+
+            results.append(measure(
+                'gui/history/trades/{}'.format(n_rows),
+                view._update_trade_view, 1, repeat=repeat
+            ))
+            results.append(measure(
+                'gui/history/quotes/{}'.format(n_rows),
+                view._update_quote_view, 1, repeat=repeat
+            ))
+    finally:
+        loop.close()
+        asyncio.set_event_loop(None)
+
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
@@ -0,0 +1,60 @@
+"""
+Cost of folding long trade sequences into a balance with
+`Balances.__add__`, as the GUI does after every trade.
+
+    $ python -m benchmarks.bench_models
+
+"""
+import random
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import reduce
+from operator import add
+
+from b2c2.models import Balances, SideEnum, TradeResponse
+from benchmarks._harness import measure, report
+
+
+def trades(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    created = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return [
+        TradeResponse(
+            created=created,
+            price=Decimal('8940.5'),
+            instrument=rng.choice(['BTCUSD.SPOT', 'ETHUSD.SPOT']),
+            trade_id=str(i),
+            origin='rest',
+            rfq_id=str(i),
+            side=rng.choice([SideEnum.buy, SideEnum.sell]),
+            quantity=Decimal(rng.randint(1, 100)) / 10,
+            user='rollo',
+            order=None,
+        )
+        for i in range(n)
+    ]
+
+
+def run(sizes=(1000, 10000), repeat: int = 3):
+    balances = Balances(__root__={
+        'BTC': Decimal(0), 'ETH': Decimal(0), 'USD': Decimal(1000000),
+    })
+
+    results = []
+    for n_trades in sizes:
+        history = trades(n_trades)
+
+        def _fold(history=history):
+            reduce(add, history, balances)
+
+        results.append(measure(
+            'models/balances_add/{}'.format(n_trades), _fold, 1,
+            repeat=repeat, ops_per_call=n_trades
+        ))
+
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
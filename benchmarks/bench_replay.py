@@ -0,0 +1,74 @@
+"""
+End to end throughput of the websocket client (`listen()`, the
+router and the fanouts) by replaying a synthetic tick archive
+as fast as possible.
+
+    $ python -m benchmarks.bench_replay
+
+"""
+import asyncio
+import gc
+import tempfile
+
+from b2c2.archive import TickArchive
+from b2c2.frames import TrustedQuoteStreamFrame
+from b2c2.recorder import TickRecorder
+from b2c2.replay import TickReplay
+from benchmarks._frames import INSTRUMENTS, price_frame
+from benchmarks._harness import report
+
+
+def _write_archive(directory: str, n_frames: int, n_instruments: int):
+    with TickRecorder(directory) as recorder:
+        for i in range(n_frames):
+            recorder.record(TrustedQuoteStreamFrame(price_frame(
+                INSTRUMENTS[i % n_instruments],
+                mid=8940.0 + i % 10, timestamp=1516288053582 + i,
+            )))
+
+
+def run(n_frames: int = 5000, n_instruments: int = 4):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            _write_archive(directory, n_frames, n_instruments)
+            archive = TickArchive(directory)
+
+            for trusted in (False, True):
+                replay = TickReplay(archive)
+                replay_report = loop.run_until_complete(
+                    replay.run(replay.client(trusted_stream=trusted))
+                )
+                results.append({
+                    'name': 'replay/{}'.format(
+                        'trusted' if trusted else 'validated'
+                    ),
+                    'seconds_per_op': (
+                        replay_report.elapsed / replay_report.frames
+                    ),
+                    'ops_per_second': replay_report.throughput,
+                })
+    finally:
+        # Fanout jobs run until cancelled
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(
+            asyncio.gather(*pending, return_exceptions=True)
+        )
+        # Then let the client clean up after its fanouts
+        gc.collect()
+        loop.run_until_complete(asyncio.gather(
+            *asyncio.all_tasks(loop), return_exceptions=True
+        ))
+        loop.close()
+        asyncio.set_event_loop(None)
+
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
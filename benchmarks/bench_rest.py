@@ -0,0 +1,87 @@
+"""
+Round trips to the local mock REST server (`b2c2.mock_server`)
+through `OpenAPIClient._make_request`, next to the same requests
+made with a bare `requests.Session`. The difference is the
+client's overhead: headers, hooks, logging and parsing.
+
+    $ python -m benchmarks.bench_rest
+
+"""
+import warnings
+
+from decimal import Decimal
+from requests import Session
+
+from b2c2.client import BaseB2C2APIClient
+from b2c2.mock_server import MockExchange, MockRESTServer
+from b2c2.models import RequestForQuote, SideEnum
+from benchmarks._harness import measure, report
+
+
+def run(number: int = 200, repeat: int = 3):
+    results = []
+    with MockRESTServer(MockExchange(seed=0)) as server:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            client = BaseB2C2APIClient(
+                {'rest_api': server.url}, api_key='benchmark'
+            )
+
+        session = Session()
+        headers = {'Authorization': 'Token benchmark'}
+        rfq = RequestForQuote(
+            quantity=Decimal(1), side=SideEnum.buy,
+            instrument='BTCUSD.SPOT'
+        )
+        rfq_body = rfq.json()
+
+        def _raw_get(path):
+            url = server.url + path
+            return lambda: session.get(url, headers=headers).json()
+
+        def _uncached(method):
+            # A round trip every time, not the response cache
+            def _request():
+                client.cache.clear()
+                method()
+            return _request
+
+        def _raw_rfq():
+            session.post(
+                server.url + 'request_for_quote/', data=rfq_body,
+                headers={**headers, 'Content-type': 'application/json'},
+            ).json()
+
+        def _quote_then_trade():
+            quote = client.post_request_for_quote(rfq)
+            client.post_trade(quote.get_trade())
+
+        for name, func in (
+            ('raw/instruments', _raw_get('instruments/')),
+            ('client/instruments', _uncached(client.get_instruments)),
+            ('client/instruments/cached', client.get_instruments),
+            ('raw/balance', _raw_get('balance/')),
+            ('client/balance', _uncached(client.get_balance)),
+            ('client/balance/cached', client.get_balance),
+            ('raw/request_for_quote', _raw_rfq),
+            (
+                'client/request_for_quote',
+                lambda: client.post_request_for_quote(rfq)
+            ),
+            ('client/quote_then_trade', _quote_then_trade),
+            (
+                'client/execute_at_quote',
+                lambda: client.execute_at_quote(rfq, lambda quote: True)
+            ),
+        ):
+            results.append(measure(
+                'rest/{}'.format(name), func, number, repeat=repeat
+            ))
+
+        session.close()
+
+    return results
+
+
+if __name__ == '__main__':
+    report(run())
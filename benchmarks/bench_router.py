@@ -0,0 +1,114 @@
+"""
+Compares the event keyed `FrameRouter` with the pampy pattern
+matching it replaced.
+
+    $ python -m benchmarks.bench_router
+
+"""
+import asyncio
+import pampy
+
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from b2c2.frames import (
+    ErrorResponseFrame, TradableInstrumentsFrame, UsernameUpdateFrame,
+    QuoteUnsubscribeResponseFrame, QuoteStreamFrame,
+    QuoteSubscribeResponseFrame,
+)
+from b2c2.router import FrameRouter
+from benchmarks._frames import mixed_frames
+from benchmarks._harness import measure, report
+
+
+# The rules B2C2WebsocketClient used before the router
+_pampy_rules = (
+    {'success': False, 'error_code': Any}, lambda _: ErrorResponseFrame,
+    {'event': 'tradable_instruments'}, lambda _: TradableInstrumentsFrame,
+    {'event': 'tradable_instruments_update'},
+    lambda _: TradableInstrumentsFrame,
+    {'event': 'username_update'}, lambda _: UsernameUpdateFrame,
+    {'event': 'unsubscribe'}, lambda _: QuoteUnsubscribeResponseFrame,
+    {'event': 'price'}, lambda _: QuoteStreamFrame,
+    {'event': 'subscribe'}, lambda _: QuoteSubscribeResponseFrame,
+    pampy._, lambda _: None,
+)
+
+
+async def _noop(frame):
+    pass
+
+
+_callbacks = WeakKeyDictionary([
+    (cls, _noop) for cls in (
+        ErrorResponseFrame, TradableInstrumentsFrame, UsernameUpdateFrame,
+        QuoteUnsubscribeResponseFrame, QuoteStreamFrame,
+        QuoteSubscribeResponseFrame,
+    )
+])
+
+
+def _build_router():
+    router = FrameRouter()
+    router.set_error_route(ErrorResponseFrame, _noop)
+    for event, cls in (
+        ('tradable_instruments', TradableInstrumentsFrame),
+        ('tradable_instruments_update', TradableInstrumentsFrame),
+        ('username_update', UsernameUpdateFrame),
+        ('unsubscribe', QuoteUnsubscribeResponseFrame),
+        ('price', QuoteStreamFrame),
+        ('subscribe', QuoteSubscribeResponseFrame),
+    ):
+        router.add_route(event, cls, _noop)
+
+    return router
+
+
+def run(n_frames: int = 10000):
+    frames = mixed_frames(n_frames)
+    router = _build_router()
+    loop = asyncio.new_event_loop()
+
+    def pampy_match():
+        for frame in frames:
+            pampy.match(frame, *_pampy_rules)
+
+    def router_match():
+        match = router.match
+        for frame in frames:
+            match(frame)
+
+    async def _pampy_dispatch():
+        for frame in frames:
+            frame_cls = pampy.match(frame, *_pampy_rules)
+            parsed = frame_cls(**frame)
+            await _callbacks.get(frame_cls)(parsed)
+
+    async def _router_dispatch():
+        dispatch = router.dispatch
+        for frame in frames:
+            await dispatch(frame)
+
+    def pampy_dispatch():
+        loop.run_until_complete(_pampy_dispatch())
+
+    def router_dispatch():
+        loop.run_until_complete(_router_dispatch())
+
+    try:
+        return [
+            measure('match/pampy', pampy_match, 1, ops_per_call=n_frames),
+            measure('match/router', router_match, 1, ops_per_call=n_frames),
+            measure(
+                'dispatch/pampy', pampy_dispatch, 1, ops_per_call=n_frames
+            ),
+            measure(
+                'dispatch/router', router_dispatch, 1, ops_per_call=n_frames
+            ),
+        ]
+    finally:
+        loop.close()
+
+
+if __name__ == '__main__':
+    report(run())
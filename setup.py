@@ -72,11 +72,19 @@ setup(
         'requests~=2.25.1',
         # Used by websocket client
         'websockets~=8.1',
-        # Used for matching websocket frames
-        'pampy~=0.3.0',
-        'asyncstdlib==3.9.0'
+        'asyncstdlib==3.9.0',
+        # Used for price ladders
+        'numpy>=1.19',
     ],
     extras_require={
+        'speedups': [
+            # Faster JSON decoding of websocket frames
+            'orjson>=3.4',
+        ],
+        'async': [
+            # Used by the asyncio API client
+            'aiohttp~=3.7.4',
+        ],
         'gui': [
             'notebook~=6.2.0',
             'ipywidgets~=7.6.3',
@@ -88,7 +96,8 @@ setup(
             'pytest-mypy~=0.8.0',
             'pytest-flake8~=1.0.7',
             'pytest-asyncio~=0.14.0',
-
+            # Only used by the router benchmark for comparison
+            'pampy~=0.3.0',
         ]
     },
     #cmdclass={
@@ -0,0 +1,47 @@
+"""
+Fixtures for the tests of the API clients against the mock server
+"""
+import pytest
+
+from b2c2.mock_server import MockExchange, MockRESTServer
+
+
+API_KEY = 'secret'
+
+
+@pytest.fixture
+def api_key(monkeypatch):
+    monkeypatch.setenv('B2C2_APIKEY', API_KEY)
+
+
+@pytest.fixture
+def exchange():
+    return MockExchange(seed=1)
+
+
+@pytest.fixture
+def latency():
+    """
+    Seconds `rest_server` adds to every response, overridden by
+    the modules that need requests to take a while
+    """
+    return 0
+
+
+@pytest.fixture
+def rest_server(exchange, latency):
+    """
+    Serves `exchange` to clients with the `api_key`
+    """
+    with MockRESTServer(
+        exchange, latency=latency, api_key=API_KEY
+    ) as server:
+        yield server
+
+
+@pytest.fixture
+def rest_env(rest_server):
+    """
+    The environment of a client of `rest_server`
+    """
+    return {'rest_api': rest_server.url, 'websocket': 'ws://unused'}
@@ -39,3 +39,16 @@ def test_body_parameterization():
     client = APITestClient()
     client._session.request().body = 1
     assert client.get_test() == 1
+
+
+def test_endpoint_is_compiled_once():
+    client = APITestClient()
+    client._base_url = 'http://example.com/'
+    client.post_test(1)
+    client.post_test(2)
+
+    # The body isn't a model, it's sent as it is
+    calls = client._session.request.call_args_list
+    assert [call[1]['data'] for call in calls] == [1, 2]
+    assert calls[0][0] == ('POST', 'http://example.com/test/')
+    assert client._urls == {'/test/': 'http://example.com/test/'}
@@ -0,0 +1,83 @@
+import numpy as np
+
+from decimal import Decimal
+from datetime import datetime, timezone
+from b2c2.archive import TickArchive
+from b2c2.frames import TrustedQuoteStreamFrame
+from b2c2.recorder import TickRecorder
+from tests.test_recorder import _price
+
+
+def _record(directory, ticks, **kwargs):
+    with TickRecorder(str(directory), **kwargs) as recorder:
+        for instrument, timestamp in ticks:
+            recorder.record(
+                TrustedQuoteStreamFrame(_price(instrument, timestamp))
+            )
+
+
+def _timestamps(chunks):
+    return [
+        timestamp for chunk in chunks
+        for timestamp in chunk.records['timestamp'].tolist()
+    ]
+
+
+def test_archive_query_unfiltered_is_a_view(tmpdir):
+    _record(tmpdir, [('BTCUSD.SPOT', t) for t in range(10)], buffer_size=4)
+
+    archive = TickArchive(str(tmpdir))
+    chunk, = archive.query()
+
+    assert len(archive) == 10
+    assert archive.instruments == {'BTCUSD.SPOT'}
+    assert chunk.records['timestamp'].tolist() == list(range(10))
+    # Nothing was copied out of the memory map
+    assert isinstance(chunk.records, np.memmap)
+
+
+def test_archive_query_by_instrument_and_time(tmpdir):
+    ticks = [
+        ('BTCUSD.SPOT' if t % 2 else 'ETHUSD.SPOT', t) for t in range(20)
+    ]
+    _record(tmpdir, ticks, buffer_size=4)
+    archive = TickArchive(str(tmpdir))
+
+    assert _timestamps(archive.query(['BTCUSD.SPOT'], start=5, end=12)) == [
+        5, 7, 9, 11
+    ]
+    assert _timestamps(archive.query(start=18)) == [18, 19]
+    assert _timestamps(archive.query(['XRPUSD.SPOT'])) == []
+
+    # Blocks that can't match aren't read
+    tick_file, = archive.files
+    assert tick_file._ranges(None, 8, 12) == [(8, 12, False)]
+
+
+def test_archive_query_chunks_and_datetimes(tmpdir):
+    base = 1516288053000
+    _record(
+        tmpdir, [('BTCUSD.SPOT', base + t) for t in range(10)],
+        buffer_size=1, max_bytes=1
+    )
+    archive = TickArchive(str(tmpdir))
+    assert len(archive.files) == 10
+
+    start = datetime.fromtimestamp((base + 3) / 1000, timezone.utc)
+    chunks = list(archive.query(start=start))
+    assert _timestamps(chunks) == [base + t for t in range(3, 10)]
+
+    _record(tmpdir.mkdir('big'), [('BTCUSD.SPOT', t) for t in range(10)])
+    chunks = list(TickArchive(str(tmpdir.join('big'))).query(chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+
+
+def test_archive_rebuilds_frames(tmpdir):
+    _record(tmpdir, [('BTCUSD.SPOT', 1), ('ETHUSD.SPOT', 2)])
+
+    frame, = TickArchive(str(tmpdir)).frames(['ETHUSD.SPOT'])
+
+    assert frame.instrument == 'ETHUSD.SPOT'
+    assert frame.timestamp == 2
+    assert [i.quantity for i in frame.levels.buy] == [1, 3]
+    assert frame.levels.sell[0].price == Decimal('8944.41')
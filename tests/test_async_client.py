@@ -0,0 +1,92 @@
+import asyncio
+import inspect
+import pytest
+
+from decimal import Decimal
+from b2c2 import __version__
+from b2c2.client import AsyncBaseB2C2APIClient
+from b2c2.exceptions import B2C2HTTPException
+from b2c2.models import Quote, RequestForQuote, TradeResponse
+
+
+loop = asyncio.get_event_loop()
+
+
+def _api_client(rest_api):
+    return AsyncBaseB2C2APIClient(env={
+        'rest_api': rest_api, 'websocket': 'ws://unused'
+    })
+
+
+def test_methods_are_coroutines(api_key):
+    method = AsyncBaseB2C2APIClient.post_request_for_quote
+    assert inspect.iscoroutinefunction(method)
+    assert method.__annotations__['return'] is Quote
+    assert AsyncBaseB2C2APIClient.post_trade.__annotations__[
+        'return'
+    ] is TradeResponse
+
+
+def test_headers(api_key):
+    headers = _api_client('http://test/')._get_headers()
+    assert headers.items() >= {
+        'User-Agent': f'RolloB2C2Client/{__version__}',
+        'Authorization': 'Token secret',
+    }.items()
+
+
+def test_quote_and_trade(api_key, rest_server):
+    async def _test():
+        async with _api_client(rest_server.url) as client:
+            instruments = await client.get_instruments()
+            assert 'BTCUSD.SPOT' in [i.name for i in instruments.__root__]
+
+            quote = await client.post_request_for_quote(RequestForQuote(
+                quantity=Decimal(2), side='buy', instrument='BTCUSD.SPOT'
+            ))
+            assert quote._client is client
+
+            trade = await client.post_trade(quote.get_trade())
+            assert trade.price == quote.price
+
+            balances = await client.get_balance()
+            assert balances['BTC'] == 2
+
+            # Connections are pooled
+            session = client._session
+            assert session is not None and not session.closed
+        assert session.closed
+
+    loop.run_until_complete(_test())
+
+
+def test_errors(monkeypatch, rest_server):
+    monkeypatch.setenv('B2C2_APIKEY', 'wrong')
+
+    async def _test():
+        async with _api_client(rest_server.url) as client:
+            with pytest.raises(B2C2HTTPException) as e:
+                await client.get_balance()
+
+        response = e.value.error_response
+        assert response.status == 401
+        # The body was read before the connection was released
+        assert (await response.json())['errors'][0]['code'] == 1001
+
+    loop.run_until_complete(_test())
+
+
+def test_concurrent_requests(api_key, rest_server):
+    async def _test():
+        async with _api_client(rest_server.url) as client:
+            quotes = await asyncio.gather(*(
+                client.post_request_for_quote(RequestForQuote(
+                    quantity=Decimal(1), side='sell',
+                    instrument='BTCUSD.SPOT'
+                ))
+                for _ in range(10)
+            ))
+
+        assert len({quote.rfq_id for quote in quotes}) == 10
+
+    loop.run_until_complete(_test())
@@ -0,0 +1,105 @@
+import time
+import asyncio
+import threading
+import pytest
+
+from decimal import Decimal
+from b2c2.bulk import BulkQuotes, request_quotes
+from b2c2.client import (
+    AsyncBaseB2C2APIClient, BaseB2C2APIClient, B2C2APIClient
+)
+from b2c2.exceptions import B2C2HTTPException
+from b2c2.mock_server import MockExchange
+from b2c2.models import Quote, RequestForQuote
+
+
+loop = asyncio.get_event_loop()
+
+
+@pytest.fixture
+def exchange():
+    return MockExchange(instruments=6, seed=1)
+
+
+@pytest.fixture
+def latency():
+    # Enough that running requests one at a time shows
+    return 0.05
+
+
+def _basket():
+    return [
+        RequestForQuote(quantity=Decimal(1), side='buy', instrument=name)
+        for name in (
+            'BTCUSD.SPOT', 'ETHUSD.SPOT', 'NOPE.SPOT', 'BTCEUR.SPOT',
+            'ETHEUR.SPOT', 'BTCGBP.SPOT',
+        )
+    ]
+
+
+def _check(bulk: BulkQuotes, basket):
+    assert len(bulk.results) == len(bulk.latencies) == len(basket)
+
+    # In order, with the failure in its place
+    for rfq, result in zip(basket, bulk.results):
+        if rfq.instrument == 'NOPE.SPOT':
+            assert isinstance(result, B2C2HTTPException)
+        else:
+            assert isinstance(result, Quote)
+            assert result.instrument == rfq.instrument
+
+    assert [i for i, _ in bulk.errors] == [2]
+    assert len(bulk.quotes) == 5
+
+    assert all(latency >= 0.05 for latency in bulk.latencies)
+    assert bulk.elapsed < bulk.total_latency / 2
+    assert bulk.speedup > 2
+
+
+def test_request_quotes(api_key, rest_env):
+    client = BaseB2C2APIClient(rest_env)
+    basket = _basket()
+    _check(client.request_quotes(basket, concurrency=6), basket)
+
+
+def test_request_quotes_records_history(api_key, rest_env):
+    with pytest.warns(RuntimeWarning):
+        client = B2C2APIClient(rest_env)
+
+    bulk = client.request_quotes(_basket())
+    assert client.history.quotes == bulk.quotes
+
+
+def test_request_quotes_async(api_key, rest_env):
+    async def _test():
+        async with AsyncBaseB2C2APIClient(
+            rest_env
+        ) as client:
+            return await client.request_quotes(basket, concurrency=6)
+
+    basket = _basket()
+    _check(loop.run_until_complete(_test()), basket)
+
+
+def test_concurrency_limit():
+    lock = threading.Lock()
+    running = 0
+    most = 0
+
+    def _request(rfq):
+        nonlocal running, most
+        with lock:
+            running += 1
+            most = max(most, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return rfq
+
+    basket = _basket() * 3
+    bulk = request_quotes(_request, basket, concurrency=3)
+    assert bulk.results == basket
+    assert most == 3
+
+    with pytest.raises(ValueError):
+        request_quotes(_request, basket, concurrency=0)
@@ -0,0 +1,131 @@
+import asyncio
+import time
+import pytest
+
+from decimal import Decimal
+from b2c2.cache import CachePolicy, ResponseCache, FRESH, STALE, MISS
+from b2c2.client import AsyncBaseB2C2APIClient, BaseB2C2APIClient
+from b2c2.models import RequestForQuote
+
+
+loop = asyncio.get_event_loop()
+KEY = ('GET', '/balance/')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_ttl_and_stale(clock):
+    cache = ResponseCache(clock)
+    policy = CachePolicy(ttl=10, stale_while_revalidate=5)
+
+    value, state, generation = cache.lookup(KEY, policy)
+    assert (value, state) == (None, MISS)
+    assert cache.store(KEY, 'balance', generation)
+
+    assert cache.lookup(KEY, policy)[:2] == ('balance', FRESH)
+    clock.now = 12
+    assert cache.lookup(KEY, policy)[:2] == ('balance', STALE)
+    clock.now = 15
+    assert cache.lookup(KEY, policy)[:2] == (None, MISS)
+
+    assert cache.hits == 2
+    assert cache.misses == 2
+    assert cache.stats()['/balance/'] == {
+        'hits': 1, 'stale_hits': 1, 'misses': 2
+    }
+
+
+def test_invalidate(clock):
+    cache = ResponseCache(clock)
+    policy = CachePolicy(ttl=10)
+
+    _, _, generation = cache.lookup(KEY, policy)
+    cache.store(KEY, 'old', generation)
+    cache.invalidate('/balance/')
+    assert cache.lookup(KEY, policy)[1] == MISS
+
+    # Fetched before the invalidation, so it's out of date
+    assert not cache.store(KEY, 'in flight', generation)
+    assert cache.lookup(KEY, policy)[1] == MISS
+    assert cache.stats()['/balance/']['invalidations'] == 1
+
+
+def test_one_revalidation_at_a_time():
+    cache = ResponseCache()
+    assert cache.start_revalidation(KEY)
+    assert not cache.start_revalidation(KEY)
+    cache.end_revalidation(KEY)
+    assert cache.start_revalidation(KEY)
+
+
+def test_client_caches_reference_data(api_key, rest_server, rest_env):
+    client = BaseB2C2APIClient(rest_env)
+
+    instruments = client.get_instruments()
+    assert client.get_instruments() is instruments
+    client.get_balance()
+    client.get_balance()
+    assert rest_server.requests == 2
+    assert client.cache.stats()['/instruments/'] == {'hits': 1, 'misses': 1}
+
+    # Not cached
+    quote = client.post_request_for_quote(RequestForQuote(
+        quantity=Decimal(1), side='buy', instrument='BTCUSD.SPOT'
+    ))
+    assert rest_server.requests == 3
+
+    # Trading invalidates the balance
+    client.post_trade(quote.get_trade())
+    assert client.get_balance()['BTC'] == 1
+    assert rest_server.requests == 5
+
+
+def test_client_stale_while_revalidate(api_key, rest_server, rest_env, clock):
+    client = BaseB2C2APIClient(rest_env)
+    client.cache = ResponseCache(clock)
+
+    instruments = client.get_instruments()
+    clock.now = 301
+    # Served stale, fetched again in the background
+    assert client.get_instruments() is instruments
+
+    deadline = time.monotonic() + 5
+    while client.cache._revalidating and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert client.get_instruments() is not instruments
+    assert rest_server.requests == 2
+
+
+def test_async_client_cache(api_key, rest_server, rest_env, clock):
+    async def _test():
+        async with AsyncBaseB2C2APIClient(rest_env) as client:
+            client.cache = ResponseCache(clock)
+
+            instruments = await client.get_instruments()
+            assert await client.get_instruments() is instruments
+            assert rest_server.requests == 1
+
+            clock.now = 301
+            assert await client.get_instruments() is instruments
+            await asyncio.gather(*client._revalidations)
+            assert rest_server.requests == 2
+            assert await client.get_instruments() is not instruments
+
+            balance = await client.get_balance()
+            client.cache.invalidate('/balance/')
+            assert await client.get_balance() is not balance
+            assert rest_server.requests == 4
+
+    loop.run_until_complete(_test())
@@ -50,3 +50,22 @@ def test_auth_and_headers():
     }.items()
 
     assert client._logger.debug.call_count == 2
+
+
+def test_environment_is_read_per_request_unless_pinned(monkeypatch):
+    monkeypatch.setenv('HTTPS_PROXY', 'http://proxy:3128')
+    client = BaseB2C2APIClient(env.uat, api_key='api_key')
+    pinned = BaseB2C2APIClient(
+        env.uat, api_key='api_key', pin_environment=True
+    )
+    monkeypatch.setenv('HTTPS_PROXY', 'http://other-proxy:3128')
+
+    assert client._session.trust_env
+    assert client._session.merge_environment_settings(
+        env.uat['rest_api'], {}, None, None, None
+    )['proxies']['https'] == 'http://other-proxy:3128'
+
+    assert not pinned._session.trust_env
+    assert pinned._session.merge_environment_settings(
+        env.uat['rest_api'], {}, None, None, None
+    )['proxies']['https'] == 'http://proxy:3128'
@@ -0,0 +1,88 @@
+import json
+import pytest
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from pydantic import ValidationError
+from b2c2 import codecs
+from b2c2.client import BaseB2C2APIClient
+from b2c2.models import (
+    Instruments, Quote, RequestForQuote, SideEnum, Trade, TradeResponse
+)
+
+
+def _rfq(**kwargs):
+    return RequestForQuote(
+        quantity=Decimal('1.5'), side=SideEnum.sell,
+        instrument='BTCUSD.SPOT', **kwargs
+    )
+
+
+@pytest.mark.parametrize('rfq', [_rfq(), _rfq(client_rfq_id='mine')])
+def test_encodes_rfqs_as_pydantic_does(rfq):
+    assert codecs.get_encoder(RequestForQuote)(rfq) == rfq.json()
+
+
+def test_encodes_trades_as_pydantic_does(exchange):
+    trade = exchange.request_for_quote(_rfq()).get_trade('desk')
+    assert codecs.get_encoder(Trade)(trade) == trade.json()
+
+
+def test_decodes_as_pydantic_does(exchange):
+    quote = exchange.request_for_quote(_rfq())
+    trade_response = exchange.trade(quote.get_trade())
+
+    for model, instance in (
+        (Quote, quote), (TradeResponse, trade_response)
+    ):
+        raw = json.loads(instance.json())
+        decoded = codecs.get_decoder(model)(raw)
+        assert decoded == model.parse_obj(raw)
+        assert decoded.__fields_set__ == set(raw)
+        assert decoded.json() == instance.json()
+
+    # Missing optional fields get their default
+    del raw['executing_unit']
+    decoded = codecs.get_decoder(TradeResponse)(raw)
+    assert decoded.executing_unit is None
+    assert 'executing_unit' not in decoded.__fields_set__
+
+
+def test_decodes_utc_timestamps(exchange):
+    raw = json.loads(exchange.request_for_quote(_rfq()).json())
+    raw['created'] = '2020-01-01T10:00:00.123456Z'
+
+    quote = codecs.get_decoder(Quote)(raw)
+    assert quote.created == datetime(
+        2020, 1, 1, 10, 0, 0, 123456, tzinfo=timezone.utc
+    )
+
+
+def test_unexpected_responses_are_validated(exchange):
+    raw = json.loads(exchange.request_for_quote(_rfq()).json())
+    decode = codecs.get_decoder(Quote)
+
+    for change in ({'price': None}, {'side': 'both'}, {'price': 'x'}):
+        with pytest.raises(ValidationError):
+            decode({**raw, **change})
+
+
+def test_models_without_a_codec():
+    assert codecs.get_decoder(Instruments) == Instruments.parse_obj
+
+    with pytest.raises(TypeError):
+        codecs.compile_decoder(Instruments)
+
+
+@pytest.mark.parametrize('strict_validation', [False, True])
+def test_client(api_key, rest_env, strict_validation):
+    client = BaseB2C2APIClient(rest_env, strict_validation=strict_validation)
+    quote = client.post_request_for_quote(_rfq(client_rfq_id='mine'))
+    trade = client.post_trade(quote.get_trade())
+
+    assert quote.client_rfq_id == 'mine'
+    assert quote.quantity == Decimal('1.5')
+    assert isinstance(quote.price, Decimal)
+    assert trade.rfq_id == quote.rfq_id
+    assert trade.side == SideEnum.sell
+    assert quote._client is client and trade._client is client
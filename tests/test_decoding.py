@@ -0,0 +1,33 @@
+import json
+import pytest
+
+from typing import List, Type
+from b2c2.decoding import (
+    FrameDecoder, StdlibFrameDecoder, OrjsonFrameDecoder,
+    get_default_decoder, orjson
+)
+from tests.frame_examples import frames
+
+
+decoders: List[Type[FrameDecoder]] = [StdlibFrameDecoder]
+if orjson is not None:
+    decoders.append(OrjsonFrameDecoder)
+
+
+@pytest.mark.parametrize('decoder_cls', decoders)
+@pytest.mark.parametrize('encode', [str, str.encode])
+def test_decode_str_and_bytes(decoder_cls, encode):
+    message = encode(json.dumps(frames.subscribe_stream_frame))
+    decoded = decoder_cls().decode(message)
+    assert decoded == frames.subscribe_stream_frame
+
+
+@pytest.mark.parametrize('decoder_cls', decoders)
+def test_decode_error_is_value_error(decoder_cls):
+    with pytest.raises(ValueError):
+        decoder_cls().decode('<html>Bad Gateway</html>')
+
+
+def test_default_decoder_prefers_orjson():
+    expected = OrjsonFrameDecoder if orjson else StdlibFrameDecoder
+    assert type(get_default_decoder()) is expected
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+
+from decimal import Decimal
+from b2c2 import codecs
+from b2c2.client import (
+    AsyncBaseB2C2APIClient, BaseB2C2APIClient, B2C2APIClient
+)
+from b2c2.exceptions import B2C2HTTPException
+from b2c2.execution import TradeTemplate
+from b2c2.mock_server import MockExchange
+from b2c2.models import RequestForQuote, Trade
+
+
+loop = asyncio.get_event_loop()
+RFQ = RequestForQuote(
+    quantity=Decimal('2.5'), side='sell', instrument='ETHUSD.SPOT'
+)
+
+
+@pytest.fixture
+def latency():
+    return 0.02
+
+
+def test_executes_accepted_quotes(api_key, rest_server, rest_env):
+    client = BaseB2C2APIClient(rest_env)
+    execution = client.execute_at_quote(
+        RFQ, lambda quote: quote.price > 0, executing_unit='desk'
+    )
+
+    assert execution.accepted
+    trade = execution.trade
+    assert trade.rfq_id == execution.quote.rfq_id
+    assert trade.price == execution.quote.price
+    assert trade.quantity == RFQ.quantity
+    assert trade.executing_unit == 'desk'
+
+    assert execution.rfq_latency >= 0.02
+    assert execution.trade_latency >= 0.02
+    assert execution.decision_time < execution.rfq_latency
+    assert execution.elapsed == pytest.approx(
+        execution.rfq_latency + execution.decision_time +
+        execution.trade_latency
+    )
+    assert rest_server.requests == 2
+
+
+def test_rejected_quotes_are_not_traded(api_key, rest_server, rest_env):
+    client = BaseB2C2APIClient(rest_env)
+    execution = client.execute_at_quote(RFQ, lambda quote: False)
+
+    assert not execution.accepted
+    assert execution.trade is None
+    assert execution.trade_latency == 0
+    assert rest_server.requests == 1
+
+
+def test_records_history(api_key, rest_env):
+    with pytest.warns(RuntimeWarning):
+        client = B2C2APIClient(rest_env)
+
+    execution = client.execute_at_quote(RFQ, lambda quote: True)
+    assert client.history.quotes == [execution.quote]
+    assert client.history.completed_trades == [execution.trade]
+
+
+# Expired by the time it's traded
+@pytest.mark.parametrize('exchange', [MockExchange(seed=1, quote_ttl=0)])
+def test_records_the_quote_of_a_failed_trade(api_key, rest_env):
+    with pytest.warns(RuntimeWarning):
+        client = B2C2APIClient(rest_env)
+
+    with pytest.raises(B2C2HTTPException):
+        client.execute_at_quote(RFQ, lambda quote: True)
+
+    assert len(client.history.quotes) == 1
+    assert client.history.completed_trades == []
+
+
+def test_async_client(api_key, rest_env):
+    async def _test():
+        async with AsyncBaseB2C2APIClient(rest_env) as client:
+            return await client.execute_at_quote(RFQ, lambda quote: True)
+
+    execution = loop.run_until_complete(_test())
+    assert execution.trade.rfq_id == execution.quote.rfq_id
+    assert execution.rfq_latency >= 0.02
+    assert execution.trade_latency >= 0.02
+
+
+def test_template_builds_the_trade_of_a_quote():
+    exchange = MockExchange(seed=1)
+    quote = exchange.request_for_quote(RFQ)
+
+    for validate in (False, True):
+        trade = TradeTemplate(RFQ, 'desk', validate=validate).trade(quote)
+        assert trade == quote.get_trade('desk')
+        assert trade.json() == quote.get_trade('desk').json()
+        assert codecs.get_encoder(Trade)(trade) == trade.json()
+
+    assert isinstance(trade, Trade)
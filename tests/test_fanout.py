@@ -1,5 +1,9 @@
+import pytest
 import asyncio
 
+from b2c2.exceptions import SlowConsumerException, FanoutOverrunException
+from b2c2.fanout import RingFanout, RingReader, _drain
+from b2c2.stream_utils import anext
 from b2c2.websocket import Fanout
 from asyncstdlib import islice, chain
 
@@ -29,3 +33,235 @@ def test_fanout_queue():
 
     loop.run_until_complete(_test())
     assert len(fanout._fanout_queues.data) == 0
+
+
+async def _publish(fanout, *frames):
+    for frame in frames:
+        fanout._queue.put_nowait(frame)
+
+    # Let the fanout job distribute them
+    while not fanout._queue.empty():
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+def test_fanout_drop_oldest():
+    fanout = Fanout(asyncio.Queue(), maxsize=2, policy='drop_oldest')
+
+    async def _test():
+        async with fanout.queue(name='slow') as queue:
+            await _publish(fanout, 1, 2, 3, 4)
+            assert [queue.get_nowait(), queue.get_nowait()] == [3, 4]
+            assert fanout.dropped == {'slow': 2}
+
+    loop.run_until_complete(_test())
+    assert fanout.dropped_total == 2
+
+
+def test_fanout_drop_newest_per_subscriber():
+    fanout = Fanout(asyncio.Queue())
+
+    async def _test():
+        async with fanout.queue(maxsize=1, policy='drop_newest') as slow,\
+                   fanout.queue() as fast:
+            await _publish(fanout, 1, 2, 3)
+            assert slow.get_nowait() == 1
+            assert slow.dropped == 2
+            assert fast.qsize() == 3
+            assert fast.dropped == 0
+
+    loop.run_until_complete(_test())
+
+
+def test_fanout_disconnect_slow_consumer():
+    fanout = Fanout(asyncio.Queue(), maxsize=1, policy='disconnect')
+
+    async def _test():
+        async with fanout.stream() as stream:
+            await _publish(fanout, 1, 2)
+            assert len(fanout._fanout_queues) == 0
+
+            with pytest.raises(SlowConsumerException):
+                await anext(stream)
+
+    loop.run_until_complete(_test())
+    assert fanout.dropped_total == 1
+
+
+def test_fanout_block():
+    fanout = Fanout(asyncio.Queue(), maxsize=1, policy='block')
+
+    async def _test():
+        async with fanout.queue() as queue:
+            await _publish(fanout, 1, 2)
+            # The fanout is waiting on us
+            assert queue.get_nowait() == 1
+            await asyncio.sleep(0)
+            assert queue.get_nowait() == 2
+            assert queue.dropped == 0
+
+    loop.run_until_complete(_test())
+
+
+def test_fanout_block_subscriber_leaving_doesnt_wedge_others():
+    fanout = Fanout(asyncio.Queue(), maxsize=1, policy='block')
+
+    async def _test():
+        async with fanout.queue(maxsize=0) as other:
+            async with fanout.queue():
+                # Blocked on the subscriber that's about to leave
+                await _publish(fanout, 1, 2)
+
+            await _publish(fanout, 3)
+            assert [other.get_nowait() for _ in range(3)] == [1, 2, 3]
+
+            async with fanout.queue() as new:
+                await _publish(fanout, 4)
+                assert new.get_nowait() == 4
+                assert other.get_nowait() == 4
+
+    loop.run_until_complete(asyncio.wait_for(_test(), 5))
+
+
+def test_fanout_conflate():
+    fanout = Fanout(asyncio.Queue())
+
+    async def _test():
+        async with fanout.stream(conflate=True) as latest,\
+                   fanout.queue() as every:
+            await _publish(fanout, 1, 2, 3)
+            assert await anext(latest) == 3
+            assert every.qsize() == 3
+
+            await _publish(fanout, 4)
+            assert await anext(latest) == 4
+
+        assert fanout.dropped_total == 0
+
+    loop.run_until_complete(_test())
+
+
+def test_ring_fanout_stream():
+    fanout = RingFanout(asyncio.Queue(), capacity=4)
+
+    async def _test():
+        async with fanout.stream() as s1, fanout.stream() as s2:
+            await _publish(fanout, 1, 2)
+            s1 = islice(s1, 2)
+            s2 = islice(s2, 2)
+            items = [item async for item in chain(s1, s2)]
+            assert [1, 2, 1, 2] == items
+            assert len(fanout._fanout_queues) == 2
+
+    loop.run_until_complete(_test())
+    assert len(fanout._fanout_queues) == 0
+
+
+def test_ring_fanout_wakes_waiting_readers():
+    fanout = RingFanout(asyncio.Queue(), capacity=4)
+
+    async def _test():
+        async with fanout.queue() as r1, fanout.queue() as r2:
+            waiting = asyncio.gather(r1.get(), r2.get())
+            await asyncio.sleep(0)
+            fanout._queue.put_nowait('frame')
+            assert await waiting == ['frame', 'frame']
+
+    loop.run_until_complete(_test())
+
+
+def test_ring_fanout_overrun():
+    fanout = RingFanout(asyncio.Queue(), capacity=2)
+
+    async def _test():
+        async with fanout.queue(name='slow') as reader:
+            await _publish(fanout, 1, 2, 3, 4, 5)
+
+            with pytest.raises(FanoutOverrunException) as exc_info:
+                await reader.get()
+
+            assert exc_info.value.missed == 3
+            assert fanout.dropped == {'slow': 3}
+            # Carries on from the oldest buffered frame
+            assert await reader.get() == 4
+            assert await reader.get() == 5
+
+    loop.run_until_complete(_test())
+
+
+@pytest.mark.parametrize('fanout_cls', [Fanout, RingFanout])
+def test_stream_batches(fanout_cls):
+    fanout = fanout_cls(asyncio.Queue())
+
+    async def _test():
+        async with fanout.stream_batches(max_items=3) as batches:
+            await _publish(fanout, 1, 2, 3, 4)
+            assert await anext(batches) == [1, 2, 3]
+            assert await anext(batches) == [4]
+
+    loop.run_until_complete(_test())
+
+
+def test_stream_batches_max_wait():
+    fanout = Fanout(asyncio.Queue())
+
+    async def _test():
+        async with fanout.stream_batches(max_wait=0.05) as batches:
+            await _publish(fanout, 1)
+            loop.call_later(0.01, fanout._queue.put_nowait, 2)
+            assert await anext(batches) == [1, 2]
+
+    loop.run_until_complete(_test())
+
+
+def test_drain_keeps_frames_before_overrun():
+    fanout = RingFanout(asyncio.Queue(), capacity=2)
+    reader = RingReader(fanout, 'slow')
+    fanout._write(1)
+    fanout._write(2)
+    batch = [reader.get_nowait()]
+    # Lap the reader before it drains the rest
+    fanout._write(3)
+    fanout._write(4)
+    fanout._write(5)
+
+    # Carries on from the oldest buffered frame
+    _drain(reader, batch, 10)
+    assert batch == [1, 4, 5]
+    assert reader.dropped == 2
+    assert reader.overruns == 1
+
+
+def test_stream_carries_on_after_an_overrun():
+    fanout = RingFanout(asyncio.Queue(), capacity=2)
+
+    async def _test():
+        async with fanout.stream(name='slow') as stream:
+            await _publish(fanout, 1)
+            assert await anext(stream) == 1
+
+            await _publish(fanout, 2, 3, 4, 5)
+            assert await anext(stream) == 4
+            assert await anext(stream) == 5
+
+            # Still streaming
+            await _publish(fanout, 6)
+            assert await anext(stream) == 6
+            assert fanout.dropped == {'slow': 2}
+
+    loop.run_until_complete(_test())
+
+
+def test_stream_batches_carries_on_after_an_overrun():
+    fanout = RingFanout(asyncio.Queue(), capacity=2)
+
+    async def _test():
+        async with fanout.stream_batches(name='slow') as batches:
+            await _publish(fanout, 1, 2, 3)
+            assert await anext(batches) == [2, 3]
+
+            await _publish(fanout, 4)
+            assert await anext(batches) == [4]
+            assert fanout.dropped == {'slow': 1}
+
+    loop.run_until_complete(_test())
@@ -1,5 +1,10 @@
+import pytest
+
+from decimal import Decimal
 from tests.frame_examples import frames
-from b2c2.frames import ErrorResponseFrame
+from b2c2.frames import (
+    ErrorResponseFrame, QuoteStreamFrame, TrustedQuoteStreamFrame
+)
 
 
 def test_error_resp_to_exception():
@@ -10,3 +15,39 @@ def test_error_resp_to_exception():
         "InvalidSubscriptionRequest('Invalid subscription request.')"
     )
     assert exc.error_response is frame
+
+
+def test_trusted_quote_stream_frame_matches_validated():
+    trusted = TrustedQuoteStreamFrame(frames.subscribe_stream_frame)
+    validated = QuoteStreamFrame(**frames.subscribe_stream_frame)
+
+    # Levels are only built when accessed
+    assert trusted._levels is None
+    assert trusted._key == validated._key
+    assert trusted._levels is None
+
+    assert trusted.instrument == validated.instrument
+    assert trusted.timestamp == validated.timestamp
+    assert trusted.levels == validated.levels
+    assert trusted.validate() == validated
+
+
+@pytest.mark.parametrize('frame_cls', [
+    QuoteStreamFrame.parse_obj, TrustedQuoteStreamFrame
+])
+def test_filter_levels(frame_cls):
+    frame = frame_cls(frames.subscribe_stream_frame)
+    filtered = frame.filter_levels({Decimal('3.0')})
+
+    assert [i.quantity for i in filtered.levels.buy] == [3]
+    assert [i.quantity for i in filtered.levels.sell] == [3]
+    # The original is untouched
+    assert len(frame.levels.buy) == 2
+
+
+def test_filter_levels_rebuilds_ladder():
+    frame = QuoteStreamFrame.parse_obj(frames.subscribe_stream_frame)
+    assert len(frame.ladder.bid_quantity) == 2
+
+    filtered = frame.filter_levels({Decimal('3.0')})
+    assert len(filtered.ladder.bid_quantity) == 1
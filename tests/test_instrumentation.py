@@ -0,0 +1,97 @@
+import asyncio
+
+from b2c2.stream_utils import anext
+from b2c2.frames import QuoteSubscribeFrame
+from b2c2.instrumentation import LatencyHistogram, ClockOffsetEstimator
+from tests.frame_examples import frames
+from tests.test_websocket import B2C2ReconnectingTestClient
+
+
+loop = asyncio.get_event_loop()
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for micros in range(1, 10001):
+        histogram.record(micros / 1_000_000)
+
+    assert histogram.count == 10000
+    assert histogram.min == 1
+    assert histogram.max == 10000
+    # Within the 1/64 precision of the buckets
+    for percentile, expected in ((50, 5000), (99, 9900), (100, 10000)):
+        value = histogram.percentile(percentile)
+        assert expected <= value <= expected * (1 + 1 / 64)
+
+    assert histogram.snapshot()['p50'] == histogram.percentile(50)
+
+
+def test_histogram_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for micros in (3, 3, 7, 100):
+        histogram.record(micros / 1_000_000)
+
+    assert histogram.percentile(50) == 3
+    assert histogram.percentile(75) == 7
+    assert histogram.percentile(100) == 100
+
+
+def test_histogram_merge_and_reset():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(0.001)
+    second.record(0.5)
+    first.merge(second)
+
+    assert first.count == 2
+    assert (first.min, first.max) == (1000, 500000)
+
+    first.reset()
+    assert first.count == 0
+    assert first.percentile(99) == 0
+
+
+def test_clock_offset_follows_the_window_minimum():
+    clock = ClockOffsetEstimator(window=10)
+    assert clock.offset is None
+
+    clock.update(100.0, 99.0)
+    clock.update(101.0, 100.5)
+    assert clock.offset == 0.5
+
+    # Still remembers the previous window
+    clock.update(111.0, 110.0)
+    assert clock.offset == 0.5
+
+    # The previous window has gone
+    clock.update(122.0, 121.0)
+    assert clock.offset == 1.0
+
+
+def test_websocket_client_metrics():
+    client = B2C2ReconnectingTestClient(metrics=True)
+
+    async def _test():
+        async with client.connect():
+            listener = asyncio.ensure_future(client.listen())
+            websocket, = client.connections
+
+            req = QuoteSubscribeFrame(**frames.subscribe_request)
+            async with client.quote_subscribe(req) as fanout:
+                async with fanout.stream() as stream:
+                    for _ in range(3):
+                        websocket.incoming.put_nowait(
+                            frames.subscribe_stream_frame
+                        )
+                        await anext(stream)
+
+            listener.cancel()
+
+    loop.run_until_complete(asyncio.wait_for(_test(), 5))
+
+    snapshot = client.metrics.snapshot()
+    assert snapshot['clock_offset'] is not None
+    instrument = snapshot['instruments']['BTCUSD.SPOT']
+    for stage in ('wire', 'decode', 'dispatch'):
+        assert instrument[stage]['count'] == 3
+    delivery, = instrument['delivery'].values()
+    assert delivery['count'] == 3
@@ -0,0 +1,52 @@
+import math
+import numpy as np
+
+from b2c2.frames import QuoteStreamFrame, TrustedQuoteStreamFrame
+from b2c2.ladder import Ladder
+from tests.frame_examples import frames
+
+
+def test_ladder_from_frame():
+    ladder = QuoteStreamFrame(**frames.subscribe_stream_frame).ladder
+
+    assert list(ladder.ask_quantity) == [1, 3]
+    assert list(ladder.ask_price) == [8944.4, 8955.1]
+    assert list(ladder.bid_quantity) == [1, 3]
+    assert list(ladder.bid_price) == [8940.5, 8918.7]
+
+    assert ladder.best_ask == 8944.4
+    assert ladder.best_bid == 8940.5
+    assert math.isclose(ladder.mid, 8942.45)
+    assert math.isclose(ladder.spread, 3.9)
+
+
+def test_trusted_frame_ladder_matches():
+    validated = QuoteStreamFrame(**frames.subscribe_stream_frame).ladder
+    trusted = TrustedQuoteStreamFrame(frames.subscribe_stream_frame).ladder
+
+    assert np.array_equal(validated.ask_price, trusted.ask_price)
+    assert np.array_equal(validated.bid_price, trusted.bid_price)
+
+
+def test_ladder_vwap():
+    ladder = Ladder.from_levels({
+        # Out of order on purpose
+        'buy': [
+            {'quantity': '3', 'price': '12'},
+            {'quantity': '1', 'price': '11'},
+        ],
+        'sell': [{'quantity': '1', 'price': '9'}],
+    })
+
+    assert ladder.vwap('buy', 1) == 11
+    assert ladder.vwap('buy', 2) == 12
+    assert math.isnan(ladder.vwap('sell', 2))
+    assert np.array_equal(
+        ladder.vwap('buy', [0.5, 3, 4]), [11, 12, np.nan], equal_nan=True
+    )
+
+
+def test_empty_ladder():
+    ladder = Ladder.from_levels({'buy': [], 'sell': []})
+    assert math.isnan(ladder.mid)
+    assert math.isnan(ladder.vwap('buy', 1))
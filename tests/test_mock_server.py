@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from b2c2.client import BaseB2C2APIClient
+from b2c2.exceptions import B2C2HTTPException, QuoteException
+from b2c2.frames import QuoteSubscribeFrame
+from b2c2.mock_server import MockB2C2Server
+from b2c2.models import RequestForQuote
+from b2c2.stream_utils import anext
+from b2c2.websocket import B2C2WebsocketClient
+
+
+loop = asyncio.get_event_loop()
+
+
+def _api_client(rest_api, websocket='ws://unused'):
+    return BaseB2C2APIClient(env={
+        'rest_api': rest_api, 'websocket': websocket
+    })
+
+
+def test_mock_rest_quote_and_trade(api_key, rest_server):
+    client = _api_client(rest_server.url)
+
+    instruments = client.get_instruments()
+    assert [i.name for i in instruments.__root__][:2] == [
+        'BTCUSD.SPOT', 'BTCEUR.SPOT'
+    ]
+
+    quote = client.post_request_for_quote(RequestForQuote(
+        quantity=Decimal(2), side='buy', instrument='BTCUSD.SPOT'
+    ))
+    assert not quote.expired
+
+    trade = client.post_trade(quote.get_trade())
+    assert trade.price == quote.price
+
+    balances = client.get_balance()
+    assert balances['BTC'] == 2
+    assert balances['USD'] == 1000000 - 2 * quote.price
+
+    # A quote can only be traded once
+    with pytest.raises(B2C2HTTPException):
+        client.post_trade(quote.get_trade())
+
+
+def test_mock_rest_counts_concurrent_requests(api_key, rest_server):
+    # A client (and its session) per thread
+    with ThreadPoolExecutor(8) as executor:
+        for _ in executor.map(
+            lambda _: _api_client(rest_server.url).get_balance(), range(40)
+        ):
+            pass
+
+    assert rest_server.requests == 40
+
+
+def test_mock_rest_rejects_bad_token(monkeypatch, rest_server):
+    monkeypatch.setenv('B2C2_APIKEY', 'wrong')
+    with pytest.raises(B2C2HTTPException) as e:
+        _api_client(rest_server.url).get_balance()
+
+    assert e.value.error_response.status_code == 401
+
+
+def test_mock_websocket(api_key):
+    received = {}
+
+    async def _test():
+        async with MockB2C2Server(tick_rate=200, seed=1) as server:
+            client = B2C2WebsocketClient(
+                _api_client(server.rest.url, server.websocket.url)
+            )
+            async with client.connect():
+                async with client.tradable_instruments.stream() as tradable:
+                    listener = asyncio.ensure_future(client.listen())
+                    received['tradable'] = await anext(tradable)
+
+                req = QuoteSubscribeFrame(
+                    instrument='ETHUSD.SPOT', levels=[1, 5]
+                )
+                async with client.quote_subscribe(req) as fanout:
+                    async with fanout.stream() as stream:
+                        received['price'] = await anext(stream)
+
+                with pytest.raises(QuoteException):
+                    async with client.quote_subscribe(QuoteSubscribeFrame(
+                        instrument='NOPE.SPOT', levels=[1]
+                    )):
+                        pass
+
+                listener.cancel()
+
+    loop.run_until_complete(asyncio.wait_for(_test(), 5))
+
+    assert 'BTCUSD' in received['tradable'].tradable_instruments
+    price = received['price']
+    assert [i.quantity for i in price.levels.buy] == [1, 5]
+    assert price.levels.buy[0].price > price.levels.sell[0].price
+
+
+def test_mock_websocket_lists_new_instruments(api_key):
+    received = {}
+
+    async def _test():
+        async with MockB2C2Server(tick_rate=200, seed=1) as server:
+            client = B2C2WebsocketClient(
+                _api_client(server.rest.url, server.websocket.url)
+            )
+            async with client.connect():
+                async with client.tradable_instruments.stream() as tradable:
+                    listener = asyncio.ensure_future(client.listen())
+                    await anext(tradable)
+                    await server.websocket.update_tradable_instruments(
+                        ['BTCUSD.SPOT', 'LTCEUR.SPOT']
+                    )
+                    received['tradable'] = await anext(tradable)
+
+                req = QuoteSubscribeFrame(
+                    instrument='LTCEUR.SPOT', levels=[1]
+                )
+                async with client.quote_subscribe(req) as fanout:
+                    async with fanout.stream() as stream:
+                        # Ticks, rather than failing the ticker
+                        received['prices'] = [
+                            await anext(stream), await anext(stream)
+                        ]
+
+                listener.cancel()
+
+            with pytest.raises(ValueError):
+                server.exchange.list_instruments(['DOGEUSD.SPOT'])
+
+    loop.run_until_complete(asyncio.wait_for(_test(), 5))
+
+    assert received['tradable'].tradable_instruments == ['BTCUSD', 'LTCEUR']
+    assert all(
+        price.instrument == 'LTCEUR.SPOT' for price in received['prices']
+    )
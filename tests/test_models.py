@@ -22,8 +22,11 @@ def test_can_add_trade_to_balance():
         executing_unit=''
     )
 
+    original = balance
     balance += trade_resp
     assert balance['BTC'] == 1
+    # Not changed in place, balances may be cached
+    assert original['BTC'] == 0
 
     trade_resp.side = SideEnum.sell
     balance += trade_resp
@@ -32,3 +35,7 @@ def test_can_add_trade_to_balance():
     with pytest.raises(ValueError):
         trade_resp.instrument = 'unknown'
         balance += trade_resp
+
+
+def test_not_bound_by_default():
+    assert not Balances(__root__={}).is_bound
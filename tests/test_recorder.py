@@ -0,0 +1,159 @@
+import os
+import glob
+import asyncio
+import numpy as np
+
+from decimal import Decimal
+from b2c2.fanout import Fanout
+from b2c2.frames import QuoteStreamFrame, TrustedQuoteStreamFrame
+from b2c2.recorder import TickRecorder
+from b2c2.tick_format import (
+    HEADER, TickFileHeader, record_dtype, record_struct, read_index,
+    from_fixed, index_path,
+)
+from tests.frame_examples import frames
+
+
+loop = asyncio.get_event_loop()
+
+
+def _price(instrument, timestamp, quantities=('1', '3')):
+    return {
+        **frames.subscribe_stream_frame,
+        'instrument': instrument,
+        'timestamp': timestamp,
+        'levels': {
+            side: [
+                {'quantity': q, 'price': '8944.41'} for q in quantities
+            ] for side in ('buy', 'sell')
+        }
+    }
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    header = TickFileHeader.unpack(data)
+    return header, np.frombuffer(
+        data, dtype=record_dtype(header.depth), offset=HEADER.size
+    )
+
+
+def test_record_dtype_matches_struct():
+    for depth in (1, 8, 20):
+        assert record_struct(depth).size == record_dtype(depth).itemsize
+
+
+def test_recorder_writes_fixed_point_records(tmpdir):
+    with TickRecorder(str(tmpdir), depth=2, buffer_size=2) as recorder:
+        recorder.record(TrustedQuoteStreamFrame(_price('BTCUSD.SPOT', 1)))
+        recorder.record(QuoteStreamFrame(**_price('ETHUSD.SPOT', 2)))
+        # One level too many
+        recorder.record(TrustedQuoteStreamFrame(
+            _price('BTCUSD.SPOT', 3, ('1', '3', '5'))
+        ))
+
+    path, = glob.glob(os.path.join(str(tmpdir), '*.ticks'))
+    header, records = _read(path)
+
+    assert header.depth == 2
+    assert records['timestamp'].tolist() == [1, 2, 3]
+    assert records['instrument'].tolist() == [0, 1, 0]
+    assert records['buy_count'].tolist() == [2, 2, 2]
+    assert from_fixed(
+        records['buy_price'][0][0], header.price_decimals
+    ) == Decimal('8944.41')
+    assert recorder.truncated == 2
+
+    index = read_index(path)
+    assert index['records'] == 3
+    assert index['instruments'] == {
+        'BTCUSD.SPOT': {'id': 0, 'offsets': [0, 2]},
+        'ETHUSD.SPOT': {'id': 1, 'offsets': [0]},
+    }
+    assert index['blocks'] == [[0, 2, 1, 2, [0, 1]], [2, 1, 3, 3, [0]]]
+
+
+def test_index_is_appended_to(tmpdir):
+    recorder = TickRecorder(str(tmpdir), depth=2, buffer_size=1)
+    recorder.record(TrustedQuoteStreamFrame(_price('BTCUSD.SPOT', 1)))
+    recorder.record(TrustedQuoteStreamFrame(_price('ETHUSD.SPOT', 2)))
+
+    # Readable while it's being written
+    with open(index_path(recorder.path)) as f:
+        lines = f.readlines()
+    assert len(lines) == 3
+    assert read_index(recorder.path)['records'] == 2
+
+    recorder.record(TrustedQuoteStreamFrame(_price('BTCUSD.SPOT', 3)))
+    recorder.close()
+    with open(index_path(recorder.path)) as f:
+        assert f.readlines()[:3] == lines
+
+    # A line that's still being written is left out
+    with open(index_path(recorder.path), 'a') as f:
+        f.write('{"block": [3, 1')
+    index = read_index(recorder.path)
+    assert index['records'] == 3
+    assert index['instruments']['BTCUSD.SPOT']['offsets'] == [0, 2]
+
+
+def test_recorder_rotates_by_size(tmpdir):
+    record_size = record_dtype(8).itemsize
+    with TickRecorder(
+        str(tmpdir), buffer_size=1, max_bytes=HEADER.size + 2 * record_size
+    ) as recorder:
+        for timestamp in range(5):
+            recorder.record(
+                TrustedQuoteStreamFrame(_price('BTCUSD.SPOT', timestamp))
+            )
+
+    paths = sorted(glob.glob(os.path.join(str(tmpdir), '*.ticks')))
+    assert [len(_read(path)[1]) for path in paths] == [2, 2, 1]
+
+
+def test_recorder_consumes_fanout(tmpdir):
+    fanout = Fanout(asyncio.Queue())
+    recorder = TickRecorder(str(tmpdir))
+
+    async def _test():
+        consumer = asyncio.ensure_future(recorder.consume(fanout))
+        await asyncio.sleep(0)
+        for timestamp in range(10):
+            await fanout._queue.put(
+                TrustedQuoteStreamFrame(_price('BTCUSD.SPOT', timestamp))
+            )
+        while recorder.recorded < 10:
+            await asyncio.sleep(0)
+
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+
+    loop.run_until_complete(asyncio.wait_for(_test(), 5))
+    recorder.close()
+
+    _, records = _read(recorder.path)
+    assert records['timestamp'].tolist() == list(range(10))
+
+
+def test_recorder_flushes_idle_streams(tmpdir):
+    fanout = Fanout(asyncio.Queue())
+    recorder = TickRecorder(str(tmpdir), flush_interval=0.05)
+
+    async def _test():
+        consumer = asyncio.ensure_future(recorder.consume(fanout))
+        await asyncio.sleep(0)
+        await fanout._queue.put(
+            TrustedQuoteStreamFrame(_price('BTCUSD.SPOT', 1))
+        )
+        # Nothing else arrives, it's written on time all the same
+        await asyncio.sleep(0.2)
+        written = len(_read(recorder.path)[1])
+
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        return written
+
+    assert loop.run_until_complete(asyncio.wait_for(_test(), 5)) == 1
+    recorder.close()
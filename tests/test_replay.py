@@ -0,0 +1,100 @@
+import asyncio
+
+from b2c2.archive import TickArchive
+from b2c2.replay import TickReplay
+from b2c2.stream_utils import anext
+from b2c2.frames import QuoteSubscribeFrame
+from tests.test_archive import _record
+
+
+loop = asyncio.get_event_loop()
+
+
+def _archive(tmpdir):
+    ticks = [
+        ('BTCUSD.SPOT' if t % 3 else 'ETHUSD.SPOT', 1000 + t * 10)
+        for t in range(30)
+    ]
+    _record(tmpdir, ticks, buffer_size=8)
+    return TickArchive(str(tmpdir))
+
+
+def test_replay_as_fast_as_possible(tmpdir):
+    replay = TickReplay(_archive(tmpdir))
+    client = replay.client()
+
+    report = loop.run_until_complete(
+        asyncio.wait_for(replay.run(client), 5)
+    )
+
+    assert report.frames == report.consumed == 30
+    assert report.throughput > 0
+    assert report.schedule_lag['count'] == 0
+    instruments = report.metrics['instruments']
+    assert instruments['BTCUSD.SPOT']['dispatch']['count'] == 20
+    assert instruments['ETHUSD.SPOT']['dispatch']['count'] == 10
+    delivery, = instruments['ETHUSD.SPOT']['delivery'].values()
+    assert delivery['count'] == 10
+
+
+def test_replay_paced_and_filtered(tmpdir):
+    # 290ms of ticks at 10x
+    replay = TickReplay(
+        _archive(tmpdir), speed=10, instruments=['ETHUSD.SPOT']
+    )
+
+    report = loop.run_until_complete(
+        asyncio.wait_for(replay.run(replay.client(metrics=False)), 5)
+    )
+
+    assert report.frames == 10
+    assert report.elapsed >= 0.027 * 0.9
+    assert report.metrics is None
+
+
+def test_replay_gives_up_on_lost_frames(tmpdir):
+    replay = TickReplay(_archive(tmpdir))
+    next_message = replay._next_message
+
+    async def _next_message(websocket):
+        message = await next_message(websocket)
+        if replay.sent == 30:
+            # Sent, and lost before it reached a consumer
+            replay.sent += 1
+        return message
+
+    replay._next_message = _next_message
+    report = loop.run_until_complete(asyncio.wait_for(
+        replay.run(replay.client(metrics=False), timeout=0.1), 5
+    ))
+
+    assert report.frames == 31
+    assert report.consumed == 30
+    # Up to the last frame consumed, not the timeout
+    assert report.elapsed < 0.1
+
+
+def test_replay_by_hand(tmpdir):
+    replay = TickReplay(_archive(tmpdir))
+    client = replay.client()
+    received = []
+
+    async def _test():
+        async with client.connect():
+            listener = asyncio.ensure_future(client.listen())
+            req = QuoteSubscribeFrame(instrument='ETHUSD.SPOT', levels=[1])
+            async with client.quote_subscribe(req) as fanout:
+                async with fanout.stream() as stream:
+                    replay.start()
+                    for _ in range(10):
+                        received.append(await anext(stream))
+
+            await asyncio.gather(listener, return_exceptions=True)
+
+    loop.run_until_complete(asyncio.wait_for(_test(), 5))
+
+    assert [frame.timestamp for frame in received] == [
+        1000 + t * 10 for t in range(0, 30, 3)
+    ]
+    # Only what was subscribed to was sent
+    assert replay.sent == 10
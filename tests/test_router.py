@@ -0,0 +1,43 @@
+import asyncio
+
+from b2c2.frames import BaseRepsonseFrame, ErrorResponseFrame
+from b2c2.router import FrameRouter
+from tests.frame_examples import frames
+
+
+loop = asyncio.get_event_loop()
+
+
+class PingFrame(BaseRepsonseFrame):
+    pass
+
+
+def test_errors_are_matched_before_events():
+    router = FrameRouter()
+    router.set_error_route(ErrorResponseFrame, None)
+    router.add_route('subscribe', None, None)
+
+    route = router.match(frames.error_response_bad_instrument)
+    assert route.frame_cls is ErrorResponseFrame
+
+
+def test_unknown_event_is_not_matched():
+    router = FrameRouter()
+    assert router.match({'event': 'unknown', 'success': True}) is None
+    assert router.match({}) is None
+
+
+def test_dispatch_new_event_type():
+    router = FrameRouter()
+    received = []
+
+    async def on_ping(frame):
+        received.append(frame)
+
+    router.add_route('ping', PingFrame, on_ping)
+    loop.run_until_complete(
+        router.dispatch({'event': 'ping', 'success': True})
+    )
+
+    frame, = received
+    assert isinstance(frame, PingFrame)
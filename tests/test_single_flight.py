@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import time
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+from b2c2.client import AsyncBaseB2C2APIClient, BaseB2C2APIClient
+from b2c2.single_flight import AsyncSingleFlight, SingleFlight
+
+
+loop = asyncio.get_event_loop()
+
+
+@pytest.fixture
+def latency():
+    # Slow enough that the requests overlap
+    return 0.1
+
+
+def test_threads_share_a_call():
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def _call():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return object()
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        first = executor.submit(flight.do, 'key', _call)
+        started.wait()
+        others = [executor.submit(flight.do, 'key', _call) for _ in range(4)]
+        results = [first.result()] + [f.result() for f in others]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.coalesced == 4
+
+    # Done, the next call is made again
+    flight.do('key', _call)
+    assert len(calls) == 2
+
+
+def test_threads_share_an_error():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def _call():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError('nope')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(flight.do, 'key', _call)
+        started.wait()
+        second = executor.submit(flight.do, 'key', _call)
+
+        for future in (first, second):
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_coroutines_share_a_call():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def _call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return object()
+
+    async def _test():
+        first = asyncio.ensure_future(flight.do('key', _call))
+        others = [
+            asyncio.ensure_future(flight.do('key', _call)) for _ in range(4)
+        ]
+        # Cancelling the first caller leaves the call running
+        await asyncio.sleep(0)
+        first.cancel()
+        return await asyncio.gather(*others)
+
+    results = loop.run_until_complete(_test())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.coalesced == 4
+
+
+def test_client_coalesces_gets(api_key, rest_server, rest_env):
+    client = BaseB2C2APIClient(rest_env)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        balances = list(executor.map(
+            lambda _: client.get_balance(), range(8)
+        ))
+
+    assert rest_server.requests == 1
+    assert all(balance is balances[0] for balance in balances)
+
+
+def test_async_client_coalesces_gets(api_key, rest_server, rest_env):
+    async def _test():
+        async with AsyncBaseB2C2APIClient(rest_env) as client:
+            balances = await asyncio.gather(
+                *(client.get_balance() for _ in range(8))
+            )
+            assert all(balance is balances[0] for balance in balances)
+            assert client.single_flight.coalesced == 7
+
+            # Not shared after an invalidation, it could be out of
+            # date (e.g. from before a trade)
+            client.cache.invalidate('/balance/')
+            first = asyncio.ensure_future(client.get_balance())
+            await asyncio.sleep(0.01)
+            client.cache.invalidate('/balance/')
+            second = await client.get_balance()
+            assert await first is not second
+
+    loop.run_until_complete(_test())
+    assert rest_server.requests == 3
@@ -0,0 +1,114 @@
+import gc
+import pytest
+
+from decimal import Decimal
+from tests.frame_examples import frames
+from b2c2.frames import QuoteStreamFrame, TrustedQuoteStreamFrame
+from b2c2.subscription_index import SubscriptionIndex
+
+
+class Consumer:
+    # Stands in for a fanout, only needs to be weakly referenceable
+    pass
+
+
+def _price(quantities):
+    return {
+        **frames.subscribe_stream_frame,
+        'levels': {
+            side: [
+                {'quantity': q, 'price': '1'} for q in quantities
+            ] for side in ('buy', 'sell')
+        }
+    }
+
+
+def _quantities(frame):
+    return [item.quantity for item in frame.levels.buy]
+
+
+@pytest.mark.parametrize('frame_cls', [
+    QuoteStreamFrame.parse_obj, TrustedQuoteStreamFrame
+])
+def test_targets_filter_levels(frame_cls):
+    index = SubscriptionIndex()
+    route = index.route('BTCUSD.SPOT')
+    everything, some = Consumer(), Consumer()
+    route.add((Decimal(1), Decimal(3), Decimal(5)), everything)
+    # Formatted differently to the server
+    route.add((Decimal('1.00'), Decimal(5)), some)
+    route.set_upstream((Decimal(1), Decimal(3), Decimal(5)))
+
+    frame = frame_cls(_price(('1', '3', '5.0')))
+    targets = dict(
+        (id(consumer), routed) for consumer, routed in route.targets(frame)
+    )
+
+    assert targets[id(everything)] is frame
+    assert _quantities(targets[id(some)]) == [1, 5]
+    assert index.wanted_levels('BTCUSD.SPOT') == {1, 3, 5}
+
+
+def test_targets_cached_per_quantity_layout():
+    route = SubscriptionIndex().route('BTCUSD.SPOT')
+    consumer = Consumer()
+    route.add((Decimal(1),), consumer)
+    route.set_upstream((Decimal(1), Decimal(3)))
+
+    for _ in range(3):
+        list(route.targets(TrustedQuoteStreamFrame(_price(('1', '3')))))
+    assert len(route._selections) == 1
+
+    # The server only sent what the consumer wanted
+    frame = TrustedQuoteStreamFrame(_price(('1',)))
+    (_, routed), = route.targets(frame)
+    assert routed is frame
+    assert len(route._selections) == 2
+
+
+def test_targets_skip_collected_consumers():
+    index = SubscriptionIndex()
+    route = index.route('BTCUSD.SPOT')
+    kept, dropped = Consumer(), Consumer()
+    route.add((Decimal(1),), kept)
+    route.add((Decimal(3),), dropped)
+    route.set_upstream((Decimal(1), Decimal(3)))
+
+    frame = TrustedQuoteStreamFrame(_price(('1', '3')))
+    assert len(list(route.targets(frame))) == 2
+
+    del dropped
+    gc.collect()
+
+    assert [c for c, _ in route.targets(frame)] == [kept]
+    index.prune('BTCUSD.SPOT')
+    assert index.get('BTCUSD.SPOT') is route
+
+    del kept
+    gc.collect()
+    index.prune('BTCUSD.SPOT')
+    assert index.get('BTCUSD.SPOT') is None
+
+
+def test_targets_pass_through_without_reading_levels(monkeypatch):
+    route = SubscriptionIndex().route('BTCUSD.SPOT')
+    consumer = Consumer()
+    route.add((Decimal(1), Decimal(3)), consumer)
+    route.set_upstream((Decimal(3), Decimal(1)))
+
+    frame = QuoteStreamFrame.parse_obj(_price(('1', '3')))
+    monkeypatch.setattr(
+        QuoteStreamFrame, '_level_quantities', lambda self: 1 / 0
+    )
+    (_, routed), = route.targets(frame)
+    assert routed is frame
+    assert route._selections == {}
+
+
+def test_validated_frames_are_laid_out_by_the_servers_quantities():
+    frame = QuoteStreamFrame.parse_obj(_price(('1', '3.0')))
+    assert frame._level_quantities() == (('1', '3.0'), ('1', '3.0'))
+
+    # Filtered copies don't keep the original levels
+    filtered = frame._select_levels([0], [0])
+    assert filtered._level_quantities() == ((Decimal(1),), (Decimal(1),))
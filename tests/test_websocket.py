@@ -1,11 +1,18 @@
+import gc
+import json
 import pytest
 import asyncio
 
+from contextlib import asynccontextmanager
 from unittest.mock import MagicMock
+from websockets.exceptions import ConnectionClosedError
 from b2c2.websocket import B2C2WebsocketClient
-from b2c2.frames import QuoteSubscribeFrame, QuoteUnsubscribeFrame
+from b2c2.frames import (
+    QuoteSubscribeFrame, QuoteUnsubscribeFrame, TrustedQuoteStreamFrame,
+    ConnectionLostFrame, ConnectionGapFrame,
+)
 from b2c2.stream_utils import anext
-from b2c2.exceptions import quote_exceptions
+from b2c2.exceptions import quote_exceptions, WebsocketDisconnectedException
 from tests.frame_examples import frames
 
 
@@ -183,6 +190,32 @@ def test_subscribe_queues():
     )
 
 
+def test_subscribe_queues_trusted_stream():
+    client = B2C2WebsocketTestClient(trusted_stream=True)
+    frames_queue = asyncio.Queue()
+    client.stream = frames.stream(frames_queue)
+    received = []
+
+    async def _test():
+        loop.create_task(frames_queue.put(frames.subscribe_request_success))
+        subscribe_req = QuoteSubscribeFrame(**frames.subscribe_request)
+        async with client.quote_subscribe(subscribe_req) as fanout:
+            loop.create_task(frames_queue.put(frames.subscribe_stream_frame))
+            async with fanout.stream() as stream:
+                received.append(await anext(stream))
+
+    loop.run_until_complete(
+        asyncio.wait(
+            [client.listen(), _test()],
+            return_when=asyncio.FIRST_COMPLETED
+        )
+    )
+
+    frame, = received
+    assert isinstance(frame, TrustedQuoteStreamFrame)
+    assert frame.timestamp == frames.subscribe_stream_frame['timestamp']
+
+
 def test_subscribe_error():
     client = B2C2WebsocketTestClient()
     frames_queue = asyncio.Queue()
@@ -210,3 +243,238 @@ def test_subscribe_error():
     assert (
         type(task.exception()) == quote_exceptions.InvalidSubscriptionRequest
     )
+
+
+def test_stream_skips_undecodable_messages():
+    client = B2C2WebsocketTestClient()
+    messages = iter([
+        '<html>Bad Gateway</html>',
+        json.dumps(frames.tradable_instruments).encode(),
+    ])
+    client._websocket.recv.side_effect = (
+        lambda: async_return(next(messages))
+    )
+
+    frame = loop.run_until_complete(anext(client.stream()))
+    assert frame == frames.tradable_instruments
+
+
+class FakeWebsocket:
+    """
+    Answers subscribe requests and plays back frames until
+    it is told to drop the connection.
+    """
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        # Event of the request to drop the connection on
+        self.drop_on = None
+
+    async def recv(self):
+        frame = await self.incoming.get()
+        if frame is None:
+            raise ConnectionClosedError(1006, '')
+        return json.dumps(frame)
+
+    async def send(self, message):
+        request = json.loads(message)
+        self.sent.append(request)
+        if request['event'] == self.drop_on:
+            self.incoming.put_nowait(None)
+        else:
+            self.incoming.put_nowait({**request, 'success': True})
+
+    @asynccontextmanager
+    async def connected(self):
+        yield self
+
+
+class B2C2ReconnectingTestClient(B2C2WebsocketTestClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = []
+
+    def _open_websocket(self):
+        websocket = FakeWebsocket()
+        self.connections.append(websocket)
+        return websocket.connected()
+
+
+def test_supervise_reconnects_and_resubscribes():
+    client = B2C2ReconnectingTestClient()
+    received = []
+    events = []
+
+    async def _test():
+        supervisor = asyncio.ensure_future(client.supervise(backoff=0))
+        await asyncio.sleep(0)
+
+        async with client.connection_events.stream() as connection_events:
+            subscribe_req = QuoteSubscribeFrame(**frames.subscribe_request)
+            async with client.quote_subscribe(subscribe_req) as fanout:
+                async with fanout.stream() as stream:
+                    first, = client.connections
+                    first.incoming.put_nowait(frames.subscribe_stream_frame)
+                    received.append(await anext(stream))
+
+                    # Drop the connection
+                    first.incoming.put_nowait(None)
+                    events.append(await anext(connection_events))
+                    events.append(await anext(connection_events))
+
+                    _, second = client.connections
+                    second.incoming.put_nowait(frames.subscribe_stream_frame)
+                    received.append(await anext(stream))
+
+        supervisor.cancel()
+
+    loop.run_until_complete(asyncio.wait_for(_test(), 5))
+
+    first, second = client.connections
+    assert [r['event'] for r in second.sent] == ['subscribe']
+    assert second.sent[0]['tag'] != first.sent[0]['tag']
+    assert len(received) == 2
+
+    lost, gap = events
+    assert isinstance(lost, ConnectionLostFrame)
+    assert isinstance(gap, ConnectionGapFrame)
+    assert gap.resubscribed == ['BTCUSD.SPOT']
+    assert gap.downtime >= 0
+
+
+def test_pending_requests_fail_on_disconnect():
+    client = B2C2WebsocketTestClient()
+    future = asyncio.Future()
+    client._pending_tags['tag'] = future
+
+    client._fail_pending_tags()
+
+    assert isinstance(future.exception(), WebsocketDisconnectedException)
+    assert client._pending_tags == {}
+
+
+def test_subscribe_multiplexes_levels():
+    client = B2C2ReconnectingTestClient()
+    received = {}
+
+    def _req(levels):
+        return QuoteSubscribeFrame(
+            event='subscribe', instrument='BTCUSD.SPOT', levels=levels
+        )
+
+    price = {
+        **frames.subscribe_stream_frame,
+        'levels': {
+            side: [
+                {'quantity': q, 'price': '1'} for q in ('1', '3', '5.0')
+            ] for side in ('buy', 'sell')
+        }
+    }
+
+    async def _test():
+        async with client.connect():
+            listener = asyncio.ensure_future(client.listen())
+            websocket, = client.connections
+
+            async with client.quote_subscribe(_req([1, 3])) as f1:
+                async with client.quote_subscribe(_req([1, 5])) as f2:
+                    async with f1.stream() as s1, f2.stream() as s2:
+                        websocket.incoming.put_nowait(price)
+                        received['1,3'] = await anext(s1)
+                        received['1,5'] = await anext(s2)
+
+                del f2, s2
+                gc.collect()
+                # Let the upstream subscription shrink
+                for _ in range(10):
+                    await asyncio.sleep(0)
+
+            listener.cancel()
+
+    loop.run_until_complete(asyncio.wait_for(_test(), 5))
+
+    websocket, = client.connections
+    assert [(r['event'], r.get('levels')) for r in websocket.sent] == [
+        ('subscribe', [1, 3]),
+        ('unsubscribe', None),
+        ('subscribe', [1, 3, 5]),
+        # The [1, 5] consumer went away
+        ('unsubscribe', None),
+        ('subscribe', [1, 3]),
+    ]
+
+    def quantities(frame):
+        return [item.quantity for item in frame.levels.buy]
+
+    assert quantities(received['1,3']) == [1, 3]
+    assert quantities(received['1,5']) == [1, 5]
+
+
+def test_disconnect_while_shrinking_upstream():
+    client = B2C2ReconnectingTestClient()
+    received = []
+
+    def _req(levels):
+        return QuoteSubscribeFrame(
+            event='subscribe', instrument='BTCUSD.SPOT', levels=levels
+        )
+
+    async def _test():
+        supervisor = asyncio.ensure_future(client.supervise(backoff=0))
+        await asyncio.sleep(0)
+
+        async with client.connection_events.stream() as connection_events:
+            async with client.quote_subscribe(_req([1, 3])) as f1:
+                async with client.quote_subscribe(_req([1, 5])):
+                    pass
+
+                first, = client.connections
+                first.drop_on = 'unsubscribe'
+                gc.collect()
+                # Lost while swapping [1, 3, 5] for [1, 3]
+                await anext(connection_events)
+                await anext(connection_events)
+
+                async with f1.stream() as stream:
+                    _, second = client.connections
+                    second.incoming.put_nowait(frames.subscribe_stream_frame)
+                    received.append(await anext(stream))
+
+        supervisor.cancel()
+
+    loop.run_until_complete(asyncio.wait_for(_test(), 5))
+
+    first, second = client.connections
+    assert [(r['event'], r.get('levels')) for r in first.sent][-1] == (
+        'unsubscribe', None
+    )
+    assert [(r['event'], r['levels']) for r in second.sent] == [
+        ('subscribe', [1, 3])
+    ]
+    assert len(received) == 1
+    assert client.subscribed_instruments == {'BTCUSD.SPOT'}
+
+
+def test_fanout_collected_while_disconnected():
+    client = B2C2ReconnectingTestClient()
+
+    async def _test():
+        async with client.connect():
+            listener = asyncio.ensure_future(client.listen())
+            req = QuoteSubscribeFrame(**frames.subscribe_request)
+            async with client.quote_subscribe(req) as fanout:
+                pass
+            listener.cancel()
+
+        del fanout
+        gc.collect()
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    loop.run_until_complete(asyncio.wait_for(_test(), 5))
+
+    websocket, = client.connections
+    # Nothing to tell the server, but a reconnect won't resubscribe
+    assert [r['event'] for r in websocket.sent] == ['subscribe']
+    assert client.subscribed_instruments == set()
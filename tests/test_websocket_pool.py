@@ -0,0 +1,145 @@
+import asyncio
+
+from b2c2.frames import QuoteSubscribeFrame
+from b2c2.stream_utils import anext
+from b2c2.websocket_pool import B2C2WebsocketPool, _ChangeLog
+from tests.frame_examples import frames
+from tests.test_websocket import B2C2WebsocketTestClient
+
+
+loop = asyncio.get_event_loop()
+
+
+class B2C2WebsocketTestPool(B2C2WebsocketPool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(None, *args, **kwargs)
+        self.frame_queues = []
+        for client in self.clients:
+            queue = asyncio.Queue()
+            client.stream = frames.stream(queue)
+            self.frame_queues.append(queue)
+
+    def _create_client(self, api_client, **kwargs):
+        return B2C2WebsocketTestClient(**kwargs)
+
+
+def _subscribe_req(instrument):
+    return QuoteSubscribeFrame(**{
+        **frames.subscribe_request, 'instrument': instrument
+    })
+
+
+def test_hash_sharding_is_sticky():
+    pool = B2C2WebsocketTestPool(connections=4)
+    client = pool.client_for('BTCUSD.SPOT')
+    assert pool.client_for('BTCUSD.SPOT') is client
+
+    other = B2C2WebsocketTestPool(connections=4)
+    index = pool.clients.index(client)
+    assert other.client_for('BTCUSD.SPOT') is other.clients[index]
+
+
+def test_least_loaded_sharding():
+    pool = B2C2WebsocketTestPool(connections=2, strategy='least_loaded')
+    busy, idle = pool.clients
+    busy._active_subscriptions['key'] = _subscribe_req('ETHUSD.SPOT')
+
+    assert pool.client_for('BTCUSD.SPOT') is idle
+
+
+def test_pool_subscribe_and_merged_tradable_instruments():
+    pool = B2C2WebsocketTestPool(connections=2)
+    received = []
+
+    async def _test():
+        pool._start_forwarding()
+        async with pool.tradable_instruments.stream() as instruments:
+            # Both connections announce the same instruments
+            for queue in pool.frame_queues:
+                queue.put_nowait(frames.tradable_instruments)
+            pool.frame_queues[0].put_nowait(
+                frames.tradable_instruments_update
+            )
+
+            received.append(await anext(instruments))
+            received.append(await anext(instruments))
+
+            req = _subscribe_req('BTCUSD.SPOT')
+            queue = pool.frame_queues[
+                pool.clients.index(pool.client_for(req.instrument))
+            ]
+            queue.put_nowait(frames.subscribe_request_success)
+            async with pool.quote_subscribe(req) as fanout:
+                assert list(pool.instrument_fanouts.values()) == [fanout]
+
+        pool._stop_forwarding()
+
+    done, _ = loop.run_until_complete(
+        asyncio.wait(
+            [pool.listen(), _test()],
+            return_when=asyncio.FIRST_COMPLETED
+        )
+    )
+    # Raise any assertion errors
+    done.pop().result()
+
+    first, update = received
+    assert first.tradable_instruments == ['BTCUSD', 'BTCEUR', 'ETHEUR']
+    assert update.tradable_instruments == ['BTCUSD', 'BTCEUR']
+
+
+def test_change_log_ignores_connections_catching_up():
+    changes = _ChangeLog()
+    a, b = object(), object()
+
+    assert changes.is_new(a, 'X')
+    assert changes.is_new(a, 'Y')
+    # B is behind, its X is older than the latest Y
+    assert not changes.is_new(b, 'X')
+    assert not changes.is_new(b, 'Y')
+    # Repeating the latest state
+    assert not changes.is_new(a, 'Y')
+
+    # Going back to an older state is still a change
+    assert changes.is_new(a, 'X')
+    assert not changes.is_new(b, 'X')
+
+
+def test_pool_doesnt_republish_stale_instruments():
+    pool = B2C2WebsocketTestPool(connections=2)
+    first, second = pool.frame_queues
+    latest = {
+        **frames.tradable_instruments_update,
+        'tradable_instruments': ['ETHEUR'],
+    }
+    received = []
+
+    async def _test():
+        pool._start_forwarding()
+        async with pool.tradable_instruments.stream() as instruments:
+            first.put_nowait(frames.tradable_instruments)
+            first.put_nowait(frames.tradable_instruments_update)
+            received.append(await anext(instruments))
+            received.append(await anext(instruments))
+
+            # The second connection is behind
+            second.put_nowait(frames.tradable_instruments)
+            second.put_nowait(frames.tradable_instruments_update)
+            while not second.empty():
+                await asyncio.sleep(0)
+            first.put_nowait(latest)
+            received.append(await anext(instruments))
+
+        pool._stop_forwarding()
+
+    done, _ = loop.run_until_complete(
+        asyncio.wait(
+            [pool.listen(), _test()],
+            return_when=asyncio.FIRST_COMPLETED
+        )
+    )
+    done.pop().result()
+
+    assert [frame.tradable_instruments for frame in received] == [
+        ['BTCUSD', 'BTCEUR', 'ETHEUR'], ['BTCUSD', 'BTCEUR'], ['ETHEUR']
+    ]